@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import DecisionRollup
+
+
+@admin.register(DecisionRollup)
+class DecisionRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'project', 'decided_by', 'approved', 'rejected')
+    list_filter = ('project', 'day')
+    search_fields = ('decided_by', 'project__name')
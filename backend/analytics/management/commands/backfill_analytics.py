@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily decision rollups from live and archived decisions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD, default: all history).')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD, default: today).')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Decisions read per chunk (default: 5000).')
+
+    def handle(self, *args, **options):
+        start = end = None
+        if options['start'] and (start := parse_date(options['start'])) is None:
+            raise CommandError('--start must be a date (YYYY-MM-DD).')
+        if options['end'] and (end := parse_date(options['end'])) is None:
+            raise CommandError('--end must be a date (YYYY-MM-DD).')
+
+        total = rebuild(start=start, end=end, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups from {total} decision(s).'))
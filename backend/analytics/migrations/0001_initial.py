@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('artifacts', '0003_archivedartifactversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('decided_by', models.CharField(max_length=255)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('rejection_reasons', models.JSONField(blank=True, default=dict)),
+                ('latency_sketch', models.JSONField(blank=True, default=dict)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='decision_rollups', to='artifacts.project')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['project', 'day'], name='analytics_d_project_cb9898_idx')],
+                'unique_together': {('day', 'project', 'decided_by')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+
+from artifacts.models import Project
+
+
+class DecisionRollup(models.Model):
+    """
+    Per-day, per-project, per-reviewer decision statistics.
+
+    ``latency_sketch`` holds a ``LatencySketch`` of seconds from version
+    submission to decision; sketches from different rows merge, so any date
+    range can be answered by summing rollup rows.
+    """
+    day = models.DateField()
+    project = models.ForeignKey(Project, related_name='decision_rollups', on_delete=models.CASCADE)
+    decided_by = models.CharField(max_length=255)
+    approved = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    rejection_reasons = models.JSONField(default=dict, blank=True)
+    latency_sketch = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        unique_together = ('day', 'project', 'decided_by')
+        indexes = [models.Index(fields=['project', 'day'])]
+        ordering = ['-day']
+
+    def __str__(self) -> str:
+        return f"{self.project} / {self.decided_by} on {self.day}"
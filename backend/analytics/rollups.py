@@ -0,0 +1,158 @@
+"""
+Maintain and query ``DecisionRollup`` rows.
+
+``record_decisions`` / ``record_rows`` fold new decisions into their daily
+rollups and are called from the same transaction that writes the decisions
+(``_decide`` and the history importer). ``rebuild`` recomputes a date range from scratch for
+backfills; ``summarize`` answers analytics queries from the rollups alone.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from approvals.models import ApprovalDecision, ArchivedApprovalDecision
+from .models import DecisionRollup
+from .sketch import LatencySketch
+
+
+class _Delta:
+    def __init__(self):
+        self.approved = 0
+        self.rejected = 0
+        self.reasons = Counter()
+        self.sketch = LatencySketch()
+
+
+def _collect(decisions):
+    """
+    Group ``(project_id, decided_by, decision, reason, created_at, decided_at)``
+    tuples into per-rollup deltas.
+    """
+    deltas = defaultdict(_Delta)
+    for project_id, decided_by, decision, reason, created_at, decided_at in decisions:
+        delta = deltas[(timezone.localdate(decided_at), project_id, decided_by)]
+        if decision == ApprovalDecision.Decision.APPROVE:
+            delta.approved += 1
+        else:
+            delta.rejected += 1
+            delta.reasons[reason or ''] += 1
+        delta.sketch.add((decided_at - created_at).total_seconds())
+    return deltas
+
+
+def _apply(deltas):
+    for (day, project_id, decided_by), delta in deltas.items():
+        rollup, _ = DecisionRollup.objects.select_for_update().get_or_create(
+            day=day, project_id=project_id, decided_by=decided_by,
+        )
+        rollup.approved += delta.approved
+        rollup.rejected += delta.rejected
+        reasons = Counter(rollup.rejection_reasons)
+        reasons.update(delta.reasons)
+        rollup.rejection_reasons = dict(reasons)
+        rollup.latency_sketch = LatencySketch(rollup.latency_sketch).merge(delta.sketch).to_dict()
+        rollup.save()
+
+
+def record_rows(rows):
+    """
+    Fold ``(project_id, decided_by, decision, reason, created_at, decided_at)``
+    tuples into the rollups.
+    """
+    with transaction.atomic():
+        _apply(_collect(rows))
+
+
+def record_decisions(decisions):
+    """Fold ``ApprovalDecision`` instances (with versions loaded) into the rollups."""
+    record_rows([
+        (
+            decision.artifact_version.artifact.project_id,
+            decision.decided_by,
+            decision.decision,
+            decision.reason,
+            decision.artifact_version.created_at,
+            decision.decided_at,
+        )
+        for decision in decisions
+    ])
+
+
+def _decision_rows(model, start=None, end=None):
+    queryset = model.objects.all()
+    if start:
+        queryset = queryset.filter(decided_at__date__gte=start)
+    if end:
+        queryset = queryset.filter(decided_at__date__lte=end)
+    return queryset.order_by('pk').values_list(
+        'artifact_version__artifact__project_id',
+        'decided_by',
+        'decision',
+        'reason',
+        'artifact_version__created_at',
+        'decided_at',
+    )
+
+
+def rebuild(start=None, end=None, chunk_size: int = 5000) -> int:
+    """
+    Recompute rollups for ``[start, end]`` (inclusive dates, open when None)
+    from live and archived decisions. Returns the number of decisions read.
+    """
+    total = 0
+    with transaction.atomic():
+        existing = DecisionRollup.objects.all()
+        if start:
+            existing = existing.filter(day__gte=start)
+        if end:
+            existing = existing.filter(day__lte=end)
+        existing.delete()
+
+        for model in (ApprovalDecision, ArchivedApprovalDecision):
+            chunk = []
+            for row in _decision_rows(model, start, end).iterator(chunk_size=chunk_size):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    _apply(_collect(chunk))
+                    total += len(chunk)
+                    chunk = []
+            _apply(_collect(chunk))
+            total += len(chunk)
+    return total
+
+
+def summarize(rollups, group_by: str = 'project'):
+    """Merge rollup rows into one result per project or reviewer."""
+    key_field = 'project_id' if group_by == 'project' else 'decided_by'
+    groups = {}
+    for rollup in rollups:
+        key = getattr(rollup, key_field)
+        group = groups.setdefault(key, _Delta())
+        group.approved += rollup.approved
+        group.rejected += rollup.rejected
+        group.reasons.update(rollup.rejection_reasons)
+        group.sketch.merge(LatencySketch(rollup.latency_sketch))
+
+    results = []
+    for key, group in groups.items():
+        decided = group.approved + group.rejected
+        results.append({
+            'project' if group_by == 'project' else 'decided_by': key,
+            'decisions': decided,
+            'approved': group.approved,
+            'rejected': group.rejected,
+            'approval_rate': round(group.approved / decided, 4) if decided else None,
+            'rejection_rate': round(group.rejected / decided, 4) if decided else None,
+            'rejection_reasons': dict(group.reasons.most_common()),
+            'time_to_decision_seconds': {
+                'median': _round(group.sketch.quantile(0.5)),
+                'p90': _round(group.sketch.quantile(0.9)),
+            },
+        })
+    results.sort(key=lambda result: -result['decisions'])
+    return results
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
@@ -0,0 +1,52 @@
+"""
+Mergeable quantile sketch for time-to-decision.
+
+A log-bucketed histogram in the style of DDSketch: every value lands in the
+bucket ``ceil(log_gamma(value))``, so any quantile read back is within
+``RELATIVE_ACCURACY`` of the true value. Two sketches merge by adding bucket
+counts, which is what lets daily rollups combine over arbitrary date ranges.
+"""
+import math
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Values below one second are recorded as one second.
+MIN_VALUE = 1.0
+
+
+class LatencySketch:
+    def __init__(self, buckets=None):
+        # JSON object keys are strings; keep ints in memory.
+        self.buckets = {int(index): count for index, count in (buckets or {}).items()}
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        index = math.ceil(math.log(max(value, MIN_VALUE)) / _LOG_GAMMA)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: 'LatencySketch'):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        return self
+
+    def quantile(self, q: float):
+        """Return the approximate ``q`` quantile (0..1), or ``None`` when empty."""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms.
+                return 2 * GAMMA ** index / (GAMMA + 1)
+        return 2 * GAMMA ** max(self.buckets) / (GAMMA + 1)
+
+    def to_dict(self) -> dict:
+        return {str(index): count for index, count in self.buckets.items()}
@@ -0,0 +1,125 @@
+"""
+Tests for the approval analytics rollups and the /api/analytics/ endpoint.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from analytics.models import DecisionRollup
+from analytics.sketch import LatencySketch
+from approvals.models import ApprovalDecision
+from artifacts.models import Artifact, ArtifactVersion, Project
+
+
+class LatencySketchTest(TestCase):
+    """Test the mergeable quantile sketch."""
+
+    def test_quantiles_are_within_relative_accuracy(self):
+        """Test that median and p90 land within 1% of the exact values."""
+        sketch = LatencySketch()
+        for value in range(1, 10001):
+            sketch.add(value)
+        self.assertAlmostEqual(sketch.quantile(0.5), 5000, delta=5000 * 0.011)
+        self.assertAlmostEqual(sketch.quantile(0.9), 9000, delta=9000 * 0.011)
+
+    def test_merged_sketches_match_a_single_sketch(self):
+        """Test that merging per-day sketches equals sketching everything at once."""
+        whole, left, right = LatencySketch(), LatencySketch(), LatencySketch()
+        for value in range(1, 2001):
+            whole.add(value * 7)
+            (left if value % 2 else right).add(value * 7)
+        merged = LatencySketch(left.to_dict()).merge(LatencySketch(right.to_dict()))
+        self.assertEqual(merged.buckets, whole.buckets)
+        self.assertIsNone(LatencySketch().quantile(0.5))
+
+
+class AnalyticsAPITest(APITestCase):
+    """Test that decisions feed the rollups and the endpoint reads them."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Analytics Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Analytics Artifact")
+
+    def decide(self, number, action, decided_by='client@example.com', reason=''):
+        version = ArtifactVersion.objects.create(
+            artifact=self.artifact,
+            version_number=number,
+            url=f'https://example.com/analytics/v{number}',
+        )
+        response = self.client.post(
+            f'/api/artifact-versions/{version.id}/{action}/',
+            {'decided_by': decided_by, 'reason': reason},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return version
+
+    def test_decisions_update_rollups_incrementally(self):
+        """Test that approve/reject fold into the daily rollup row."""
+        self.decide(1, 'approve')
+        self.decide(2, 'reject', reason='Off brand')
+        self.decide(3, 'reject', reason='Off brand')
+
+        rollup = DecisionRollup.objects.get()
+        self.assertEqual(rollup.day, timezone.localdate())
+        self.assertEqual((rollup.approved, rollup.rejected), (1, 2))
+        self.assertEqual(rollup.rejection_reasons, {'Off brand': 2})
+        self.assertEqual(LatencySketch(rollup.latency_sketch).count, 3)
+
+    def test_endpoint_groups_by_project_and_reviewer(self):
+        """Test /api/analytics/ rates and grouping."""
+        self.decide(1, 'approve', decided_by='a@client.com')
+        self.decide(2, 'approve', decided_by='a@client.com')
+        self.decide(3, 'reject', decided_by='b@client.com', reason='Typos')
+
+        response = self.client.get('/api/analytics/', {'project': self.project.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [result] = response.data['results']
+        self.assertEqual(result['project'], self.project.id)
+        self.assertEqual(result['decisions'], 3)
+        self.assertAlmostEqual(result['approval_rate'], 0.6667)
+        self.assertEqual(result['rejection_reasons'], {'Typos': 1})
+        self.assertIsNotNone(result['time_to_decision_seconds']['median'])
+
+        response = self.client.get('/api/analytics/', {'group_by': 'reviewer'})
+        by_reviewer = {r['decided_by']: r for r in response.data['results']}
+        self.assertEqual(by_reviewer['a@client.com']['approved'], 2)
+        self.assertEqual(by_reviewer['b@client.com']['rejected'], 1)
+
+    def test_date_range_filters_rollups(self):
+        """Test that start/end select whole days of rollups."""
+        self.decide(1, 'approve')
+        yesterday = timezone.localdate() - timedelta(days=1)
+        response = self.client.get('/api/analytics/', {'end': yesterday.isoformat()})
+        self.assertEqual(response.data['results'], [])
+
+        response = self.client.get('/api/analytics/', {'start': 'not-a-date'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_backfill_rebuilds_from_decisions(self):
+        """Test that the backfill command recomputes rollups for existing history."""
+        version = ArtifactVersion.objects.create(
+            artifact=self.artifact, version_number=1, url='https://example.com/old'
+        )
+        decision = ApprovalDecision.objects.create(
+            artifact_version=version, decision=ApprovalDecision.Decision.REJECT,
+            reason='Late', decided_by='c@client.com',
+        )
+        ApprovalDecision.objects.filter(pk=decision.pk).update(
+            decided_at=version.created_at + timedelta(hours=2)
+        )
+        self.assertFalse(DecisionRollup.objects.exists())
+
+        call_command('backfill_analytics', stdout=StringIO())
+        rollup = DecisionRollup.objects.get()
+        self.assertEqual(rollup.rejected, 1)
+        self.assertAlmostEqual(LatencySketch(rollup.latency_sketch).quantile(0.5), 7200, delta=72)
+
+        # Rebuilding is idempotent.
+        call_command('backfill_analytics', stdout=StringIO())
+        self.assertEqual(DecisionRollup.objects.get().rejected, 1)
@@ -0,0 +1,45 @@
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import DecisionRollup
+from .rollups import summarize
+
+
+class AnalyticsView(APIView):
+    """
+    Approval analytics answered from the daily rollups.
+
+    Query parameters (all optional): ``start`` / ``end`` (YYYY-MM-DD,
+    inclusive), ``project`` (id), ``decided_by`` and ``group_by``
+    (``project`` or ``reviewer``, default ``project``).
+    """
+    def get(self, request):
+        params = request.query_params
+        group_by = params.get('group_by', 'project')
+        if group_by not in ('project', 'reviewer'):
+            return Response({'detail': "group_by must be 'project' or 'reviewer'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = DecisionRollup.objects.all()
+        for name, lookup in (('start', 'day__gte'), ('end', 'day__lte')):
+            value = params.get(name)
+            if value:
+                day = parse_date(value)
+                if day is None:
+                    return Response({'detail': f'{name} must be a date (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+                rollups = rollups.filter(**{lookup: day})
+
+        if params.get('project'):
+            if not params['project'].isdigit():
+                return Response({'detail': 'project must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+            rollups = rollups.filter(project_id=int(params['project']))
+        if params.get('decided_by'):
+            rollups = rollups.filter(decided_by=params['decided_by'])
+
+        return Response({
+            'start': params.get('start'),
+            'end': params.get('end'),
+            'group_by': group_by,
+            'results': summarize(rollups, group_by=group_by),
+        })
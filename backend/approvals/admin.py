@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 
-from .models import ApprovalDecision
+from .models import ApprovalDecision, DecisionLedger
 
 
 @admin.register(ApprovalDecision)
@@ -10,7 +10,7 @@ class ApprovalDecisionAdmin(admin.ModelAdmin):
     list_display = ('artifact_version_link', 'decision', 'decided_by', 'decided_at')
     list_filter = ('decision', 'decided_at')
     search_fields = ('artifact_version__artifact__name', 'decided_by')
-    readonly_fields = ('decided_at', 'artifact_version')
+    readonly_fields = ('decided_at', 'artifact_version', 'project', 'sequence', 'prev_hash', 'chain_hash')
 
     def artifact_version_link(self, obj):
         """Display artifact version as a clickable link."""
@@ -29,3 +29,16 @@ class ApprovalDecisionAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # Decisions are created automatically, not manually
         return False
+
+
+@admin.register(DecisionLedger)
+class DecisionLedgerAdmin(admin.ModelAdmin):
+    list_display = ('project', 'head_sequence', 'verified_sequence', 'verified_at')
+    readonly_fields = ('project', 'head_sequence', 'head_hash', 'verified_sequence', 'verified_hash', 'verified_at')
+
+    def has_add_permission(self, request):
+        # Ledgers are created when a project's first decision is recorded
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False if obj else True
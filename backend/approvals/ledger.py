@@ -0,0 +1,194 @@
+"""
+Hash-chained ledger of approval decisions.
+
+Every decision is sealed into its project's chain when it is recorded:
+it gets the next ``sequence`` number, the previous decision's hash as
+``prev_hash``, and ``chain_hash = sha256(prev_hash + payload)``. The payload
+covers everything a decision asserts (version, decision, reason, note, who
+and when). ``DecisionLedger`` holds each chain's head. Sealing locks that
+head row, so decisions in one project are chained one at a time.
+
+Editing, deleting or inserting a decision row behind the application's back
+breaks the chain. So does truncating it. ``verify_project`` detects all of
+these. Routine runs start from the project's last verified checkpoint, so
+they cost O(decisions since then). A ``full`` run re-checks the whole chain.
+It streams hot and archived decisions in sequence order, so memory stays
+bounded. ``verify_projects`` runs projects in parallel threads.
+"""
+import hashlib
+import heapq
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from artifacts.models import Project
+from .models import ApprovalDecision, ArchivedApprovalDecision, DecisionLedger
+
+GENESIS = DecisionLedger.GENESIS
+MAX_PROBLEMS = 20
+
+# Columns streamed by the verifier, in payload order after the sequence.
+ENTRY_COLUMNS = (
+    'sequence', 'artifact_version_id', 'decision', 'reason', 'note', 'decided_by', 'decided_at',
+    'prev_hash', 'chain_hash',
+)
+
+
+def entry_hash(prev_hash, sequence, project_id, version_id, decision, reason, note, decided_by, decided_at) -> str:
+    payload = json.dumps(
+        [sequence, project_id, version_id, decision, reason, note, decided_by,
+         decided_at.astimezone(dt_timezone.utc).isoformat(timespec='microseconds')],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256((prev_hash + payload).encode()).hexdigest()
+
+
+def seal(decisions):
+    """
+    Chain ``(decision, project_id)`` pairs onto their projects' ledgers, in order.
+
+    Sets ``project_id``, ``sequence``, ``prev_hash`` and ``chain_hash`` on
+    each decision (``decided_at`` must already be set) and advances the heads.
+    Saving the decisions is left to the caller, in the same transaction.
+    """
+    decisions = list(decisions)
+    if not decisions:
+        return
+    with transaction.atomic():
+        heads = _lock_heads({project_id for _, project_id in decisions})
+        for decision, project_id in decisions:
+            head = heads[project_id]
+            head.head_sequence += 1
+            decision.project_id = project_id
+            decision.sequence = head.head_sequence
+            decision.prev_hash = head.head_hash
+            decision.chain_hash = entry_hash(
+                head.head_hash, head.head_sequence, project_id, decision.artifact_version_id,
+                decision.decision, decision.reason, decision.note, decision.decided_by, decision.decided_at,
+            )
+            head.head_hash = decision.chain_hash
+        DecisionLedger.objects.bulk_update(heads.values(), ['head_sequence', 'head_hash'])
+
+
+def append(decision: ApprovalDecision, project_id: int):
+    """Seal a decision that has just been created and store its chain fields."""
+    seal([(decision, project_id)])
+    decision.save(update_fields=['project', 'sequence', 'prev_hash', 'chain_hash'])
+
+
+def _lock_heads(project_ids) -> dict:
+    project_ids = sorted(project_ids)
+    DecisionLedger.objects.bulk_create(
+        [DecisionLedger(project_id=project_id) for project_id in project_ids], ignore_conflicts=True
+    )
+    # Lock in primary key order so concurrent writers can't deadlock.
+    return {
+        head.pk: head
+        for head in DecisionLedger.objects.select_for_update().filter(pk__in=project_ids).order_by('pk')
+    }
+
+
+@dataclass
+class LedgerReport:
+    project_id: int
+    start_sequence: int = 0
+    end_sequence: int = 0
+    checked: int = 0
+    problems: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def problem(self, message: str):
+        if len(self.problems) < MAX_PROBLEMS:
+            self.problems.append(message)
+
+
+def _entries(project_id: int, after: int, upto: int, batch_size: int):
+    """Hot and archived decisions in ``(after, upto]``, merged in sequence order."""
+    streams = [
+        model.objects.filter(project_id=project_id, sequence__gt=after, sequence__lte=upto)
+        .order_by('sequence').values_list(*ENTRY_COLUMNS).iterator(chunk_size=batch_size)
+        for model in (ApprovalDecision, ArchivedApprovalDecision)
+    ]
+    return heapq.merge(*streams, key=lambda entry: entry[0])
+
+
+def _recompute(project_id: int, entry) -> str:
+    sequence, version_id, decision, reason, note, decided_by, decided_at, prev_hash, _ = entry
+    return entry_hash(prev_hash, sequence, project_id, version_id, decision, reason, note, decided_by, decided_at)
+
+
+def verify_project(project_id: int, full: bool = False, batch_size: int = 2000, save: bool = True) -> LedgerReport:
+    """
+    Check a project's chain from its checkpoint (or from the start when
+    ``full``) up to its current head. An intact chain moves the checkpoint
+    to the head when ``save`` is set.
+    """
+    ledger = DecisionLedger.objects.filter(pk=project_id).first() or DecisionLedger(project_id=project_id)
+    start, running = (0, GENESIS) if full else (ledger.verified_sequence, ledger.verified_hash)
+    report = LedgerReport(project_id, start_sequence=start, end_sequence=start)
+
+    if start:
+        # The checkpointed entry itself must still be the one that was verified.
+        anchor = next(iter(_entries(project_id, start - 1, start, 1)), None)
+        if anchor is None or anchor[-1] != running or _recompute(project_id, anchor) != running:
+            report.problem(f'checkpoint entry {start} has changed since it was verified')
+
+    expected = start
+    for entry in _entries(project_id, start, ledger.head_sequence, batch_size):
+        sequence, prev_hash, chain_hash = entry[0], entry[-2], entry[-1]
+        expected += 1
+        if sequence != expected:
+            report.problem(f'entries {expected}-{sequence - 1} are missing')
+            expected = sequence
+        if prev_hash != running:
+            report.problem(f'entry {sequence} does not link to entry {sequence - 1}')
+        if _recompute(project_id, entry) != chain_hash:
+            report.problem(f'entry {sequence} has been modified')
+        running = chain_hash
+        report.checked += 1
+    report.end_sequence = expected
+
+    if expected != ledger.head_sequence:
+        report.problem(f'entries {expected + 1}-{ledger.head_sequence} are missing')
+    elif running != ledger.head_hash:
+        report.problem(f'entry {expected} does not match the ledger head')
+
+    unchained = ApprovalDecision.objects.filter(
+        sequence__isnull=True, artifact_version__artifact__project_id=project_id
+    ).count()
+    if unchained:
+        report.problem(f'{unchained} decision(s) were recorded outside the ledger')
+
+    if report.ok and save and ledger.head_sequence:
+        DecisionLedger.objects.filter(pk=project_id).update(
+            verified_sequence=ledger.head_sequence, verified_hash=ledger.head_hash, verified_at=timezone.now()
+        )
+    return report
+
+
+def verify_projects(project_ids=None, full=False, workers=1, batch_size=2000, save=True):
+    """Verify several projects (all by default), ``workers`` at a time. Yields reports."""
+    if project_ids is None:
+        project_ids = Project.objects.order_by('pk').values_list('pk', flat=True).iterator()
+
+    def run(project_id):
+        try:
+            return verify_project(project_id, full=full, batch_size=batch_size, save=save)
+        finally:
+            if workers > 1:
+                # Each worker thread has its own connection; don't leak it.
+                connection.close()
+
+    if workers <= 1:
+        yield from map(run, project_ids)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(run, project_ids)
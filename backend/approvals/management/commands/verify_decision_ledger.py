@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from approvals.ledger import verify_projects
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify each project's hash-chained decision ledger. By default only "
+        'decisions recorded since the last successful check are verified.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Re-verify every chain from its first decision instead of from the last checkpoint.',
+        )
+        parser.add_argument(
+            '--project', type=int, action='append', dest='projects',
+            help='Only verify this project id (repeatable).',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Projects verified in parallel, each on its own connection (default: 1).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Decisions fetched per round trip while streaming a chain (default: 2000).',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        projects = checked = 0
+        broken = []
+        for report in verify_projects(
+            options['projects'], full=options['full'], workers=options['workers'], batch_size=options['batch_size'],
+        ):
+            projects += 1
+            checked += report.checked
+            if not report.ok:
+                broken.append(report)
+                for problem in report.problems:
+                    self.stderr.write(f'Project {report.project_id}: {problem}')
+
+        elapsed = time.perf_counter() - started
+        if broken:
+            raise CommandError(
+                f'{len(broken)} of {projects} project ledger(s) failed verification '
+                f'({checked} decision(s) checked in {elapsed:.1f}s).'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{projects} project ledger(s) intact: {checked} decision(s) checked in {elapsed:.1f}s.'
+        ))
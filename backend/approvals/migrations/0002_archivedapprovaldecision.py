@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('approvals', '0001_initial'),
+        ('artifacts', '0003_archivedartifactversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedApprovalDecision',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('decision', models.CharField(choices=[('APPROVE', 'Approve'), ('REJECT', 'Reject')], max_length=10)),
+                ('reason', models.CharField(blank=True, max_length=100)),
+                ('note', models.TextField(blank=True)),
+                ('decided_by', models.CharField(max_length=255)),
+                ('decided_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-decided_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='approvaldecision',
+            index=models.Index(fields=['decided_at'], name='approvals_a_decided_b0f2e1_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedapprovaldecision',
+            name='artifact_version',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='approval_decision', to='artifacts.archivedartifactversion'),
+        ),
+    ]
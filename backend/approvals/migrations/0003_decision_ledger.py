@@ -0,0 +1,120 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+import django.db.models.deletion
+import heapq
+
+from django.db import migrations, models
+
+
+def chain_existing_decisions(apps, schema_editor):
+    """Seal every existing decision into its project's chain, oldest first."""
+    from approvals.ledger import GENESIS, entry_hash
+
+    Project = apps.get_model('artifacts', 'Project')
+    DecisionLedger = apps.get_model('approvals', 'DecisionLedger')
+    models_ = [apps.get_model('approvals', name) for name in ('ApprovalDecision', 'ArchivedApprovalDecision')]
+
+    for project_id in Project.objects.order_by('pk').values_list('pk', flat=True).iterator():
+        streams = [
+            (
+                (decision.decided_at, decision.artifact_version_id, decision)
+                for decision in model.objects.filter(artifact_version__artifact__project_id=project_id)
+                .order_by('decided_at', 'artifact_version_id').iterator(chunk_size=2000)
+            )
+            for model in models_
+        ]
+        sequence, head = 0, GENESIS
+        batch = {model: [] for model in models_}
+        for _, _, decision in heapq.merge(*streams, key=lambda item: item[:2]):
+            sequence += 1
+            decision.project_id = project_id
+            decision.sequence = sequence
+            decision.prev_hash = head
+            decision.chain_hash = head = entry_hash(
+                head, sequence, project_id, decision.artifact_version_id, decision.decision,
+                decision.reason, decision.note, decision.decided_by, decision.decided_at,
+            )
+            pending = batch[type(decision)]
+            pending.append(decision)
+            if len(pending) >= 2000:
+                type(decision).objects.bulk_update(pending, ['project', 'sequence', 'prev_hash', 'chain_hash'])
+                pending.clear()
+        for model, pending in batch.items():
+            model.objects.bulk_update(pending, ['project', 'sequence', 'prev_hash', 'chain_hash'])
+        if sequence:
+            DecisionLedger.objects.create(project_id=project_id, head_sequence=sequence, head_hash=head)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('approvals', '0002_archivedapprovaldecision'),
+        ('artifacts', '0006_version_link_health'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionLedger',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='decision_ledger', serialize=False, to='artifacts.project')),
+                ('head_sequence', models.PositiveBigIntegerField(default=0)),
+                ('head_hash', models.CharField(default='0000000000000000000000000000000000000000000000000000000000000000', max_length=64)),
+                ('verified_sequence', models.PositiveBigIntegerField(default=0)),
+                ('verified_hash', models.CharField(default='0000000000000000000000000000000000000000000000000000000000000000', max_length=64)),
+                ('verified_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='approvaldecision',
+            name='chain_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='approvaldecision',
+            name='prev_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='approvaldecision',
+            name='project',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='artifacts.project'),
+        ),
+        migrations.AddField(
+            model_name='approvaldecision',
+            name='sequence',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedapprovaldecision',
+            name='chain_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='archivedapprovaldecision',
+            name='prev_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='archivedapprovaldecision',
+            name='project',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='artifacts.project'),
+        ),
+        migrations.AddField(
+            model_name='archivedapprovaldecision',
+            name='sequence',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='approvaldecision',
+            index=models.Index(condition=models.Q(('sequence__isnull', True)), fields=['id'], name='unchained_decisions'),
+        ),
+        migrations.AddConstraint(
+            model_name='approvaldecision',
+            constraint=models.UniqueConstraint(fields=('project', 'sequence'), name='decision_chain_sequence'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedapprovaldecision',
+            constraint=models.UniqueConstraint(fields=('project', 'sequence'), name='archived_decision_chain_sequence'),
+        ),
+        migrations.RunPython(chain_existing_decisions, migrations.RunPython.noop),
+    ]
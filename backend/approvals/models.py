@@ -1,6 +1,6 @@
 from django.db import models
 
-from artifacts.models import ArtifactVersion
+from artifacts.models import ArchivedArtifactVersion, ArtifactVersion, Project
 
 
 class ApprovalDecision(models.Model):
@@ -18,9 +18,68 @@ class ApprovalDecision(models.Model):
     note = models.TextField(blank=True)
     decided_by = models.CharField(max_length=255)
     decided_at = models.DateTimeField(auto_now_add=True)
+    # Hash chain through the project's decisions (see approvals/ledger.py).
+    project = models.ForeignKey(Project, related_name='+', null=True, blank=True, on_delete=models.CASCADE)
+    sequence = models.PositiveBigIntegerField(null=True, blank=True)
+    prev_hash = models.CharField(max_length=64, blank=True)
+    chain_hash = models.CharField(max_length=64, blank=True)
 
     class Meta:
         ordering = ['-decided_at']
+        indexes = [
+            models.Index(fields=['decided_at']),
+            # Decisions written around the ledger; normally none.
+            models.Index(fields=['id'], condition=models.Q(sequence__isnull=True), name='unchained_decisions'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'sequence'], name='decision_chain_sequence'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.artifact_version} -> {self.decision}"
+
+
+class ArchivedApprovalDecision(models.Model):
+    """Cold-storage copy of an ``ApprovalDecision``, moved with its version."""
+    id = models.BigIntegerField(primary_key=True)
+    artifact_version = models.OneToOneField(
+        ArchivedArtifactVersion,
+        related_name='approval_decision',
+        on_delete=models.CASCADE,
+    )
+    decision = models.CharField(max_length=10, choices=ApprovalDecision.Decision.choices)
+    reason = models.CharField(max_length=100, blank=True)
+    note = models.TextField(blank=True)
+    decided_by = models.CharField(max_length=255)
+    decided_at = models.DateTimeField()
+    project = models.ForeignKey(Project, related_name='+', null=True, blank=True, on_delete=models.CASCADE)
+    sequence = models.PositiveBigIntegerField(null=True, blank=True)
+    prev_hash = models.CharField(max_length=64, blank=True)
+    chain_hash = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        ordering = ['-decided_at']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'sequence'], name='archived_decision_chain_sequence'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.artifact_version} -> {self.decision}"
+
+
+class DecisionLedger(models.Model):
+    """
+    Head of a project's decision hash chain, and the checkpoint up to which
+    ``verify_decision_ledger`` last found it intact.
+    """
+    GENESIS = '0' * 64
+
+    project = models.OneToOneField(Project, primary_key=True, related_name='decision_ledger', on_delete=models.CASCADE)
+    head_sequence = models.PositiveBigIntegerField(default=0)
+    head_hash = models.CharField(max_length=64, default=GENESIS)
+    verified_sequence = models.PositiveBigIntegerField(default=0)
+    verified_hash = models.CharField(max_length=64, default=GENESIS)
+    verified_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.project} ledger @ {self.head_sequence}"
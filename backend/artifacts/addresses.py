@@ -0,0 +1,23 @@
+"""
+Address checks for requests to user-supplied URLs.
+
+Version URLs are user input, and both the link checker
+(``artifacts.linkcheck``) and the preview fetcher (``artifacts.previews``)
+connect to them from inside the deployment. Both only connect to globally
+routable addresses, so neither can be pointed at loopback, private networks,
+link-local or cloud metadata endpoints.
+"""
+import ipaddress
+
+
+def ip(raw: str):
+    """Parse an address as returned by ``getaddrinfo`` or ``getpeername``."""
+    address = ipaddress.ip_address(raw.split('%', 1)[0])
+    if address.version == 6 and address.ipv4_mapped:
+        # ::ffff:10.0.0.1 reaches 10.0.0.1.
+        return address.ipv4_mapped
+    return address
+
+
+def is_public(address) -> bool:
+    return address.is_global
@@ -1,11 +1,11 @@
 from django.contrib import admin
 
-from .models import Artifact, ArtifactVersion, Project
+from .models import Artifact, ArtifactVersion, PendingApproval, Project
 
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
-    list_display = ('name', 'created_at', 'updated_at')
+    list_display = ('name', 'reminder_after', 'escalate_after', 'created_at', 'updated_at')
     search_fields = ('name',)
 
 
@@ -18,13 +18,23 @@ class ArtifactAdmin(admin.ModelAdmin):
 
 @admin.register(ArtifactVersion)
 class ArtifactVersionAdmin(admin.ModelAdmin):
-    list_display = ('artifact', 'version_number', 'url', 'submitted_by', 'created_at', 'get_status')
-    list_filter = ('artifact__project', 'created_at')
+    list_display = ('artifact', 'version_number', 'url', 'submitted_by', 'created_at', 'get_status', 'link_status')
+    list_filter = ('artifact__project', 'created_at', 'link_status', 'preview_status')
     search_fields = ('artifact__name', 'submitted_by')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = (
+        'created_at', 'updated_at', 'link_status', 'link_http_status', 'link_error', 'link_checked_at',
+        'preview_status', 'preview_digest', 'preview_error',
+    )
 
     def get_status(self, obj):
         if hasattr(obj, 'approval_decision') and obj.approval_decision:
             return obj.approval_decision.get_decision_display()
         return 'Awaiting Approval'
     get_status.short_description = 'Status'
+
+
+@admin.register(PendingApproval)
+class PendingApprovalAdmin(admin.ModelAdmin):
+    list_display = ('version', 'project', 'submitted_at', 'level', 'reminded_at', 'escalated_at')
+    list_filter = ('level', 'project')
+    readonly_fields = ('version', 'project', 'submitted_at', 'reminded_at', 'escalated_at')
@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_delete
 
 
 class ArtifactsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'artifacts'
+
+    def ready(self):
+        from approvals.models import ApprovalDecision
+        from . import counters, escalations
+        from .models import ArchivedArtifactVersion, ArtifactVersion
+
+        post_save.connect(counters.version_saved, sender=ArtifactVersion)
+        post_save.connect(counters.decision_saved, sender=ApprovalDecision)
+        # pre_delete: in a cascade every handler runs before any row is
+        # deleted, so the handlers can still look up the project.
+        pre_delete.connect(counters.decision_deleted, sender=ApprovalDecision)
+        pre_delete.connect(counters.version_deleted, sender=ArtifactVersion)
+        pre_delete.connect(counters.archived_version_deleted, sender=ArchivedArtifactVersion)
+        # Approval tracking (reminders, escalations, link checks) follows the
+        # same writes.
+        post_save.connect(escalations.version_saved, sender=ArtifactVersion)
+        post_save.connect(escalations.decision_saved, sender=ApprovalDecision)
+        post_delete.connect(escalations.decision_deleted, sender=ApprovalDecision)
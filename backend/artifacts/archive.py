@@ -0,0 +1,96 @@
+"""
+Move decided versions out of the hot tables.
+
+``archive_batch`` moves one keyset-ordered batch of decided versions (and
+their decisions) into ``ArchivedArtifactVersion`` / ``ArchivedApprovalDecision``
+inside a single short transaction. The ``archive_decided_versions`` command
+drives it in a loop.
+"""
+from django.db import transaction
+
+from . import counters
+
+from approvals.models import ApprovalDecision, ArchivedApprovalDecision
+from .models import ArchivedArtifactVersion, ArtifactVersion
+
+
+def archivable_versions(cutoff):
+    """Versions whose decision was made before ``cutoff``, in primary key order."""
+    return (
+        ArtifactVersion.objects
+        .filter(approval_decision__decided_at__lt=cutoff)
+        .order_by('pk')
+    )
+
+
+def archive_batch(cutoff, after_id: int = 0, batch_size: int = 500, dry_run: bool = False):
+    """
+    Archive up to ``batch_size`` decided versions with ``pk > after_id``.
+
+    Returns ``(moved, last_id)``; ``last_id`` is ``None`` when nothing was left
+    to archive. Rerunning after an interruption is safe: a batch either
+    commits as a whole or not at all, and archived rows leave the hot table.
+    A version that clashes with an archived one (same id, or same artifact
+    and version number) raises ``IntegrityError`` and the batch is rolled
+    back, so nothing is deleted without its archived copy.
+    """
+    with transaction.atomic():
+        versions = list(
+            archivable_versions(cutoff)
+            .filter(pk__gt=after_id)
+            .select_for_update()[:batch_size]
+        )
+        if not versions:
+            return 0, None
+
+        last_id = versions[-1].pk
+        if dry_run:
+            return len(versions), last_id
+
+        decisions = ApprovalDecision.objects.filter(artifact_version__in=versions)
+
+        ArchivedArtifactVersion.objects.bulk_create(
+            [
+                ArchivedArtifactVersion(
+                    id=version.pk,
+                    artifact_id=version.artifact_id,
+                    version_number=version.version_number,
+                    url=version.url,
+                    submitted_by=version.submitted_by,
+                    link_status=version.link_status,
+                    link_http_status=version.link_http_status,
+                    link_error=version.link_error,
+                    link_checked_at=version.link_checked_at,
+                    preview_status=version.preview_status,
+                    preview_digest=version.preview_digest,
+                    preview_error=version.preview_error,
+                    created_at=version.created_at,
+                    updated_at=version.updated_at,
+                )
+                for version in versions
+            ],
+        )
+        ArchivedApprovalDecision.objects.bulk_create(
+            [
+                ArchivedApprovalDecision(
+                    id=decision.pk,
+                    artifact_version_id=decision.artifact_version_id,
+                    decision=decision.decision,
+                    reason=decision.reason,
+                    note=decision.note,
+                    decided_by=decision.decided_by,
+                    decided_at=decision.decided_at,
+                    project_id=decision.project_id,
+                    sequence=decision.sequence,
+                    prev_hash=decision.prev_hash,
+                    chain_hash=decision.chain_hash,
+                )
+                for decision in decisions
+            ],
+        )
+        # Deleting the versions cascades to their hot decisions. Archived
+        # versions keep their status, so the status counters stay as they are.
+        with counters.suspended():
+            ArtifactVersion.objects.filter(pk__in=[version.pk for version in versions]).delete()
+
+    return len(versions), last_id
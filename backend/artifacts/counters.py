@@ -0,0 +1,194 @@
+"""
+Incrementally maintained per-project status counters.
+
+Every write that changes how many versions a project has in a status adjusts
+``ProjectStatusCounter`` inside the same transaction. Creates and deletes are
+both counted by model signals, so the API, the admin and plain ORM writes all
+count the same way:
+
+- version created: +1 awaiting
+- decision made: -1 awaiting, +1 approved/rejected
+- decision deleted: -1 approved/rejected, +1 awaiting
+- version deleted: -1 awaiting (if its decision is deleted in the same
+  cascade, the decision's handler has already moved it to awaiting)
+
+``bulk_create`` sends no signals, so the history importer counts its rows
+itself. Moving versions into the archive is not a status change, so it runs
+inside ``suspended()``. ``reconcile()`` recomputes everything with a GROUP BY and
+repairs drift.
+"""
+import contextlib
+import contextvars
+from collections import Counter
+
+from django.db import IntegrityError, models, transaction
+
+from approvals.models import ApprovalDecision, ArchivedApprovalDecision
+from .models import ArchivedArtifactVersion, ArtifactVersion, ProjectStatusCounter
+
+Status = ProjectStatusCounter.Status
+
+DECISION_STATUS = {
+    ApprovalDecision.Decision.APPROVE: Status.APPROVED,
+    ApprovalDecision.Decision.REJECT: Status.REJECTED,
+}
+
+_suspended = contextvars.ContextVar('status_counters_suspended', default=False)
+
+
+@contextlib.contextmanager
+def suspended():
+    """Skip signal-driven counter updates (used when archiving)."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def is_suspended() -> bool:
+    return _suspended.get()
+
+
+def adjust(deltas):
+    """Apply ``{(project_id, status): delta}`` to the counters."""
+    with transaction.atomic():
+        for (project_id, status), delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            updated = ProjectStatusCounter.objects.filter(project_id=project_id, status=status).update(
+                count=models.F('count') + delta
+            )
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    ProjectStatusCounter.objects.create(project_id=project_id, status=status, count=delta)
+            except IntegrityError:
+                # Created concurrently; fall back to incrementing it.
+                ProjectStatusCounter.objects.filter(project_id=project_id, status=status).update(
+                    count=models.F('count') + delta
+                )
+
+
+def version_created(project_id: int):
+    adjust({(project_id, Status.AWAITING_APPROVAL): 1})
+
+
+def version_decided(project_id: int, decision: str):
+    adjust({
+        (project_id, Status.AWAITING_APPROVAL): -1,
+        (project_id, DECISION_STATUS[decision]): 1,
+    })
+
+
+def summary(project_id: int) -> dict:
+    """Counts per status for one project, read straight from the counters."""
+    counts = dict.fromkeys(Status.values, 0)
+    counts.update(
+        ProjectStatusCounter.objects.filter(project_id=project_id).values_list('status', 'count')
+    )
+    return counts
+
+
+def actual_counts() -> Counter:
+    """Recompute ``{(project_id, status): count}`` from the version tables."""
+    counts = Counter()
+    for project_id, decision, total in (
+        ArtifactVersion.objects
+        .values_list('artifact__project_id', 'approval_decision__decision')
+        .annotate(total=models.Count('id'))
+        .order_by()
+    ):
+        counts[(project_id, DECISION_STATUS.get(decision, Status.AWAITING_APPROVAL))] += total
+    for project_id, decision, total in (
+        ArchivedArtifactVersion.objects
+        .values_list('artifact__project_id', 'approval_decision__decision')
+        .annotate(total=models.Count('id'))
+        .order_by()
+    ):
+        counts[(project_id, DECISION_STATUS.get(decision, Status.AWAITING_APPROVAL))] += total
+    return counts
+
+
+def reconcile(dry_run: bool = False) -> dict:
+    """
+    Compare counters with the real counts and repair any drift.
+
+    Returns ``{(project_id, status): (stored, actual)}`` for every mismatch.
+    """
+    with transaction.atomic():
+        # Lock the counters first so writers queue behind the recount.
+        stored = {
+            (row.project_id, row.status): row
+            for row in ProjectStatusCounter.objects.select_for_update()
+        }
+        actual = actual_counts()
+
+        drift = {}
+        for key in set(stored) | set(actual):
+            have = stored[key].count if key in stored else 0
+            want = actual.get(key, 0)
+            if have != want:
+                drift[key] = (have, want)
+
+        if not dry_run:
+            for (project_id, status), (_, want) in drift.items():
+                ProjectStatusCounter.objects.update_or_create(
+                    project_id=project_id, status=status, defaults={'count': want}
+                )
+    return drift
+
+
+# -- signal handlers (connected in ArtifactsConfig.ready) -----------------------
+
+def version_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or is_suspended():
+        return
+    version_created(instance.artifact.project_id)
+
+
+def decision_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or is_suspended():
+        return
+    version_decided(instance.artifact_version.artifact.project_id, instance.decision)
+
+
+def decision_deleted(sender, instance, **kwargs):
+    if is_suspended():
+        return
+    project_id = (
+        ArtifactVersion.objects.filter(pk=instance.artifact_version_id)
+        .values_list('artifact__project_id', flat=True).first()
+    )
+    if project_id is None:
+        return
+    adjust({
+        (project_id, DECISION_STATUS[instance.decision]): -1,
+        (project_id, Status.AWAITING_APPROVAL): 1,
+    })
+
+
+def version_deleted(sender, instance, **kwargs):
+    if is_suspended():
+        return
+    project_id = (
+        ArtifactVersion.objects.filter(pk=instance.pk)
+        .values_list('artifact__project_id', flat=True).first()
+    )
+    if project_id is None:
+        return
+    adjust({(project_id, Status.AWAITING_APPROVAL): -1})
+
+
+def archived_version_deleted(sender, instance, **kwargs):
+    # Archived versions are always decided.
+    if is_suspended():
+        return
+    row = (
+        ArchivedApprovalDecision.objects.filter(artifact_version_id=instance.pk)
+        .values_list('artifact_version__artifact__project_id', 'decision').first()
+    )
+    if row is not None:
+        project_id, decision = row
+        adjust({(project_id, DECISION_STATUS[decision]): -1})
@@ -0,0 +1,218 @@
+"""
+Reminders and escalations for versions left waiting for a decision.
+
+``PendingApproval`` has one row per version awaiting a decision. Like the
+status counters, it is kept by model signals (connected in ``apps.py``), so
+the API, the admin and plain ORM writes are all tracked: a row is added when
+a version is created and dropped when it is decided, and deleting a decision
+on its own puts the version back. ``bulk_create`` sends no signals, so the
+history importer adds its rows itself; ``sync()`` repairs anything else
+(``escalate_overdue_approvals --sync``). The link checker only checks
+versions that have a row. Once a version has waited longer than
+its project's ``reminder_after`` a reminder goes out; past
+``escalate_after`` it is escalated. Projects without their own thresholds
+use ``APPROVAL_REMINDER_AFTER`` / ``APPROVAL_ESCALATE_AFTER``.
+
+``escalate_overdue()`` finds due rows per project and level through the
+``pending_by_age`` index and works through them in keyset batches. Each
+batch is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and its level
+advanced by a conditional UPDATE in one transaction, so any number of
+worker processes can scan at once and each row is claimed exactly once.
+``version_overdue`` is sent after the claim commits. If a receiver raises,
+the claim is undone so the next scan retries that row.
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.dispatch import Signal
+from django.utils import timezone
+
+from approvals.models import ApprovalDecision
+from .models import ArtifactVersion, PendingApproval, Project
+
+logger = logging.getLogger(__name__)
+
+Level = PendingApproval.Level
+
+# Sent once per version and level with ``pending`` (a PendingApproval with
+# ``version__artifact`` and ``project`` loaded) and ``level``.
+version_overdue = Signal()
+
+# (from level, to level): escalations run first, so a version already past
+# its escalation threshold is escalated directly instead of reminded too.
+TRANSITIONS = (
+    (Level.REMINDED, Level.ESCALATED),
+    (Level.NONE, Level.ESCALATED),
+    (Level.NONE, Level.REMINDED),
+)
+
+STAMP_FIELD = {
+    Level.REMINDED: 'reminded_at',
+    Level.ESCALATED: 'escalated_at',
+}
+
+
+def track(version: ArtifactVersion, project_id: int) -> PendingApproval:
+    """Start tracking a newly submitted version."""
+    return PendingApproval.objects.create(version=version, project_id=project_id, submitted_at=version.created_at)
+
+
+def resolve(version: ArtifactVersion):
+    """Stop tracking a version once it has been decided."""
+    PendingApproval.objects.filter(version=version).delete()
+
+
+def version_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    track(instance, instance.artifact.project_id)
+
+
+def decision_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    resolve(instance.artifact_version)
+
+
+def decision_deleted(sender, instance, origin=None, **kwargs):
+    # Only when the decision itself was deleted: in a cascade from its
+    # version (or archiving) the version is about to go too.
+    if not (origin is instance or (isinstance(origin, QuerySet) and origin.model is ApprovalDecision)):
+        return
+    version = ArtifactVersion.objects.filter(pk=instance.artifact_version_id).select_related('artifact').first()
+    if version is not None:
+        PendingApproval.objects.get_or_create(
+            version=version,
+            defaults={'project_id': version.artifact.project_id, 'submitted_at': version.created_at},
+        )
+
+
+def thresholds(project: Project):
+    """``(reminder_after, escalate_after)`` for a project."""
+    return (
+        project.reminder_after or settings.APPROVAL_REMINDER_AFTER,
+        project.escalate_after or settings.APPROVAL_ESCALATE_AFTER,
+    )
+
+
+def process_batch(project_id, from_level, to_level, cutoff, now, after=None, batch_size=500):
+    """
+    Claim up to ``batch_size`` rows at ``from_level`` submitted before ``cutoff``.
+
+    Returns ``(claimed, last_key)``. ``last_key`` is the ``(submitted_at,
+    version_id)`` to resume after, or ``None`` when nothing is left.
+    """
+    with transaction.atomic():
+        due = PendingApproval.objects.filter(
+            project_id=project_id, level=from_level, submitted_at__lte=cutoff
+        ).order_by('submitted_at', 'version_id')
+        if after is not None:
+            due = due.filter(Q(submitted_at__gt=after[0]) | Q(submitted_at=after[0], version_id__gt=after[1]))
+        # Rows another worker holds are skipped, not waited for.
+        rows = list(due.select_for_update(skip_locked=True).values_list('version_id', 'submitted_at')[:batch_size])
+        if not rows:
+            return [], None
+
+        ids = [version_id for version_id, _ in rows]
+        stamp = {STAMP_FIELD[to_level]: now}
+        # The level check keeps this exact on backends without row locks:
+        # only rows still at from_level get our timestamp.
+        PendingApproval.objects.filter(pk__in=ids, level=from_level).update(level=to_level, **stamp)
+        claimed = list(
+            PendingApproval.objects.filter(pk__in=ids, level=to_level, **stamp)
+            .select_related('version__artifact', 'project')
+        )
+        transaction.on_commit(lambda: _notify(claimed, from_level, to_level))
+
+    last_id, last_at = rows[-1]
+    return claimed, (last_at, last_id)
+
+
+def _notify(claimed, from_level, to_level):
+    for pending in claimed:
+        results = version_overdue.send_robust(sender=PendingApproval, pending=pending, level=to_level)
+        errors = [result for _, result in results if isinstance(result, Exception)]
+        if errors:
+            logger.error('Notifying overdue version %s failed: %r', pending.pk, errors[0])
+            PendingApproval.objects.filter(pk=pending.pk, level=to_level).update(
+                level=from_level, **{STAMP_FIELD[to_level]: None}
+            )
+
+
+def escalate_overdue(now=None, batch_size=500) -> Counter:
+    """Send every due reminder and escalation; returns ``{level: count}``."""
+    now = now or timezone.now()
+    totals = Counter()
+    for project in Project.objects.only('id', 'reminder_after', 'escalate_after').order_by('id').iterator():
+        reminder_after, escalate_after = thresholds(project)
+        for from_level, to_level in TRANSITIONS:
+            cutoff = now - (escalate_after if to_level == Level.ESCALATED else reminder_after)
+            key = None
+            while True:
+                claimed, key = process_batch(project.id, from_level, to_level, cutoff, now, after=key, batch_size=batch_size)
+                if key is None:
+                    break
+                totals[to_level] += len(claimed)
+    return totals
+
+
+def overdue_counts(now=None) -> Counter:
+    """What ``escalate_overdue`` would do now, without claiming anything."""
+    now = now or timezone.now()
+    totals = Counter()
+    for project in Project.objects.only('id', 'reminder_after', 'escalate_after').order_by('id').iterator():
+        reminder_after, escalate_after = thresholds(project)
+        escalate_cutoff, remind_cutoff = now - escalate_after, now - reminder_after
+        pending = PendingApproval.objects.filter(project_id=project.id)
+        totals[Level.ESCALATED] += pending.filter(level__lt=Level.ESCALATED, submitted_at__lte=escalate_cutoff).count()
+        totals[Level.REMINDED] += pending.filter(
+            level=Level.NONE, submitted_at__gt=escalate_cutoff, submitted_at__lte=remind_cutoff
+        ).count()
+    return totals
+
+
+def sync(batch_size=2000):
+    """
+    Repair the tracking table: add rows for awaiting versions that have none
+    and drop rows for versions that have been decided. Returns ``(added, removed)``.
+    """
+    removed, _ = PendingApproval.objects.filter(version__approval_decision__isnull=False).delete()
+    missing = (
+        ArtifactVersion.objects.filter(approval_decision__isnull=True, pending_approval__isnull=True)
+        .values_list('id', 'artifact__project_id', 'created_at')
+        .order_by('id')
+    )
+    added = 0
+    batch = []
+    for version_id, project_id, created_at in missing.iterator(chunk_size=batch_size):
+        batch.append(PendingApproval(version_id=version_id, project_id=project_id, submitted_at=created_at))
+        if len(batch) >= batch_size:
+            added += len(PendingApproval.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    added += len(PendingApproval.objects.bulk_create(batch, ignore_conflicts=True))
+    return added, removed
+
+
+def _default_receiver(sender, pending, level, **kwargs):
+    """Log every notification, and email it when APPROVAL_NOTIFY_EMAILS is set."""
+    version = pending.version
+    message = (
+        f'{Level(level).label}: {version.artifact.name} v{version.version_number} '
+        f'({pending.project.name}) has waited since {pending.submitted_at:%Y-%m-%d %H:%M} UTC '
+        f'for a decision. {version.url}'
+    )
+    logger.warning(message)
+    if settings.APPROVAL_NOTIFY_EMAILS:
+        send_mail(
+            subject=f'[ThatFridayFeeling] {Level(level).label}: {version.artifact.name} v{version.version_number}',
+            message=message,
+            from_email=None,
+            recipient_list=list(settings.APPROVAL_NOTIFY_EMAILS),
+        )
+
+
+version_overdue.connect(_default_receiver, dispatch_uid='artifacts.escalations.default')
@@ -0,0 +1,152 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+Decorate an ``APIView.post`` with ``@idempotent``. When the request carries an
+``Idempotency-Key`` header:
+
+- the first request claims the key by inserting an ``IdempotencyKey`` row,
+  runs the view and stores the response (anything below 500);
+- a retry with the same key and body gets the stored response back, marked
+  with ``Idempotent-Replayed: true``, without touching the write path;
+- a concurrent duplicate waits for the first request to finish (up to
+  ``IDEMPOTENCY_WAIT_TIMEOUT`` seconds) rather than racing it;
+- reusing a key for a different request is rejected with 422.
+
+Requests without the header behave exactly as before.
+"""
+import functools
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_WAIT_TIMEOUT = 10.0
+POLL_INTERVAL = 0.05
+
+
+def _fingerprint(request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(b' ')
+    digest.update(request.path.encode())
+    digest.update(b'\n')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    response = Response(record.response_body, status=record.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(key: str, fingerprint: str):
+    """
+    Try to claim ``key`` for this request.
+
+    Returns ``None`` when the key was claimed, otherwise the existing record.
+    """
+    ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', DEFAULT_TTL)
+    now = timezone.now()
+    while True:
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=ttl),
+                )
+            return None
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(key=key).first()
+            if record is None:
+                # Released or evicted between our insert and read; try again.
+                continue
+            if record.expires_at <= now:
+                IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+                continue
+            return record
+
+
+def _wait_for_completion(record: IdempotencyKey):
+    """Poll until the in-flight request owning ``record`` stores its response."""
+    timeout = getattr(settings, 'IDEMPOTENCY_WAIT_TIMEOUT', DEFAULT_WAIT_TIMEOUT)
+    deadline = time.monotonic() + timeout
+    while record is not None and record.status_code is None:
+        if time.monotonic() >= deadline:
+            return record
+        time.sleep(POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+    return record
+
+
+def idempotent(view_method):
+    """Make an ``APIView`` POST handler safe to retry with an Idempotency-Key."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = _fingerprint(request)
+        while True:
+            existing = _claim(key, fingerprint)
+            if existing is None:
+                break
+            if existing.fingerprint != fingerprint:
+                return Response(
+                    {'detail': f'{HEADER} has already been used for a different request.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            existing = _wait_for_completion(existing)
+            if existing is None:
+                # The first request failed and released the key; take it over.
+                continue
+            if existing.status_code is None:
+                return Response(
+                    {'detail': 'A request with this Idempotency-Key is still being processed.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return _replay(existing)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            IdempotencyKey.objects.filter(key=key).delete()
+            raise
+
+        if response.status_code >= 500:
+            # Server errors are not final; let the client retry for real.
+            IdempotencyKey.objects.filter(key=key).delete()
+        else:
+            IdempotencyKey.objects.filter(key=key).update(
+                status_code=response.status_code,
+                response_body=response.data,
+            )
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys() -> int:
+    """Delete expired idempotency records and return how many were removed."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
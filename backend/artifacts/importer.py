@@ -0,0 +1,357 @@
+"""
+Bulk import of historical approvals.
+
+Rows come from CSV or NDJSON with these columns (only ``project``, ``artifact``
+and ``url`` are required)::
+
+    project, artifact, artifact_type, version_number, url, submitted_by,
+    created_at, decision, reason, note, decided_by, decided_at
+
+``HistoryImporter.import_chunk`` resolves or creates ``Project`` / ``Artifact``
+rows through an in-memory lookup cache and inserts the chunk's versions and
+decisions in bulk, keeping the original ``created_at`` / ``decided_at``. On
+PostgreSQL it can write with ``COPY`` instead of ``bulk_create``. Imported
+decisions are sealed into their projects' decision ledgers and folded into
+the analytics rollups, and the project status counters and pending-approval
+tracking rows are updated, in the same transaction.
+"""
+import csv
+import io
+import json
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from analytics.rollups import record_rows
+from approvals import ledger
+from approvals.models import ApprovalDecision
+from . import counters
+from .models import ArchivedArtifactVersion, Artifact, ArtifactVersion, PendingApproval, Project
+
+
+class ImportRowError(ValueError):
+    """A source row could not be turned into a version."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f'row {line}: {message}')
+        self.line = line
+
+
+@dataclass
+class HistoryRow:
+    line: int
+    project: str
+    artifact: str
+    artifact_type: str
+    version_number: int | None
+    url: str
+    submitted_by: str
+    created_at: datetime
+    decision: str
+    reason: str
+    note: str
+    decided_by: str
+    decided_at: datetime | None
+
+
+def _parse_timestamp(value, line: int, column: str):
+    if not value:
+        return None
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ImportRowError(line, f'{column} is not a valid ISO 8601 timestamp: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def parse_row(raw: dict, line: int) -> HistoryRow:
+    """Validate one source record and normalise it into a ``HistoryRow``."""
+    def text(column):
+        value = raw.get(column)
+        return '' if value is None else str(value).strip()
+
+    for column in ('project', 'artifact', 'url'):
+        if not text(column):
+            raise ImportRowError(line, f'{column} is required')
+
+    version_number = text('version_number')
+    if version_number:
+        try:
+            version_number = int(version_number)
+        except ValueError:
+            raise ImportRowError(line, f'version_number is not an integer: {version_number!r}')
+    else:
+        version_number = None
+
+    decision = text('decision').upper()
+    if decision and decision not in ApprovalDecision.Decision.values:
+        raise ImportRowError(line, f'decision must be APPROVE or REJECT, got {decision!r}')
+
+    created_at = _parse_timestamp(text('created_at'), line, 'created_at') or timezone.now()
+    decided_at = _parse_timestamp(text('decided_at'), line, 'decided_at')
+    if decision and decided_at is None:
+        raise ImportRowError(line, 'decided_at is required when decision is set')
+    if decision and not text('decided_by'):
+        raise ImportRowError(line, 'decided_by is required when decision is set')
+
+    return HistoryRow(
+        line=line,
+        project=text('project'),
+        artifact=text('artifact'),
+        artifact_type=text('artifact_type'),
+        version_number=version_number,
+        url=text('url'),
+        submitted_by=text('submitted_by'),
+        created_at=created_at,
+        decision=decision,
+        reason=text('reason'),
+        note=text('note'),
+        decided_by=text('decided_by'),
+        decided_at=decided_at,
+    )
+
+
+def read_records(stream, fmt: str):
+    """Yield ``(line, dict)`` pairs from a CSV or NDJSON text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for index, record in enumerate(reader, start=1):
+            yield index, record
+    elif fmt == 'ndjson':
+        index = 0
+        for text_line in stream:
+            if not text_line.strip():
+                continue
+            index += 1
+            try:
+                yield index, json.loads(text_line)
+            except json.JSONDecodeError as exc:
+                raise ImportRowError(index, f'invalid JSON: {exc}')
+    else:
+        raise ValueError(f'Unknown format: {fmt}')
+
+
+def bulk_create_keeping(model, objs, fields):
+    """
+    ``bulk_create`` that keeps the given values of ``auto_now`` /
+    ``auto_now_add`` fields, which the insert overwrites with the current
+    time. They are written back with a ``bulk_update`` in the same
+    transaction; the model's fields are never changed, as other threads
+    share them.
+    """
+    given = [[getattr(obj, name) for name in fields] for obj in objs]
+    model.objects.bulk_create(objs)
+    for obj, values in zip(objs, given):
+        for name, value in zip(fields, values):
+            setattr(obj, name, value)
+    model.objects.bulk_update(objs, fields)
+
+
+class HistoryImporter:
+    """Insert parsed history rows chunk by chunk, caching parent lookups."""
+
+    def __init__(self, use_copy: bool = False):
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.projects = {}         # name -> id
+        self.artifacts = {}        # (project_id, name) -> id
+        self.next_version = {}     # artifact_id -> next version_number
+
+    # -- lookups ---------------------------------------------------------------
+
+    def _resolve_projects(self, rows):
+        missing = {row.project for row in rows} - self.projects.keys()
+        if not missing:
+            return
+        for project_id, name in (
+            Project.objects.filter(name__in=missing).order_by('pk').values_list('pk', 'name')
+        ):
+            self.projects.setdefault(name, project_id)
+        to_create = [Project(name=name) for name in sorted(missing - self.projects.keys())]
+        for project in Project.objects.bulk_create(to_create):
+            self.projects[project.name] = project.pk
+
+    def _resolve_artifacts(self, rows):
+        wanted = {}
+        for row in rows:
+            key = (self.projects[row.project], row.artifact)
+            if key not in self.artifacts:
+                wanted.setdefault(key, row.artifact_type)
+        if not wanted:
+            return
+
+        project_ids = {project_id for project_id, _ in wanted}
+        names = {name for _, name in wanted}
+        for artifact_id, project_id, name in (
+            Artifact.objects.filter(project_id__in=project_ids, name__in=names)
+            .order_by('pk').values_list('pk', 'project_id', 'name')
+        ):
+            if (project_id, name) in wanted:
+                self.artifacts.setdefault((project_id, name), artifact_id)
+
+        to_create = [
+            Artifact(project_id=project_id, name=name, artifact_type=artifact_type)
+            for (project_id, name), artifact_type in wanted.items()
+            if (project_id, name) not in self.artifacts
+        ]
+        for artifact in Artifact.objects.bulk_create(to_create):
+            self.artifacts[(artifact.project_id, artifact.name)] = artifact.pk
+
+        # Continue numbering after whatever each artifact already has.
+        artifact_ids = [
+            self.artifacts[key] for key in wanted if self.artifacts[key] not in self.next_version
+        ]
+        highest = dict.fromkeys(artifact_ids, 0)
+        for model in (ArtifactVersion, ArchivedArtifactVersion):
+            for artifact_id, max_number in (
+                model.objects.filter(artifact_id__in=artifact_ids)
+                .values('artifact_id').annotate(max_number=models.Max('version_number'))
+                .values_list('artifact_id', 'max_number')
+            ):
+                highest[artifact_id] = max(highest[artifact_id], max_number)
+        for artifact_id, max_number in highest.items():
+            self.next_version[artifact_id] = max_number + 1
+
+    def _version_number(self, artifact_id: int, row: HistoryRow) -> int:
+        number = row.version_number or self.next_version[artifact_id]
+        self.next_version[artifact_id] = max(self.next_version[artifact_id], number + 1)
+        return number
+
+    def _check_archived_numbers(self, rows, versions):
+        # The hot table's unique constraint can't see archived versions, and
+        # a number taken in both would stop that version being archived.
+        explicit = {
+            (version.artifact_id, version.version_number): row
+            for row, version in zip(rows, versions)
+            if row.version_number
+        }
+        if not explicit:
+            return
+        clashes = [
+            explicit[key]
+            for key in ArchivedArtifactVersion.objects.filter(
+                artifact_id__in={artifact_id for artifact_id, _ in explicit},
+                version_number__in={number for _, number in explicit},
+            ).values_list('artifact_id', 'version_number')
+            if key in explicit
+        ]
+        if clashes:
+            row = min(clashes, key=lambda row: row.line)
+            raise ImportRowError(row.line, f'version_number {row.version_number} already exists in the archive')
+
+    # -- writes ----------------------------------------------------------------
+
+    def import_chunk(self, rows) -> int:
+        """Insert one chunk atomically and return the number of versions written."""
+        if not rows:
+            return 0
+        with transaction.atomic():
+            self._resolve_projects(rows)
+            self._resolve_artifacts(rows)
+
+            versions = []
+            for row in rows:
+                artifact_id = self.artifacts[(self.projects[row.project], row.artifact)]
+                versions.append(ArtifactVersion(
+                    artifact_id=artifact_id,
+                    version_number=self._version_number(artifact_id, row),
+                    url=row.url,
+                    submitted_by=row.submitted_by,
+                    created_at=row.created_at,
+                    updated_at=row.decided_at or row.created_at,
+                ))
+
+            self._check_archived_numbers(rows, versions)
+            if self.use_copy:
+                self._copy_versions(versions)
+            else:
+                bulk_create_keeping(ArtifactVersion, versions, ['created_at', 'updated_at'])
+
+            decisions = [
+                ApprovalDecision(
+                    artifact_version_id=version.pk,
+                    decision=row.decision,
+                    reason=row.reason,
+                    note=row.note,
+                    decided_by=row.decided_by,
+                    decided_at=row.decided_at,
+                )
+                for row, version in zip(rows, versions)
+                if row.decision
+            ]
+            ledger.seal(zip(decisions, (self.projects[row.project] for row in rows if row.decision)))
+            if self.use_copy:
+                self._copy_decisions(decisions)
+            else:
+                bulk_create_keeping(ApprovalDecision, decisions, ['decided_at'])
+
+            record_rows([
+                (self.projects[row.project], row.decided_by, row.decision, row.reason,
+                 row.created_at, row.decided_at)
+                for row in rows
+                if row.decision
+            ])
+            PendingApproval.objects.bulk_create([
+                PendingApproval(
+                    version_id=version.pk,
+                    project_id=self.projects[row.project],
+                    submitted_at=row.created_at,
+                )
+                for row, version in zip(rows, versions)
+                if not row.decision
+            ])
+            counters.adjust(Counter(
+                (self.projects[row.project],
+                 counters.DECISION_STATUS.get(row.decision, counters.Status.AWAITING_APPROVAL))
+                for row in rows
+            ))
+        return len(versions)
+
+    def _copy(self, table: str, columns, records):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(records)
+        buffer.seek(0)
+        sql = f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def _copy_versions(self, versions):
+        table = ArtifactVersion._meta.db_table
+        # Reserve ids up front so decisions can reference the new versions.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [table, len(versions)],
+            )
+            for version, (pk,) in zip(versions, cursor.fetchall()):
+                version.pk = pk
+        self._copy(
+            table,
+            ['id', 'artifact_id', 'version_number', 'url', 'submitted_by', 'created_at', 'updated_at'],
+            (
+                [v.pk, v.artifact_id, v.version_number, v.url, v.submitted_by,
+                 v.created_at.isoformat(), v.updated_at.isoformat()]
+                for v in versions
+            ),
+        )
+
+    def _copy_decisions(self, decisions):
+        self._copy(
+            ApprovalDecision._meta.db_table,
+            ['artifact_version_id', 'decision', 'reason', 'note', 'decided_by', 'decided_at',
+             'project_id', 'sequence', 'prev_hash', 'chain_hash'],
+            (
+                [d.artifact_version_id, d.decision, d.reason, d.note, d.decided_by,
+                 d.decided_at.isoformat(), d.project_id, d.sequence, d.prev_hash, d.chain_hash]
+                for d in decisions
+            ),
+        )
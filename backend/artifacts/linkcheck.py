@@ -0,0 +1,323 @@
+"""
+Concurrent link-health checks for version URLs.
+
+``LinkChecker`` is a small asyncio HTTP/1.1 client built for checking links,
+not fetching them:
+
+- it sends ``HEAD`` and falls back to ``GET`` (headers only) when a server
+  refuses ``HEAD``; redirects are followed up to ``max_redirects``
+- keep-alive connections are pooled per host (scheme, host, port), and each
+  host gets at most ``per_host`` requests in flight, so a batch of a
+  thousand Figma links never opens a thousand connections to Figma
+- ``concurrency`` caps requests in flight overall, and every request has a
+  ``timeout`` covering connect, TLS and the response headers. Time spent
+  queued behind a busy host doesn't count, and a queued URL doesn't hold
+  one of the ``concurrency`` slots, so one popular host can neither time
+  out healthy links nor starve the other hosts
+- results are cached per URL for ``ttl`` seconds, and concurrent checks of
+  the same URL share one request
+- only public addresses are checked (see ``artifacts.addresses``): every
+  hop, redirects included, must resolve to globally routable addresses only,
+  the connection goes to an address that was checked, and the address
+  actually connected to is checked again. Anything else is ``UNREACHABLE``
+  without a connection being made
+
+``check_pending_versions()`` runs the checker over versions still awaiting a
+decision whose last check is missing or older than the TTL, and stores the
+outcome on the version (``link_status`` and friends). The API only shows
+the status; the HTTP status and error are for the admin and the logs, as
+they would describe hosts the submitter can't otherwise see. The
+``check_version_links`` command drives it.
+"""
+import asyncio
+import logging
+import socket
+import ssl
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import addresses
+from .models import ArtifactVersion
+
+logger = logging.getLogger(__name__)
+
+LinkStatus = ArtifactVersion.LinkStatus
+
+USER_AGENT = 'ThatFridayFeeling-LinkCheck/1.0'
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_HEADER_LINES = 100
+
+
+class AddressNotAllowed(ValueError):
+    pass
+
+
+@dataclass
+class LinkResult:
+    url: str
+    status: str
+    http_status: int = None
+    error: str = ''
+    elapsed_ms: float = 0.0
+    checked_at: float = field(default_factory=time.time)
+
+
+def classify(http_status: int) -> str:
+    if http_status < 400:
+        return LinkStatus.OK
+    if http_status in (401, 403):
+        # The page exists but needs a login (private Figma files, staging auth).
+        return LinkStatus.RESTRICTED
+    return LinkStatus.BROKEN
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class _HostPool:
+    """Idle keep-alive connections to one host, and its concurrency cap."""
+
+    def __init__(self, per_host: int):
+        self.slots = asyncio.Semaphore(per_host)
+        self.idle = []
+
+
+class LinkChecker:
+    def __init__(self, concurrency=200, per_host=4, timeout=10.0, ttl=3600.0, max_redirects=5):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_redirects = max_redirects
+        self.per_host = per_host
+        self._slots = asyncio.Semaphore(concurrency)
+        self._pools = {}
+        self._cache = {}
+        self._in_flight = {}
+        self._ssl = ssl.create_default_context()
+
+    def allows(self, address) -> bool:
+        return addresses.is_public(address)
+
+    async def check(self, url: str) -> LinkResult:
+        cached = self._cache.get(url)
+        if cached is not None and cached.checked_at + self.ttl > time.time():
+            return cached
+        task = self._in_flight.get(url)
+        if task is None:
+            task = self._in_flight[url] = asyncio.ensure_future(self._check(url))
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def check_many(self, urls) -> dict:
+        """Check every URL concurrently; returns ``{url: LinkResult}``."""
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.check(url) for url in unique))
+        return dict(zip(unique, results))
+
+    async def close(self):
+        for pool in self._pools.values():
+            for connection in pool.idle:
+                connection.close()
+            pool.idle.clear()
+
+    async def _check(self, url: str) -> LinkResult:
+        started = time.perf_counter()
+        try:
+            result = await self._follow(url)
+        except asyncio.TimeoutError:
+            result = LinkResult(url, LinkStatus.UNREACHABLE, error=f'timed out after {self.timeout:g}s')
+        except (OSError, ssl.SSLError, asyncio.IncompleteReadError, ValueError) as exc:
+            result = LinkResult(url, LinkStatus.UNREACHABLE, error=(str(exc) or exc.__class__.__name__)[:255])
+        if result.error:
+            logger.info('Link check of %s: %s', url, result.error)
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        self._cache[url] = result
+        return result
+
+    async def _follow(self, url: str) -> LinkResult:
+        current = url
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(current)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                return LinkResult(url, LinkStatus.BROKEN, error=f'unsupported URL: {current[:200]}')
+
+            status, headers = await self._request('HEAD', parts)
+            if status in (405, 501):
+                status, headers = await self._request('GET', parts)
+
+            location = headers.get('location')
+            if status in REDIRECT_STATUSES and location:
+                current = urljoin(current, location)
+                continue
+            return LinkResult(url, classify(status), http_status=status)
+        return LinkResult(url, LinkStatus.BROKEN, error=f'more than {self.max_redirects} redirects')
+
+    def _pool(self, key) -> _HostPool:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _HostPool(self.per_host)
+        return pool
+
+    async def _request(self, method: str, parts):
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+        pool = self._pool((parts.scheme, parts.hostname, port))
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        host = parts.hostname if parts.port is None else f'{parts.hostname}:{parts.port}'
+        raw = (
+            f'{method} {path} HTTP/1.1\r\n'
+            f'Host: {host}\r\n'
+            f'User-Agent: {USER_AGENT}\r\n'
+            'Accept: */*\r\n'
+            'Connection: keep-alive\r\n\r\n'
+        ).encode('latin-1', 'replace')
+
+        # Wait for the host first, holding nothing else: the global slot and
+        # the timeout only start once the request can actually be sent.
+        async with pool.slots:
+            async with self._slots:
+                connection, status, headers, keep_alive = await asyncio.wait_for(
+                    self._exchange(pool, parts, port, raw), self.timeout
+                )
+
+        # Only HEAD responses are fully read; a GET's body is left unread,
+        # so that connection cannot be reused.
+        if method == 'HEAD' and keep_alive:
+            pool.idle.append(connection)
+        else:
+            connection.close()
+        return status, headers
+
+    async def _exchange(self, pool: _HostPool, parts, port: int, raw: bytes):
+        https = parts.scheme == 'https'
+        # A pooled connection may have been closed by the server while idle;
+        # if so, retry once on a fresh one.
+        while True:
+            reused = bool(pool.idle)
+            if reused:
+                connection = pool.idle.pop()
+            else:
+                # Connect to the address that was checked, not the name, so
+                # the name can't resolve somewhere else in between.
+                address = (await self._addresses(parts.hostname, port))[0]
+                reader, writer = await asyncio.open_connection(
+                    address, port,
+                    ssl=self._ssl if https else None,
+                    server_hostname=parts.hostname if https else None,
+                )
+                connection = _Connection(reader, writer)
+                if not self.allows(addresses.ip(writer.get_extra_info('peername')[0])):
+                    connection.close()
+                    raise AddressNotAllowed(f'{parts.hostname} is not a public address')
+            try:
+                connection.writer.write(raw)
+                await connection.writer.drain()
+                return (connection, *await self._read_head(connection.reader))
+            except (OSError, asyncio.IncompleteReadError, ConnectionError):
+                connection.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                # Timeouts and cancellation leave the stream mid-response.
+                connection.close()
+                raise
+
+    async def _addresses(self, host: str, port: int) -> list:
+        """Resolve ``host``; raises ``AddressNotAllowed`` unless every address is allowed."""
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        resolved = list(dict.fromkeys(info[4][0] for info in infos))
+        if not resolved or not all(self.allows(addresses.ip(address)) for address in resolved):
+            raise AddressNotAllowed(f'{host} is not a public address')
+        return resolved
+
+    @staticmethod
+    async def _read_head(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed')
+        version, status, *_ = status_line.decode('latin-1').split(' ', 2) + ['']
+        if not version.startswith('HTTP/') or not status.strip().isdigit():
+            raise ValueError(f'bad status line: {status_line[:80]!r}')
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise ValueError('too many header lines')
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+        return int(status), headers, keep_alive
+
+
+def versions_due(ttl: float, now=None):
+    """Pending versions whose link has never been checked or was checked before the TTL."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=ttl)
+    return (
+        ArtifactVersion.objects.filter(pending_approval__isnull=False)
+        .filter(Q(link_checked_at__isnull=True) | Q(link_checked_at__lt=cutoff))
+        .order_by('pk')
+    )
+
+
+def check_pending_versions(batch_size=1000, ttl=None, **checker_options) -> dict:
+    """
+    Check the links of pending versions that are due and store the results.
+
+    Checker options default to the ``LINK_CHECK_*`` settings. Returns ``{link status: number of versions}``. One event loop (and so
+    one connection pool) is reused across batches; the database is only
+    touched between batches.
+    """
+    ttl = settings.LINK_CHECK_TTL if ttl is None else ttl
+    checker_options.setdefault('concurrency', settings.LINK_CHECK_CONCURRENCY)
+    checker_options.setdefault('per_host', settings.LINK_CHECK_PER_HOST)
+    checker_options.setdefault('timeout', settings.LINK_CHECK_TIMEOUT)
+    loop = asyncio.new_event_loop()
+    try:
+        checker = loop.run_until_complete(_make_checker(ttl=ttl, **checker_options))
+        totals = {}
+        after_id = 0
+        while True:
+            versions = list(versions_due(ttl).filter(pk__gt=after_id).only('id', 'url')[:batch_size])
+            if not versions:
+                break
+            after_id = versions[-1].pk
+            results = loop.run_until_complete(checker.check_many(version.url for version in versions))
+            now = timezone.now()
+            for version in versions:
+                result = results[version.url]
+                version.link_status = result.status
+                version.link_http_status = result.http_status
+                version.link_error = result.error
+                version.link_checked_at = now
+                totals[result.status] = totals.get(result.status, 0) + 1
+            ArtifactVersion.objects.bulk_update(
+                versions, ['link_status', 'link_http_status', 'link_error', 'link_checked_at']
+            )
+        loop.run_until_complete(checker.close())
+        return totals
+    finally:
+        loop.close()
+
+
+async def _make_checker(**options) -> LinkChecker:
+    # Semaphores bind to the running loop, so build the checker inside it.
+    return LinkChecker(**options)
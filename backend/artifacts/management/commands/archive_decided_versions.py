@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils import timezone
+
+from artifacts.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Move decided artifact versions older than a cutoff, with their decisions, '
+        'into the archive tables in small keyset-ordered batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=365,
+            help='Archive versions decided more than this many days ago (default: 365).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Versions moved per transaction (default: 500).',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.1,
+            help='Seconds to pause between batches to throttle load (default: 0.1).',
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Stop after this many batches; rerun to continue.',
+        )
+        parser.add_argument(
+            '--after-id', type=int, default=0,
+            help='Resume from this version id (printed as progress).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would move without moving it.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        after_id = options['after_id']
+        batches = 0
+        total = 0
+
+        while options['max_batches'] is None or batches < options['max_batches']:
+            try:
+                moved, last_id = archive_batch(
+                    cutoff,
+                    after_id=after_id,
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+            except IntegrityError as exc:
+                raise CommandError(
+                    f'Archiving stopped after {total} version(s): the batch after id {after_id} clashes with '
+                    f'the archive ({exc}). Nothing in that batch was moved.'
+                )
+            if last_id is None:
+                break
+            batches += 1
+            total += moved
+            after_id = last_id
+            self.stdout.write(f'Batch {batches}: {moved} version(s), last id {last_id}')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total} version(s) decided before {cutoff:%Y-%m-%d} in {batches} batch(es).'
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from artifacts.linkcheck import check_pending_versions
+
+
+class Command(BaseCommand):
+    help = (
+        'Check the URLs of versions awaiting a decision and record whether they '
+        'still resolve. Links checked within LINK_CHECK_TTL are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Versions checked concurrently before results are saved (default: 1000).',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, checking every --interval seconds.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=300.0,
+            help='Seconds between runs with --loop (default: 300).',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            totals = check_pending_versions(batch_size=options['batch_size'])
+            summary = ', '.join(f'{count} {status.lower()}' for status, count in sorted(totals.items())) or 'nothing due'
+            self.stdout.write(self.style.SUCCESS(
+                f'Checked {sum(totals.values())} link(s) in {time.perf_counter() - started:.1f}s: {summary}.'
+            ))
+            if not options['loop']:
+                break
+            # Long-running: don't hold a connection the database may have dropped.
+            close_old_connections()
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
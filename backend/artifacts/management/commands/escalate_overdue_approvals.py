@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from artifacts.escalations import Level, escalate_overdue, overdue_counts, sync
+
+
+class Command(BaseCommand):
+    help = (
+        'Send reminders and escalations for versions waiting longer than their '
+        "project's approval SLA. Safe to run in several processes at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Pending versions claimed per transaction (default: 500).',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, scanning every --interval seconds.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60.0,
+            help='Seconds between scans with --loop (default: 60).',
+        )
+        parser.add_argument(
+            '--sync', action='store_true',
+            help='First repair the pending-approval tracking rows (e.g. after raw SQL edits).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what is due without sending anything.')
+
+    def handle(self, *args, **options):
+        if options['sync']:
+            added, removed = sync()
+            self.stdout.write(f'Tracking rows: {added} added, {removed} removed.')
+
+        if options['dry_run']:
+            due = overdue_counts()
+            self.stdout.write(self.style.SUCCESS(
+                f'Due now: {due[Level.REMINDED]} reminder(s), {due[Level.ESCALATED]} escalation(s).'
+            ))
+            return
+
+        while True:
+            sent = escalate_overdue(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Sent {sent[Level.REMINDED]} reminder(s) and {sent[Level.ESCALATED]} escalation(s).'
+            ))
+            if not options['loop']:
+                break
+            # Long-running: don't hold a connection the database may have dropped.
+            close_old_connections()
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from artifacts.previews import generate_pending_previews
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate preview thumbnails for versions waiting for one. Images are '
+        'fetched concurrently and scaled down on a pool of worker processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Versions handled per batch before results are saved (default: 100).',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Processes that scale images down (default: PREVIEW_WORKERS).',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, looking for new versions every --interval seconds.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Seconds between runs with --loop (default: 5).',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            totals = generate_pending_previews(batch_size=options['batch_size'], workers=options['workers'])
+            if totals or not options['loop']:
+                summary = ', '.join(f'{count} {status.lower()}' for status, count in sorted(totals.items()))
+                self.stdout.write(self.style.SUCCESS(
+                    f'Processed {sum(totals.values())} preview(s) in {time.perf_counter() - started:.1f}s: '
+                    f'{summary or "nothing pending"}.'
+                ))
+            if not options['loop']:
+                break
+            # Long-running: don't hold a connection the database may have dropped.
+            close_old_connections()
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
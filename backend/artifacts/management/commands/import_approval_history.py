@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from artifacts.importer import HistoryImporter, ImportRowError, parse_row, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream historical approvals from CSV or NDJSON and bulk insert them as '
+        'artifact versions and decisions, preserving original timestamps.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV/NDJSON file to import, or '-' for stdin.")
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'], default=None,
+            help='Input format (default: guessed from the file extension).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Rows inserted per transaction (default: 2000).',
+        )
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Use PostgreSQL COPY instead of bulk_create (ignored on other databases).',
+        )
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help='Progress file used to resume (default: <path>.checkpoint).',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip the rows recorded in the checkpoint file and continue after them.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        checkpoint = Path(options['checkpoint'] or f'{path}.checkpoint')
+        if path == '-' and options['resume'] and not options['checkpoint']:
+            raise CommandError('--resume from stdin needs an explicit --checkpoint.')
+
+        skip = 0
+        if options['resume'] and checkpoint.exists():
+            skip = json.loads(checkpoint.read_text())['rows_done']
+            self.stdout.write(f'Resuming after row {skip}.')
+
+        importer = HistoryImporter(use_copy=options['copy'])
+        chunk_size = options['chunk_size']
+        done = skip
+        imported = 0
+        started = time.perf_counter()
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            chunk = []
+            for line, record in read_records(stream, fmt):
+                if line <= skip:
+                    continue
+                chunk.append(parse_row(record, line))
+                if len(chunk) >= chunk_size:
+                    imported += importer.import_chunk(chunk)
+                    done = chunk[-1].line
+                    self._save_checkpoint(checkpoint, path, done)
+                    self._report(imported, started, done)
+                    chunk = []
+            if chunk:
+                imported += importer.import_chunk(chunk)
+                done = chunk[-1].line
+                self._save_checkpoint(checkpoint, path, done)
+        except (ImportRowError, IntegrityError) as exc:
+            raise CommandError(
+                f'Import stopped: {exc}. {done} row(s) are committed; fix the input and rerun with --resume.'
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if checkpoint.exists():
+            checkpoint.unlink()
+        elapsed = time.perf_counter() - started
+        rate = imported / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} version(s) in {elapsed:.1f}s ({rate:,.0f} rows/sec).'
+        ))
+
+    def _save_checkpoint(self, checkpoint: Path, path: str, done: int):
+        tmp = checkpoint.with_name(checkpoint.name + '.tmp')
+        tmp.write_text(json.dumps({'source': path, 'rows_done': done}))
+        os.replace(tmp, checkpoint)
+
+    def _report(self, imported: int, started: float, done: int):
+        elapsed = time.perf_counter() - started
+        rate = imported / elapsed if elapsed else 0.0
+        self.stdout.write(f'{done} row(s) done, {rate:,.0f} rows/sec')
@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Sum ``-X importtime`` self time per top-level package, in milliseconds.
+
+    Each line looks like ``import time:  self [us] | cumulative | name``.
+    """
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, _, name = line[len('import time:'):].split('|')
+            totals[name.strip().split('.')[0]] += int(self_us) / 1000
+        except ValueError:
+            continue
+    return dict(totals)
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile a cold start in fresh interpreters: time per start-up phase and '
+        'import time per top-level package.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Cold starts to run (default: 3).')
+        parser.add_argument('--top', type=int, default=20, help='Packages to list (default: 20).')
+        parser.add_argument('--json', action='store_true', help='Print machine-readable JSON.')
+
+    def handle(self, *args, **options):
+        runs = []
+        for _ in range(options['repeat']):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-m', 'thatfridayfeeling.startup'],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                raise CommandError(f'Start-up profile failed:\n{result.stderr[-2000:]}')
+            phases = json.loads(result.stdout.strip().splitlines()[-1])
+            runs.append((phases, parse_importtime(result.stderr)))
+
+        # Report the median run by total time to avoid first-run disk effects.
+        runs.sort(key=lambda run: run[0]['total'])
+        phases, imports = runs[len(runs) // 2]
+        top = sorted(imports.items(), key=lambda item: -item[1])[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({'phases_ms': phases, 'imports_ms': dict(top)}, indent=2))
+            return
+
+        self.stdout.write(f'Median of {len(runs)} cold start(s)\n')
+        self.stdout.write('Phase                              ms')
+        for name, value in phases.items():
+            self.stdout.write(f'  {name:<30} {value:>8.1f}')
+        self.stdout.write('\nTop-level package                  import ms (self)')
+        for name, value in top:
+            self.stdout.write(f'  {name:<30} {value:>8.1f}')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from artifacts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-project status counters from the version tables and repair any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it.')
+
+    def handle(self, *args, **options):
+        drift = reconcile(dry_run=options['dry_run'])
+        for (project_id, status), (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f'project {project_id} {status}: stored {stored}, actual {actual}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Status counters are in sync.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counter(s) drifted (not repaired).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} counter(s).'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artifacts', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedArtifactVersion',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('version_number', models.PositiveIntegerField()),
+                ('url', models.URLField()),
+                ('submitted_by', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('artifact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_versions', to='artifacts.artifact')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('artifact', 'version_number')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    """Seed the counters from existing versions (live and archived)."""
+    ArtifactVersion = apps.get_model('artifacts', 'ArtifactVersion')
+    ArchivedArtifactVersion = apps.get_model('artifacts', 'ArchivedArtifactVersion')
+    ProjectStatusCounter = apps.get_model('artifacts', 'ProjectStatusCounter')
+    status_for = {'APPROVE': 'APPROVED', 'REJECT': 'REJECTED', None: 'AWAITING_APPROVAL'}
+
+    counts = {}
+    for model in (ArtifactVersion, ArchivedArtifactVersion):
+        for project_id, decision, total in (
+            model.objects.values_list('artifact__project_id', 'approval_decision__decision')
+            .annotate(total=models.Count('id')).order_by()
+        ):
+            key = (project_id, status_for[decision])
+            counts[key] = counts.get(key, 0) + total
+
+    ProjectStatusCounter.objects.bulk_create([
+        ProjectStatusCounter(project_id=project_id, status=status, count=total)
+        for (project_id, status), total in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artifacts', '0003_archivedartifactversion'),
+        ('approvals', '0002_archivedapprovaldecision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('AWAITING_APPROVAL', 'Awaiting approval'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_counters', to='artifacts.project')),
+            ],
+            options={
+                'unique_together': {('project', 'status')},
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def track_pending_versions(apps, schema_editor):
+    """Create a PendingApproval row for every version awaiting a decision."""
+    ArtifactVersion = apps.get_model('artifacts', 'ArtifactVersion')
+    PendingApproval = apps.get_model('artifacts', 'PendingApproval')
+
+    pending = (
+        ArtifactVersion.objects.filter(approval_decision__isnull=True)
+        .values_list('id', 'artifact__project_id', 'created_at')
+        .order_by('id')
+    )
+    batch = []
+    for version_id, project_id, created_at in pending.iterator(chunk_size=2000):
+        batch.append(PendingApproval(version_id=version_id, project_id=project_id, submitted_at=created_at))
+        if len(batch) >= 2000:
+            PendingApproval.objects.bulk_create(batch)
+            batch = []
+    PendingApproval.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artifacts', '0004_projectstatuscounter'),
+        ('approvals', '0002_archivedapprovaldecision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='escalate_after',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='reminder_after',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PendingApproval',
+            fields=[
+                ('version', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_approval', serialize=False, to='artifacts.artifactversion')),
+                ('submitted_at', models.DateTimeField()),
+                ('level', models.PositiveSmallIntegerField(choices=[(0, 'Not yet notified'), (1, 'Reminder sent'), (2, 'Escalated')], default=0)),
+                ('reminded_at', models.DateTimeField(blank=True, null=True)),
+                ('escalated_at', models.DateTimeField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_approvals', to='artifacts.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'level', 'submitted_at', 'version'], name='pending_by_age')],
+            },
+        ),
+        migrations.RunPython(track_pending_versions, migrations.RunPython.noop),
+    ]
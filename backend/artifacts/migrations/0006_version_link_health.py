@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artifacts', '0005_pendingapproval'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedartifactversion',
+            name='link_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedartifactversion',
+            name='link_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='archivedartifactversion',
+            name='link_http_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedartifactversion',
+            name='link_status',
+            field=models.CharField(choices=[('UNCHECKED', 'Not checked yet'), ('OK', 'Reachable'), ('RESTRICTED', 'Needs a login'), ('BROKEN', 'Broken'), ('UNREACHABLE', 'Unreachable')], default='UNCHECKED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='artifactversion',
+            name='link_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='artifactversion',
+            name='link_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='artifactversion',
+            name='link_http_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='artifactversion',
+            name='link_status',
+            field=models.CharField(choices=[('UNCHECKED', 'Not checked yet'), ('OK', 'Reachable'), ('RESTRICTED', 'Needs a login'), ('BROKEN', 'Broken'), ('UNREACHABLE', 'Unreachable')], default='UNCHECKED', max_length=20),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artifacts', '0006_version_link_health'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedartifactversion',
+            name='preview_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='archivedartifactversion',
+            name='preview_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='archivedartifactversion',
+            name='preview_status',
+            field=models.CharField(choices=[('PENDING', 'Waiting to be generated'), ('READY', 'Ready'), ('FAILED', 'No preview available'), ('EXPIRED', 'Evicted from the cache')], default='PENDING', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='artifactversion',
+            name='preview_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='artifactversion',
+            name='preview_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='artifactversion',
+            name='preview_status',
+            field=models.CharField(choices=[('PENDING', 'Waiting to be generated'), ('READY', 'Ready'), ('FAILED', 'No preview available'), ('EXPIRED', 'Evicted from the cache')], default='PENDING', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='archivedartifactversion',
+            index=models.Index(condition=models.Q(('preview_status', 'READY')), fields=['preview_digest'], name='archived_ready_previews'),
+        ),
+        migrations.AddIndex(
+            model_name='artifactversion',
+            index=models.Index(condition=models.Q(('preview_status', 'PENDING')), fields=['id'], name='versions_awaiting_preview'),
+        ),
+        migrations.AddIndex(
+            model_name='artifactversion',
+            index=models.Index(condition=models.Q(('preview_status', 'READY')), fields=['url'], name='ready_previews_by_url'),
+        ),
+        migrations.AddIndex(
+            model_name='artifactversion',
+            index=models.Index(condition=models.Q(('preview_status', 'READY')), fields=['preview_digest'], name='ready_previews_by_digest'),
+        ),
+    ]
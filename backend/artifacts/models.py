@@ -3,6 +3,11 @@ from django.db import models
 
 class Project(models.Model):
     name = models.CharField(max_length=255)
+    # Approval SLA: how long a version may wait for a decision before a
+    # reminder, then an escalation, is sent. Blank uses the site-wide default
+    # (APPROVAL_REMINDER_AFTER / APPROVAL_ESCALATE_AFTER).
+    reminder_after = models.DurationField(null=True, blank=True)
+    escalate_after = models.DurationField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -22,16 +27,165 @@ class Artifact(models.Model):
 
 
 class ArtifactVersion(models.Model):
+    class LinkStatus(models.TextChoices):
+        UNCHECKED = 'UNCHECKED', 'Not checked yet'
+        OK = 'OK', 'Reachable'
+        RESTRICTED = 'RESTRICTED', 'Needs a login'
+        BROKEN = 'BROKEN', 'Broken'
+        UNREACHABLE = 'UNREACHABLE', 'Unreachable'
+
+    class PreviewStatus(models.TextChoices):
+        PENDING = 'PENDING', 'Waiting to be generated'
+        READY = 'READY', 'Ready'
+        FAILED = 'FAILED', 'No preview available'
+        EXPIRED = 'EXPIRED', 'Evicted from the cache'
+
     artifact = models.ForeignKey(Artifact, related_name='versions', on_delete=models.CASCADE)
     version_number = models.PositiveIntegerField()
     url = models.URLField()
     submitted_by = models.CharField(max_length=255, blank=True)
+    # Written by the link checker (``artifacts.linkcheck``).
+    link_status = models.CharField(max_length=20, choices=LinkStatus.choices, default=LinkStatus.UNCHECKED)
+    link_http_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    link_error = models.CharField(max_length=255, blank=True)
+    link_checked_at = models.DateTimeField(null=True, blank=True)
+    # Written by the preview pipeline (``artifacts.previews``); the thumbnail
+    # is the preview cache's file named by ``preview_digest``.
+    preview_status = models.CharField(max_length=20, choices=PreviewStatus.choices, default=PreviewStatus.PENDING)
+    preview_digest = models.CharField(max_length=64, blank=True)
+    preview_error = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('artifact', 'version_number')
         ordering = ['-created_at']
+        indexes = [
+            # The pipeline's queue, and its lookups for reusing previews.
+            models.Index(fields=['id'], condition=models.Q(preview_status='PENDING'), name='versions_awaiting_preview'),
+            models.Index(fields=['url'], condition=models.Q(preview_status='READY'), name='ready_previews_by_url'),
+            models.Index(
+                fields=['preview_digest'], condition=models.Q(preview_status='READY'), name='ready_previews_by_digest'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.artifact} v{self.version_number}"
+
+
+class ArchivedArtifactVersion(models.Model):
+    """
+    Cold-storage copy of a decided ``ArtifactVersion``.
+
+    Rows are moved here by the ``archive_decided_versions`` command and keep
+    their original primary key, so ``/api/artifact-versions/<id>/`` keeps
+    resolving after a version has been archived.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    artifact = models.ForeignKey(Artifact, related_name='archived_versions', on_delete=models.CASCADE)
+    version_number = models.PositiveIntegerField()
+    url = models.URLField()
+    submitted_by = models.CharField(max_length=255, blank=True)
+    link_status = models.CharField(
+        max_length=20, choices=ArtifactVersion.LinkStatus.choices, default=ArtifactVersion.LinkStatus.UNCHECKED
+    )
+    link_http_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    link_error = models.CharField(max_length=255, blank=True)
+    link_checked_at = models.DateTimeField(null=True, blank=True)
+    preview_status = models.CharField(
+        max_length=20, choices=ArtifactVersion.PreviewStatus.choices, default=ArtifactVersion.PreviewStatus.PENDING
+    )
+    preview_digest = models.CharField(max_length=64, blank=True)
+    preview_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('artifact', 'version_number')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['preview_digest'], condition=models.Q(preview_status='READY'), name='archived_ready_previews'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.artifact} v{self.version_number} (archived)"
+
+
+class ProjectStatusCounter(models.Model):
+    """
+    Number of versions per project in each status.
+
+    Maintained in the same transaction as version creation, decisions and
+    deletes (see ``artifacts/counters.py``); archived versions keep counting.
+    """
+    class Status(models.TextChoices):
+        AWAITING_APPROVAL = 'AWAITING_APPROVAL', 'Awaiting approval'
+        APPROVED = 'APPROVED', 'Approved'
+        REJECTED = 'REJECTED', 'Rejected'
+
+    project = models.ForeignKey(Project, related_name='status_counters', on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=Status.choices)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('project', 'status')
+
+    def __str__(self) -> str:
+        return f"{self.project}: {self.status} = {self.count}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a POST made with an ``Idempotency-Key`` header.
+
+    A row is inserted before the view runs (``status_code`` is null while the
+    first request is in flight) and filled in with the response once it
+    finishes, so retries replay the stored response instead of re-running
+    the write path. Rows expire after ``IDEMPOTENCY_KEY_TTL`` seconds.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return self.key
+
+
+class PendingApproval(models.Model):
+    """
+    One row per version still awaiting a decision, with its escalation state.
+
+    Created with the version and deleted by ``_decide``, so the table only
+    ever holds pending work and the overdue scan (see
+    ``artifacts/escalations.py``) is a range read on ``pending_by_age``.
+    """
+    class Level(models.IntegerChoices):
+        NONE = 0, 'Not yet notified'
+        REMINDED = 1, 'Reminder sent'
+        ESCALATED = 2, 'Escalated'
+
+    version = models.OneToOneField(
+        ArtifactVersion,
+        primary_key=True,
+        related_name='pending_approval',
+        on_delete=models.CASCADE,
+    )
+    project = models.ForeignKey(Project, related_name='pending_approvals', on_delete=models.CASCADE)
+    submitted_at = models.DateTimeField()
+    level = models.PositiveSmallIntegerField(choices=Level.choices, default=Level.NONE)
+    reminded_at = models.DateTimeField(null=True, blank=True)
+    escalated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'level', 'submitted_at', 'version'], name='pending_by_age'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.version_id}: {self.get_level_display()}"
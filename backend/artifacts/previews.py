@@ -0,0 +1,451 @@
+"""
+Preview thumbnails for version URLs.
+
+``generate_pending_previews()`` works through versions whose preview is
+``PENDING``, a batch at a time:
+
+- every distinct URL in the batch is handled once, and a URL that already
+  has a preview in the cache reuses it without being fetched again
+- images are fetched on a thread pool by the ``PREVIEW_FETCHER`` (by default
+  ``HttpFetcher``; tests plug in a local stand-in) and scaled down on a
+  process pool by ``artifacts.thumbnails.render_thumbnail``
+- thumbnails are stored in ``PreviewCache`` and the version records the
+  file's digest (``preview_status`` / ``preview_digest``)
+
+Nothing happens on the request path: a new version starts out ``PENDING``
+and the ``generate_previews`` command picks it up. ``PreviewView`` serves
+the files with long-lived cache headers, which is safe because a digest's
+content never changes.
+"""
+import functools
+import hashlib
+import http.client
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from . import addresses
+from .models import ArchivedArtifactVersion, ArtifactVersion
+
+logger = logging.getLogger(__name__)
+
+PreviewStatus = ArtifactVersion.PreviewStatus
+
+# The format render_thumbnail() writes.
+EXTENSION = 'webp'
+CONTENT_TYPE = 'image/webp'
+
+USER_AGENT = 'ThatFridayFeeling-Preview/1.0'
+PAGE_IMAGE_PROPERTIES = ('og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image')
+
+
+class PreviewUnavailable(Exception):
+    """The URL has no image a preview can be made from."""
+
+
+class _PageImageParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.image = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'meta' or self.image is not None:
+            return
+        attrs = dict(attrs)
+        name = (attrs.get('property') or attrs.get('name') or '').lower()
+        if name in PAGE_IMAGE_PROPERTIES and attrs.get('content'):
+            self.image = attrs['content']
+
+
+class _PublicOnlyConnection:
+    """Re-checks the address actually connected to, so DNS changes after the check don't matter."""
+
+    def __init__(self, *args, fetcher, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetcher = fetcher
+
+    def connect(self):
+        super().connect()
+        if not self.fetcher.allows(addresses.ip(self.sock.getpeername()[0])):
+            self.close()
+            raise PreviewUnavailable(f'{self.host} is not a public address')
+
+
+class _PublicOnlyHTTPConnection(_PublicOnlyConnection, http.client.HTTPConnection):
+    pass
+
+
+class _PublicOnlyHTTPSConnection(_PublicOnlyConnection, http.client.HTTPSConnection):
+    pass
+
+
+class _PublicOnlyHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, fetcher):
+        super().__init__()
+        self.fetcher = fetcher
+
+    def http_open(self, req):
+        return self.do_open(functools.partial(_PublicOnlyHTTPConnection, fetcher=self.fetcher), req)
+
+
+class _PublicOnlyHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, fetcher):
+        super().__init__()
+        self.fetcher = fetcher
+
+    def https_open(self, req):
+        return self.do_open(
+            functools.partial(_PublicOnlyHTTPSConnection, fetcher=self.fetcher), req, context=self._context
+        )
+
+
+class _PublicOnlyRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def __init__(self, fetcher):
+        super().__init__()
+        self.fetcher = fetcher
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        self.fetcher.check_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class HttpFetcher:
+    """
+    Fetch the image behind a version URL.
+
+    A URL that serves an image is used as is. For an HTML page (a Figma
+    file, a shared document) the page's ``og:image`` or ``twitter:image`` is
+    fetched instead. Anything else raises ``PreviewUnavailable``.
+
+    Version URLs are user input and previews are public, so only public
+    addresses are fetched. Every hop (the URL, each redirect, the page's
+    image) must resolve to globally routable addresses only, and the address
+    actually connected to is checked again. Loopback, private networks,
+    link-local and cloud metadata endpoints are never reached. Environment
+    proxies are not used, as they would hide the address being reached.
+    """
+
+    def __init__(self, timeout: float = None, max_bytes: int = None):
+        self.timeout = settings.PREVIEW_FETCH_TIMEOUT if timeout is None else timeout
+        self.max_bytes = settings.PREVIEW_MAX_SOURCE_BYTES if max_bytes is None else max_bytes
+        self.opener = urllib.request.build_opener(
+            urllib.request.ProxyHandler({}),
+            _PublicOnlyHTTPHandler(self),
+            _PublicOnlyHTTPSHandler(self),
+            _PublicOnlyRedirectHandler(self),
+        )
+
+    def allows(self, address) -> bool:
+        return addresses.is_public(address)
+
+    def check_url(self, url: str):
+        """Raise ``PreviewUnavailable`` unless ``url`` is http(s) on a host with only allowed addresses."""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise PreviewUnavailable('unsupported URL')
+        try:
+            port = parts.port or (443 if parts.scheme == 'https' else 80)
+            resolved = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)}
+        except (OSError, ValueError) as exc:
+            raise PreviewUnavailable(str(exc) or exc.__class__.__name__) from None
+        if not all(self.allows(addresses.ip(address)) for address in resolved):
+            raise PreviewUnavailable(f'{parts.hostname} is not a public address')
+
+    def __call__(self, url: str) -> bytes:
+        content_type, body = self._get(url)
+        if content_type in ('text/html', 'application/xhtml+xml'):
+            parser = _PageImageParser()
+            parser.feed(body.decode('utf-8', 'replace'))
+            if parser.image is None:
+                raise PreviewUnavailable('the page has no preview image')
+            content_type, body = self._get(urljoin(url, parser.image))
+        if not content_type.startswith('image/'):
+            raise PreviewUnavailable(f'unsupported content type {content_type}')
+        return body
+
+    def _get(self, url: str):
+        self.check_url(url)
+        request = urllib.request.Request(url, headers={
+            'User-Agent': USER_AGENT,
+            'Accept': 'image/*, text/html;q=0.9, */*;q=0.1',
+        })
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                content_type = response.headers.get_content_type()
+                body = response.read(self.max_bytes + 1)
+        except urllib.error.HTTPError as exc:
+            raise PreviewUnavailable(f'HTTP {exc.code}') from None
+        except (urllib.error.URLError, OSError, ValueError) as exc:
+            raise PreviewUnavailable(str(getattr(exc, 'reason', exc)) or exc.__class__.__name__) from None
+        if len(body) > self.max_bytes:
+            raise PreviewUnavailable('the image is too large')
+        return content_type, body
+
+
+class PreviewCache:
+    """
+    Content-addressed thumbnails on disk, bounded to ``max_bytes``.
+
+    Files are named by the SHA-256 of their content (``<root>/ab/ab12….webp``),
+    so identical thumbnails are stored once and a file never changes after
+    it is written. A file's modification time records when it was last used.
+    ``evict()`` removes the least recently used files once the cache is over
+    budget, down to ``LOW_WATER`` of it so that every new file doesn't
+    trigger another scan, and records the bytes left in ``used_bytes``.
+    """
+    LOW_WATER = 0.9
+    # Reads refresh a file's last-used time at most this often (seconds).
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.used_bytes = None
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f'{digest}.{EXTENSION}'
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    def put(self, data: bytes) -> str:
+        """Store a thumbnail; returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.is_file():
+            self.touch(digest)
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename, so readers never see a partial file.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return digest
+
+    def open(self, digest: str):
+        """Open a thumbnail for reading and mark it used. Raises ``FileNotFoundError``."""
+        f = open(self.path(digest), 'rb')
+        self.touch(digest)
+        return f
+
+    def touch(self, digest: str):
+        path = self.path(digest)
+        try:
+            now = time.time()
+            if path.stat().st_mtime < now - self.TOUCH_INTERVAL:
+                os.utime(path, (now, now))
+        except FileNotFoundError:
+            pass
+
+    def evict(self) -> dict:
+        """Remove least recently used files while over budget; returns ``{digest: size}`` of those removed."""
+        entries = []
+        total = 0
+        if not self.root.is_dir():
+            self.used_bytes = 0
+            return {}
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(f'.{EXTENSION}'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        self.used_bytes = total
+        if total <= self.max_bytes:
+            return {}
+
+        evicted = {}
+        target = self.max_bytes * self.LOW_WATER
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted[os.path.basename(path).rsplit('.', 1)[0]] = size
+        self.used_bytes = total
+        return evicted
+
+
+def get_cache() -> PreviewCache:
+    return PreviewCache(settings.PREVIEW_CACHE_DIR, settings.PREVIEW_CACHE_MAX_BYTES)
+
+
+def get_fetcher():
+    return import_string(settings.PREVIEW_FETCHER)()
+
+
+@functools.lru_cache(maxsize=None)
+def _url_template() -> str:
+    placeholder = '0' * 64
+    return reverse('preview', kwargs={'digest': placeholder}).replace(placeholder, '{}')
+
+
+def preview_url(digest: str) -> str:
+    """The API path of a preview. The URL pattern is only resolved once, as lists call this for every row."""
+    return _url_template().format(digest)
+
+
+def versions_due():
+    return ArtifactVersion.objects.filter(preview_status=PreviewStatus.PENDING).order_by('pk')
+
+
+def generate_pending_previews(batch_size=100, fetcher=None, workers=None, cache=None) -> dict:
+    """
+    Generate previews for every version waiting for one and store the results.
+
+    Returns ``{preview status: number of versions}``. The thread and process
+    pools are only started when there is work, and are reused across
+    batches; the database is only touched between batches, and the cache is
+    trimmed after each one.
+
+    Render workers are started by a fork server rather than forked from this
+    process, whose fetch threads may be mid-request (forking a threaded
+    process can deadlock the child). At most ``PREVIEW_FETCH_CONCURRENCY``
+    plus twice ``workers`` source images are held at once, fetched or
+    waiting to be rendered, however large the batch.
+    """
+    # Imported here so the web process never loads Pillow.
+    from .thumbnails import render_thumbnail
+
+    def next_batch(after_id):
+        return list(versions_due().filter(pk__gt=after_id).only('id', 'url')[:batch_size])
+
+    versions = next_batch(0)
+    if not versions:
+        return {}
+    fetcher = fetcher or get_fetcher()
+    cache = cache or get_cache()
+    workers = settings.PREVIEW_WORKERS if workers is None else workers
+    render = functools.partial(render_thumbnail, size=settings.PREVIEW_SIZE, quality=settings.PREVIEW_QUALITY)
+    sources = threading.BoundedSemaphore(settings.PREVIEW_FETCH_CONCURRENCY + 2 * workers)
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    totals = {}
+    with ThreadPoolExecutor(settings.PREVIEW_FETCH_CONCURRENCY) as fetch_pool, \
+            ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(start_method)) as render_pool:
+        while versions:
+            outcomes = _generate(
+                {version.url for version in versions}, fetcher, cache, fetch_pool, render_pool, render, sources
+            )
+            for version in versions:
+                version.preview_digest, version.preview_error = outcomes[version.url]
+                version.preview_status = PreviewStatus.READY if version.preview_digest else PreviewStatus.FAILED
+                totals[version.preview_status] = totals.get(version.preview_status, 0) + 1
+            ArtifactVersion.objects.bulk_update(versions, ['preview_status', 'preview_digest', 'preview_error'])
+            evicted = cache.evict()
+            release(evicted, room=cache.max_bytes - cache.used_bytes)
+            versions = next_batch(versions[-1].pk)
+    return totals
+
+
+def _generate(urls, fetcher, cache, fetch_pool, render_pool, render, sources) -> dict:
+    """
+    ``{url: (digest, error)}``, fetching and rendering each URL at most once.
+
+    A fetch takes one of ``sources`` before it starts, and gives it back once
+    its image has been rendered (or has failed), which bounds the source
+    images held in memory.
+    """
+    outcomes = {}
+    reusable = (
+        ArtifactVersion.objects.filter(url__in=urls, preview_status=PreviewStatus.READY)
+        .values_list('url', 'preview_digest').distinct()
+    )
+    for url, digest in reusable:
+        if url not in outcomes and cache.exists(digest):
+            cache.touch(digest)
+            outcomes[url] = (digest, '')
+
+    def fetch(url):
+        sources.acquire()
+        try:
+            return fetcher(url)
+        except BaseException:
+            sources.release()
+            raise
+
+    # Each source is handed to the process pool as soon as it arrives, so
+    # fetching and rendering overlap. Futures are dropped once handled so
+    # their sources can be freed.
+    fetches = {fetch_pool.submit(fetch, url): url for url in urls - outcomes.keys()}
+    renders = {}
+    for future in as_completed(fetches):
+        url = fetches.pop(future)
+        error = future.exception()
+        if error is not None:
+            outcomes[url] = ('', _failure(url, error))
+            continue
+        try:
+            rendering = render_pool.submit(render, future.result())
+        except Exception as exc:
+            sources.release()
+            outcomes[url] = ('', _failure(url, exc))
+            continue
+        rendering.add_done_callback(lambda _: sources.release())
+        renders[rendering] = url
+    for future in as_completed(renders):
+        url = renders.pop(future)
+        try:
+            outcomes[url] = (cache.put(future.result()), '')
+        except Exception as exc:
+            outcomes[url] = ('', _failure(url, exc))
+    return outcomes
+
+
+def _failure(url: str, exc: Exception) -> str:
+    # ThumbnailError is a ValueError: the source wasn't a usable image.
+    if not isinstance(exc, (PreviewUnavailable, ValueError)):
+        logger.warning('Preview generation failed for %s', url, exc_info=exc)
+    return (str(exc) or exc.__class__.__name__)[:255]
+
+
+def release(evicted: dict, room: int = 0, chunk_size=500):
+    """
+    Clear evicted previews (``{digest: size}``) from the versions using them.
+
+    Versions still awaiting a decision go back to ``PENDING`` to be generated
+    again, as long as their previews fit in ``room``, the cache's free bytes;
+    the rest are marked ``EXPIRED``. A cache smaller than the previews of all
+    pending versions would otherwise fetch and evict them forever.
+    """
+    digests = list(evicted)
+    for start in range(0, len(digests), chunk_size):
+        chunk = digests[start:start + chunk_size]
+        ready = ArtifactVersion.objects.filter(preview_status=PreviewStatus.READY, preview_digest__in=chunk)
+        requeue = []
+        pending = ready.filter(pending_approval__isnull=False).order_by().values_list('preview_digest', flat=True)
+        for digest in pending.distinct():
+            if evicted[digest] <= room:
+                room -= evicted[digest]
+                requeue.append(digest)
+        ready.filter(pending_approval__isnull=False, preview_digest__in=requeue).update(
+            preview_status=PreviewStatus.PENDING, preview_digest=''
+        )
+        ready.update(preview_status=PreviewStatus.EXPIRED, preview_digest='')
+        ArchivedArtifactVersion.objects.filter(
+            preview_status=PreviewStatus.READY, preview_digest__in=chunk
+        ).update(preview_status=PreviewStatus.EXPIRED, preview_digest='')
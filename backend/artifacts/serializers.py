@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from rest_framework import serializers
 
 from approvals.models import ApprovalDecision
-from .models import Artifact, ArtifactVersion
+from . import previews
+from .models import ArchivedArtifactVersion, Artifact, ArtifactVersion, Project
 
 
 class ApprovalDecisionSerializer(serializers.ModelSerializer):
@@ -12,9 +13,41 @@ class ApprovalDecisionSerializer(serializers.ModelSerializer):
         read_only_fields = ['decided_at']
 
 
+class ProjectSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Project
+        fields = ['id', 'name']
+
+
 class ArtifactVersionSerializer(serializers.ModelSerializer):
+    """
+    Read serializer for versions.
+
+    ``fields`` limits the output to the named fields (``None`` keeps all of
+    them); unused fields are dropped before serialization so their cost is
+    never paid. ``include`` embeds related objects: ``artifact`` expands the
+    artifact id into the artifact, ``project`` adds the artifact's project and
+    ``decision`` keeps the decision even when ``fields`` leaves it out.
+    """
+    INCLUDES = ('artifact', 'project', 'decision')
+
     decision = ApprovalDecisionSerializer(read_only=True, source='approval_decision')
     status = serializers.SerializerMethodField()
+    link_health = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+
+    def __init__(self, *args, fields=None, include=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        include = set(include or ())
+        if 'artifact' in include:
+            self.fields['artifact'] = ArtifactSerializer(read_only=True)
+        if 'project' in include:
+            self.fields['project'] = ProjectSummarySerializer(read_only=True, source='artifact.project')
+        if fields is not None:
+            keep = set(fields) | include
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
 
     class Meta:
         model = ArtifactVersion
@@ -24,18 +57,33 @@ class ArtifactVersionSerializer(serializers.ModelSerializer):
             'version_number',
             'url',
             'submitted_by',
+            'link_health',
+            'preview_url',
             'status',
             'created_at',
             'updated_at',
             'decision',
         ]
-        read_only_fields = ['status', 'created_at', 'updated_at', 'decision']
+        read_only_fields = ['link_health', 'preview_url', 'status', 'created_at', 'updated_at', 'decision']
 
     def get_status(self, obj: ArtifactVersion) -> str:
         if hasattr(obj, 'approval_decision') and obj.approval_decision:
             return 'APPROVED' if obj.approval_decision.decision == ApprovalDecision.Decision.APPROVE else 'REJECTED'
         return 'AWAITING_APPROVAL'
 
+    def get_link_health(self, obj: ArtifactVersion) -> dict:
+        # Only the coarse status: the HTTP status and error stay in the admin,
+        # as they can describe hosts the submitter shouldn't learn about.
+        return {
+            'status': obj.link_status,
+            'checked_at': obj.link_checked_at and serializers.DateTimeField().to_representation(obj.link_checked_at),
+        }
+
+    def get_preview_url(self, obj: ArtifactVersion):
+        if obj.preview_status == ArtifactVersion.PreviewStatus.READY and obj.preview_digest:
+            return previews.preview_url(obj.preview_digest)
+        return None
+
 
 class ArtifactVersionCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -46,15 +94,22 @@ class ArtifactVersionCreateSerializer(serializers.ModelSerializer):
         """Auto-assign the next version number if not provided."""
         artifact = validated_data['artifact']
         
-        # Get the highest version number for this artifact
-        max_version = ArtifactVersion.objects.filter(
-            artifact=artifact
-        ).aggregate(models.Max('version_number'))['version_number__max'] or 0
+        # Get the highest version number for this artifact, including
+        # versions that have been moved to the archive table
+        max_version = max(
+            model.objects.filter(
+                artifact=artifact
+            ).aggregate(models.Max('version_number'))['version_number__max'] or 0
+            for model in (ArtifactVersion, ArchivedArtifactVersion)
+        )
         
         # Set the next version number
         validated_data['version_number'] = max_version + 1
-        
-        return super().create(validated_data)
+
+        # Tracked for approval by the post_save signal (see escalations.py),
+        # in the same transaction.
+        with transaction.atomic():
+            return super().create(validated_data)
 
 
 class ArtifactSerializer(serializers.ModelSerializer):
@@ -6,11 +6,19 @@ This test suite validates the core MVP hypothesis:
 - Preventing duplicate/conflicting decisions
 - Ensuring clear, unambiguous approval or rejection
 """
-from django.test import TestCase
+import http.server
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from unittest import skipUnless
+
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 
-from artifacts.models import Project, Artifact, ArtifactVersion
+from artifacts.models import Project, Artifact, ArtifactVersion, IdempotencyKey
 from approvals.models import ApprovalDecision
 
 
@@ -447,3 +455,1831 @@ class ApprovalWorkflowIntegrationTest(APITestCase):
             format='json'
         )
         self.assertEqual(approve_response.status_code, status.HTTP_409_CONFLICT)
+
+
+class ResponseRenderingAndCompressionTest(APITestCase):
+    """Test the JSON renderer and negotiated response compression."""
+
+    def setUp(self):
+        project = Project.objects.create(name="Compression Test Project")
+        artifact = Artifact.objects.create(project=project, name="Compression Test Artifact")
+        for number in range(1, 21):
+            ArtifactVersion.objects.create(
+                artifact=artifact,
+                version_number=number,
+                url=f'https://staging.example.com/homepage/v{number}',
+                submitted_by='designer@agency.com'
+            )
+
+    def test_list_is_gzipped_when_accepted(self):
+        """Test that a large list response is gzip-encoded for gzip clients."""
+        import gzip
+        import json
+
+        response = self.client.get('/api/artifact-versions/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data), 20)
+        self.assertEqual(data[0]['status'], 'AWAITING_APPROVAL')
+
+    def test_response_uncompressed_without_accept_encoding(self):
+        """Test that clients that do not ask for compression get plain JSON."""
+        response = self.client.get('/api/artifact-versions/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.json()), 20)
+
+    def test_small_responses_are_not_compressed(self):
+        """Test that bodies under the size threshold are sent as-is."""
+        version = ArtifactVersion.objects.first()
+        response = self.client.get(f'/api/artifact-versions/{version.id}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_html_pages_are_not_compressed(self):
+        """Test that HTML, which can carry CSRF tokens, is never compressed (BREACH)."""
+        response = self.client.get('/api/artifact-versions/', HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertGreater(len(response.content), 512)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_negotiation_respects_qvalues(self):
+        """Test that q-values pick the encoding and q=0 refuses it."""
+        from thatfridayfeeling.middleware import negotiate_encoding
+
+        def fake(data):
+            return data
+
+        available = {'gzip': (fake, None), 'br': (fake, None), 'zstd': (fake, None)}
+        self.assertEqual(negotiate_encoding('gzip, br, zstd', available=available), 'zstd')
+        self.assertEqual(negotiate_encoding('gzip;q=1, br;q=0.5', available=available), 'gzip')
+        self.assertEqual(negotiate_encoding('*;q=0.1, zstd;q=0', available=available), 'br')
+        self.assertIsNone(negotiate_encoding('gzip;q=0', available=available))
+        self.assertIsNone(negotiate_encoding('identity', available=available))
+
+    def test_streaming_responses_are_compressed_incrementally(self):
+        """Test that streaming bodies are compressed chunk by chunk."""
+        import gzip
+        from django.http import StreamingHttpResponse
+        from django.test import RequestFactory
+        from thatfridayfeeling.middleware import CompressionMiddleware
+
+        chunks = [b'{"row": %d}\n' % i for i in range(50)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks), content_type='application/json')
+        )
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = middleware(request)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+
+class IdempotencyKeyAPITest(APITestCase):
+    """Test Idempotency-Key support on the submission and decision POSTs."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Idempotency Test Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Idempotency Test Artifact")
+        self.version = ArtifactVersion.objects.create(
+            artifact=self.artifact,
+            version_number=1,
+            url='https://figma.com/idempotent',
+            submitted_by='agency@example.com'
+        )
+
+    def test_retried_submission_does_not_create_duplicate_version(self):
+        """Test that a retried submit replays the first response instead of bumping the version."""
+        data = {'artifact': self.artifact.id, 'url': 'https://example.com/v2', 'submitted_by': 'a@agency.com'}
+        first = self.client.post('/api/artifact-versions/', data, format='json', HTTP_IDEMPOTENCY_KEY='submit-1')
+        retry = self.client.post('/api/artifact-versions/', data, format='json', HTTP_IDEMPOTENCY_KEY='submit-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(ArtifactVersion.objects.filter(artifact=self.artifact).count(), 2)
+
+    def test_retried_decision_replays_instead_of_409(self):
+        """Test that retrying an approve with the same key returns the original 200."""
+        url = f'/api/artifact-versions/{self.version.id}/approve/'
+        data = {'decided_by': 'client@example.com'}
+        first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='approve-1')
+        retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='approve-1')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data['status'], 'APPROVED')
+        self.assertEqual(ApprovalDecision.objects.filter(artifact_version=self.version).count(), 1)
+
+        # A different key is a genuinely new request and still hits finality.
+        other = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='approve-2')
+        self.assertEqual(other.status_code, status.HTTP_409_CONFLICT)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        """Test that reusing a key with a different body returns 422."""
+        url = f'/api/artifact-versions/{self.version.id}/reject/'
+        self.client.post(url, {'decided_by': 'a@client.com'}, format='json', HTTP_IDEMPOTENCY_KEY='k')
+        response = self.client.post(url, {'decided_by': 'b@client.com'}, format='json', HTTP_IDEMPOTENCY_KEY='k')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.1)
+    def test_in_flight_duplicate_waits_then_conflicts(self):
+        """Test that a duplicate of a still-running request does not run the write path."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from artifacts.idempotency import _fingerprint
+
+        url = f'/api/artifact-versions/{self.version.id}/approve/'
+        data = {'decided_by': 'client@example.com'}
+        request = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='probe').wsgi_request
+        IdempotencyKey.objects.create(
+            key='in-flight',
+            fingerprint=_fingerprint(request),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        ApprovalDecision.objects.all().delete()
+
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='in-flight')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('still being processed', response.data['detail'])
+        self.assertFalse(ApprovalDecision.objects.exists())
+
+    def test_expired_keys_are_purged(self):
+        """Test that expired records are evicted by the purge command."""
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        IdempotencyKey.objects.create(key='old', fingerprint='x', expires_at=timezone.now() - timedelta(seconds=1))
+        IdempotencyKey.objects.create(key='new', fingerprint='x', expires_at=timezone.now() + timedelta(hours=1))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+
+
+class ArchiveDecidedVersionsTest(APITestCase):
+    """Test archival of old decided versions into the cold tables."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.project = Project.objects.create(name="Archive Test Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Archive Test Artifact")
+        self.versions = []
+        for number in range(1, 6):
+            version = ArtifactVersion.objects.create(
+                artifact=self.artifact,
+                version_number=number,
+                url=f'https://example.com/archive/v{number}',
+                submitted_by='agency@example.com'
+            )
+            self.versions.append(version)
+        # v1-v3 decided long ago, v4 decided today, v5 still pending
+        for version in self.versions[:4]:
+            ApprovalDecision.objects.create(
+                artifact_version=version,
+                decision=ApprovalDecision.Decision.REJECT,
+                reason='Old feedback',
+                decided_by='client@example.com',
+            )
+        ApprovalDecision.objects.filter(artifact_version__in=self.versions[:3]).update(
+            decided_at=timezone.now() - timedelta(days=400)
+        )
+
+    def archive(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command('archive_decided_versions', sleep=0, stdout=StringIO(), **options)
+
+    def test_moves_only_old_decided_versions_in_batches(self):
+        """Test that old decided versions and their decisions move to the archive."""
+        from approvals.models import ArchivedApprovalDecision
+        from artifacts.models import ArchivedArtifactVersion
+
+        self.archive(batch_size=2)
+
+        self.assertEqual(
+            sorted(ArchivedArtifactVersion.objects.values_list('id', flat=True)),
+            [v.id for v in self.versions[:3]]
+        )
+        self.assertEqual(ArchivedApprovalDecision.objects.count(), 3)
+        self.assertEqual(
+            sorted(ArtifactVersion.objects.values_list('id', flat=True)),
+            [v.id for v in self.versions[3:]]
+        )
+
+    def test_archive_is_resumable(self):
+        """Test that stopping after one batch and rerunning finishes the job."""
+        from artifacts.models import ArchivedArtifactVersion
+
+        self.archive(batch_size=1, max_batches=1)
+        self.assertEqual(ArchivedArtifactVersion.objects.count(), 1)
+        self.archive(batch_size=1)
+        self.assertEqual(ArchivedArtifactVersion.objects.count(), 3)
+
+    def test_archived_version_is_readable_through_detail_endpoint(self):
+        """Test that archived versions are served transparently by id."""
+        self.archive()
+        response = self.client.get(f'/api/artifact-versions/{self.versions[0].id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'REJECTED')
+        self.assertEqual(response.data['decision']['reason'], 'Old feedback')
+
+    def test_archived_version_keeps_finality_and_numbering(self):
+        """Test that archived versions cannot be re-decided and numbering continues."""
+        self.archive()
+        response = self.client.post(
+            f'/api/artifact-versions/{self.versions[0].id}/approve/',
+            {'decided_by': 'client@example.com'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        ArtifactVersion.objects.filter(artifact=self.artifact).delete()
+        response = self.client.post(
+            '/api/artifact-versions/',
+            {'artifact': self.artifact.id, 'url': 'https://example.com/archive/v6'},
+            format='json'
+        )
+        self.assertEqual(response.data['version_number'], 4)
+
+    def test_clash_with_archive_rolls_back_the_batch(self):
+        """Test that a version whose number is already archived is kept, with its decision, not dropped."""
+        from datetime import timedelta
+        from django.core.management.base import CommandError
+        from django.utils import timezone
+        from artifacts.models import ArchivedArtifactVersion
+
+        self.archive()
+        clash = ArtifactVersion.objects.create(
+            artifact=self.artifact, version_number=1, url='https://example.com/archive/v1-again',
+        )
+        ApprovalDecision.objects.create(
+            artifact_version=clash, decision=ApprovalDecision.Decision.APPROVE, decided_by='client@example.com',
+        )
+        ApprovalDecision.objects.filter(artifact_version=clash).update(decided_at=timezone.now() - timedelta(days=400))
+
+        with self.assertRaisesMessage(CommandError, 'Nothing in that batch was moved'):
+            self.archive()
+        self.assertTrue(ApprovalDecision.objects.filter(artifact_version=clash).exists())
+        self.assertEqual(ArchivedArtifactVersion.objects.count(), 3)
+
+
+class ImportApprovalHistoryTest(TestCase):
+    """Test the bulk import of historical approvals."""
+
+    HEADER = 'project,artifact,url,submitted_by,created_at,decision,reason,decided_by,decided_at\n'
+
+    def write_input(self, text, suffix='.csv'):
+        import os
+        import tempfile
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, f'history{suffix}')
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def run_import(self, path, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command('import_approval_history', path, stdout=StringIO(), **options)
+
+    def test_csv_import_preserves_timestamps_and_reuses_parents(self):
+        """Test that rows land with their original timestamps under shared parents."""
+        existing = Project.objects.create(name="Acme")
+        path = self.write_input(
+            self.HEADER
+            + 'Acme,Homepage,https://e.com/1,a@agency.com,2019-01-01T10:00:00Z,APPROVE,,c@client.com,2019-01-02T09:30:00Z\n'
+            + 'Acme,Homepage,https://e.com/2,a@agency.com,2019-02-01T10:00:00Z,REJECT,Too dark,c@client.com,2019-02-03T10:00:00Z\n'
+            + 'Acme,Logo,https://e.com/3,a@agency.com,2019-03-01T10:00:00Z,,,,\n'
+        )
+        self.run_import(path, chunk_size=2)
+
+        self.assertEqual(Project.objects.count(), 1)
+        self.assertEqual(Artifact.objects.filter(project=existing).count(), 2)
+        homepage = ArtifactVersion.objects.filter(artifact__name='Homepage').order_by('version_number')
+        self.assertEqual([v.version_number for v in homepage], [1, 2])
+        self.assertEqual(homepage[0].created_at.isoformat(), '2019-01-01T10:00:00+00:00')
+        decision = ApprovalDecision.objects.get(artifact_version=homepage[0])
+        self.assertEqual(decision.decided_at.isoformat(), '2019-01-02T09:30:00+00:00')
+        self.assertFalse(ApprovalDecision.objects.filter(artifact_version__artifact__name='Logo').exists())
+
+    def test_import_leaves_model_fields_alone(self):
+        """Test that timestamps are kept without switching off auto_now/auto_now_add, which other threads share."""
+        from unittest import mock
+        from django.db.models import QuerySet
+
+        flags = []
+        bulk_create = QuerySet.bulk_create
+
+        def recording(queryset, objs, *args, **kwargs):
+            flags.extend(
+                (field.name, field.auto_now or field.auto_now_add)
+                for field in queryset.model._meta.fields if field.name in ('created_at', 'updated_at', 'decided_at')
+            )
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        path = self.write_input(
+            self.HEADER + 'Acme,Homepage,https://e.com/1,a@agency.com,2019-01-01T10:00:00Z,APPROVE,,c@client.com,2019-01-02T09:30:00Z\n'
+        )
+        with mock.patch.object(QuerySet, 'bulk_create', recording):
+            self.run_import(path)
+
+        self.assertEqual(
+            {name for name, automatic in flags if automatic}, {'created_at', 'updated_at', 'decided_at'}
+        )
+        self.assertTrue(all(automatic for _, automatic in flags))
+        version = ArtifactVersion.objects.get()
+        self.assertEqual(version.created_at.isoformat(), '2019-01-01T10:00:00+00:00')
+        self.assertEqual(version.updated_at.isoformat(), '2019-01-02T09:30:00+00:00')
+        self.assertEqual(ApprovalDecision.objects.get().decided_at.isoformat(), '2019-01-02T09:30:00+00:00')
+
+    def test_ndjson_import(self):
+        """Test that NDJSON input is accepted."""
+        import json
+
+        path = self.write_input(
+            json.dumps({'project': 'P', 'artifact': 'A', 'url': 'https://e.com/a',
+                        'decision': 'APPROVE', 'decided_by': 'c@client.com',
+                        'decided_at': '2020-05-05T00:00:00Z'}) + '\n',
+            suffix='.ndjson'
+        )
+        self.run_import(path)
+        self.assertEqual(ApprovalDecision.objects.get().decision, 'APPROVE')
+
+    def test_explicit_number_taken_by_archived_version_is_rejected(self):
+        """Test that an explicit version_number already in the archive stops the import."""
+        from django.core.management.base import CommandError
+        from django.utils import timezone
+        from artifacts.models import ArchivedArtifactVersion
+
+        artifact = Artifact.objects.create(project=Project.objects.create(name='P'), name='A')
+        ArchivedArtifactVersion.objects.create(
+            id=10_000, artifact=artifact, version_number=2, url='https://e.com/old',
+            created_at=timezone.now(), updated_at=timezone.now(),
+        )
+        path = self.write_input(
+            'project,artifact,version_number,url\n'
+            'P,A,1,https://e.com/1\n'
+            'P,A,2,https://e.com/2\n'
+        )
+        with self.assertRaisesMessage(CommandError, 'row 2: version_number 2 already exists in the archive'):
+            self.run_import(path)
+        self.assertFalse(ArtifactVersion.objects.exists())
+
+    def test_resume_after_failure(self):
+        """Test that a bad row stops the import and --resume continues after the committed rows."""
+        import os
+        from django.core.management.base import CommandError
+
+        good = 'P,A,https://e.com/{n},,2020-01-0{n}T00:00:00Z,,,,\n'
+        path = self.write_input(
+            self.HEADER + good.format(n=1) + good.format(n=2) + 'P,A,,,,,,,\n' + good.format(n=4)
+        )
+        with self.assertRaises(CommandError):
+            self.run_import(path, chunk_size=2)
+        self.assertEqual(ArtifactVersion.objects.count(), 2)
+        self.assertTrue(os.path.exists(path + '.checkpoint'))
+
+        with open(path) as f:
+            fixed = f.read().replace('P,A,,,,,,,', good.format(n=3).strip())
+        with open(path, 'w') as f:
+            f.write(fixed)
+        self.run_import(path, chunk_size=2, resume=True)
+
+        self.assertEqual(
+            list(ArtifactVersion.objects.order_by('version_number').values_list('url', flat=True)),
+            [f'https://e.com/{n}' for n in range(1, 5)]
+        )
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+
+
+class StartupWarmupTest(APITestCase):
+    """Test the warm-up hooks and the readiness endpoint."""
+
+    def test_readiness_endpoint_reports_database(self):
+        """Test GET /api/ready/ returns 200 when the database is reachable."""
+        response = self.client.get('/api/ready/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['database'], 'ok')
+
+    def test_readiness_endpoint_returns_503_without_database(self):
+        """Test that a database failure makes the probe fail."""
+        from unittest import mock
+        from django.db import OperationalError
+
+        error = OperationalError('could not connect to server at "db.internal" as user "tff"')
+        with mock.patch('thatfridayfeeling.startup.warm_connections', side_effect=error), \
+                self.assertLogs('thatfridayfeeling.views', 'ERROR'):
+            response = self.client.get('/api/ready/')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        # The driver's message is logged, never returned to the caller.
+        self.assertEqual(response.data['database'], 'unavailable')
+
+    def test_warm_up_marks_process_warmed(self):
+        """Test that warm_up runs and the probe reports it."""
+        from thatfridayfeeling import startup
+
+        startup.warm_up(connect=True)
+        self.assertTrue(startup.WARMED)
+        self.assertTrue(self.client.get('/api/ready/').data['warmed'])
+
+    def test_importtime_parser_groups_by_package(self):
+        """Test that -X importtime output is summed per top-level package."""
+        from artifacts.management.commands.profile_startup import parse_importtime
+
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:      1500 |       1500 |   django.utils\n'
+            'import time:       500 |       2000 | django\n'
+            'import time:      2000 |       2000 | rest_framework\n'
+        )
+        self.assertEqual(parse_importtime(stderr), {'django': 2.0, 'rest_framework': 2.0})
+
+    def test_pool_configuration_from_environment(self):
+        """Test that DATABASE_POOL_* settings become pool options and replace persistent connections."""
+        from django.core.exceptions import ImproperlyConfigured
+        from thatfridayfeeling.dbpool import configure_pool
+
+        database = configure_pool(
+            {'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 600},
+            {'DATABASE_POOL_MIN_SIZE': '4', 'DATABASE_POOL_MAX_SIZE': '16', 'DATABASE_POOL_MAX_LIFETIME': '900'},
+        )
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertEqual(database['OPTIONS']['pool'], {
+            'min_size': 4, 'max_size': 16, 'timeout': 10.0, 'max_lifetime': 900.0, 'max_idle': 600.0,
+        })
+        without_check = configure_pool({'ENGINE': 'django.db.backends.postgresql'}, {'DATABASE_POOL_CHECK': 'False'})
+        self.assertFalse(without_check['CONN_HEALTH_CHECKS'])
+
+        with self.assertRaises(ImproperlyConfigured):
+            configure_pool({'ENGINE': 'django.db.backends.sqlite3'}, {})
+
+    def test_django_builds_the_configured_pool(self):
+        """Test that Django accepts the pool options, with a stand-in psycopg_pool."""
+        import sys
+        import types
+        from unittest import mock
+        from django.db.backends.postgresql.base import DatabaseWrapper
+        from django.db.utils import ConnectionHandler
+        from thatfridayfeeling.dbpool import configure_pool
+
+        class StandInPool:
+            # Same keyword-only signature shape as psycopg_pool.ConnectionPool.
+            def __init__(self, conninfo='', *, kwargs=None, open=None, configure=None, check=None, **options):
+                self.check = check
+                self.options = options
+
+            @staticmethod
+            def check_connection(conn):
+                pass
+
+        stand_in = types.ModuleType('psycopg_pool')
+        stand_in.ConnectionPool = StandInPool
+        for check in ('True', 'False'):
+            database = configure_pool(
+                {'ENGINE': 'django.db.backends.postgresql', 'NAME': 'tff'}, {'DATABASE_POOL_CHECK': check}
+            )
+            connection = DatabaseWrapper(ConnectionHandler({'default': database}).settings['default'], alias='pooled')
+            # No psycopg 3 here to build real connection parameters; the pool never connects.
+            with mock.patch.dict(sys.modules, {'psycopg_pool': stand_in}), \
+                    mock.patch.object(DatabaseWrapper, '_connection_pools', {}), \
+                    mock.patch.object(DatabaseWrapper, 'get_connection_params', return_value={}):
+                pool = connection.pool
+            self.assertEqual(pool.check, StandInPool.check_connection if check == 'True' else None)
+            self.assertEqual(pool.options['max_size'], 10)
+
+    def test_readiness_omits_pool_metrics_without_pooling(self):
+        """Test that pool metrics only appear when a database is pooled."""
+        from thatfridayfeeling.dbpool import pool_stats
+
+        self.assertEqual(pool_stats(), {})
+        self.assertNotIn('database_pool', self.client.get('/api/ready/').data)
+
+
+@skipUnless(os.getenv('TEST_POSTGRES_URL'), 'set TEST_POSTGRES_URL to a PostgreSQL database to run')
+class PostgresConnectionPoolTest(SimpleTestCase):
+    """Test pooled connections against a real PostgreSQL server."""
+
+    def setUp(self):
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            self.skipTest('needs psycopg[binary,pool]')
+
+    def test_threads_share_the_pool(self):
+        """Test that threads take connections from one pool, health checks included, and that it reports metrics."""
+        import dj_database_url
+        from unittest import mock
+        from django.core.signals import request_finished, request_started
+        from django.db.utils import ConnectionHandler
+        from thatfridayfeeling.dbpool import close_pools, configure_pool, open_pools, pool_stats
+
+        database = configure_pool(
+            dj_database_url.parse(os.environ['TEST_POSTGRES_URL']),
+            {'DATABASE_POOL_MIN_SIZE': '1', 'DATABASE_POOL_MAX_SIZE': '2'},
+        )
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        handler = ConnectionHandler({'default': database})
+        errors = []
+
+        def requests():
+            try:
+                for _ in range(10):
+                    request_started.send(sender=None)
+                    try:
+                        with handler['default'].cursor() as cursor:
+                            cursor.execute('SELECT 1')
+                            self.assertEqual(cursor.fetchone(), (1,))
+                    finally:
+                        handler['default'].close()
+                        request_finished.send(sender=None)
+            except Exception as exc:
+                errors.append(exc)
+
+        with mock.patch('django.db.connections', handler):
+            open_pools()
+            try:
+                threads = [threading.Thread(target=requests) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join(30)
+                stats = pool_stats()['default']
+            finally:
+                close_pools()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(stats['connections_opened'], 2)
+        self.assertGreaterEqual(stats['requests'], 40)
+        self.assertEqual(stats['requests_timed_out'], 0)
+
+    def test_benchmark_runs(self):
+        """Test that bench_dbpool.py completes every mode."""
+        import subprocess
+        import sys
+
+        completed = subprocess.run(
+            [sys.executable, 'benchmarks/bench_dbpool.py', '--threads', '2', '--requests', '5', '--pool-size', '2'],
+            env={**os.environ, 'DATABASE_URL': os.environ['TEST_POSTGRES_URL']},
+            cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertNotIn('failed', completed.stdout)
+        for mode in ('connect', 'persistent', 'pool'):
+            self.assertIn(f'  {mode} ', completed.stdout)
+
+
+class SparseFieldsetAPITest(APITestCase):
+    """Test ?fields= and ?include= on the version endpoints."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Sparse Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Sparse Artifact", artifact_type="Design")
+        self.pending = ArtifactVersion.objects.create(
+            artifact=self.artifact, version_number=1, url='https://example.com/sparse/v1', submitted_by='a@agency.com'
+        )
+        self.approved = ArtifactVersion.objects.create(
+            artifact=self.artifact, version_number=2, url='https://example.com/sparse/v2', submitted_by='a@agency.com'
+        )
+        ApprovalDecision.objects.create(
+            artifact_version=self.approved, decision=ApprovalDecision.Decision.APPROVE, decided_by='c@client.com'
+        )
+
+    def test_fields_trims_output_and_columns(self):
+        """Test that ?fields= trims both the payload and the SELECT."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/artifact-versions/', {'fields': 'id,status,url'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'status', 'url'})
+        self.assertEqual(
+            {v['id']: v['status'] for v in response.data},
+            {self.pending.id: 'AWAITING_APPROVAL', self.approved.id: 'APPROVED'}
+        )
+        [select] = [q['sql'] for q in queries.captured_queries if 'artifactversion' in q['sql']]
+        self.assertNotIn('submitted_by', select)
+        self.assertNotIn('"note"', select)
+
+    def test_include_embeds_related_objects_in_one_query(self):
+        """Test that ?include= pulls artifact, project and decision in one query."""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'/api/artifact-versions/{self.approved.id}/',
+                {'fields': 'id,status', 'include': 'artifact,project,decision'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['artifact']['name'], 'Sparse Artifact')
+        self.assertEqual(response.data['project'], {'id': self.project.id, 'name': 'Sparse Project'})
+        self.assertEqual(response.data['decision']['decided_by'], 'c@client.com')
+
+    def test_default_output_is_unchanged(self):
+        """Test that without parameters every field is returned as before."""
+        response = self.client.get(f'/api/artifact-versions/{self.pending.id}/')
+        self.assertEqual(response.data['artifact'], self.artifact.id)
+        self.assertIn('decision', response.data)
+        self.assertNotIn('project', response.data)
+
+    def test_status_filter_runs_in_sql_with_sparse_fields(self):
+        """Test that ?status= still works when status is not an output field."""
+        response = self.client.get('/api/artifact-versions/', {'status': 'APPROVED', 'fields': 'id'})
+        self.assertEqual(response.data, [{'id': self.approved.id}])
+
+    def test_unknown_field_or_include_returns_400(self):
+        """Test that typos are reported rather than silently ignored."""
+        response = self.client.get('/api/artifact-versions/', {'fields': 'id,colour'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/artifact-versions/', {'include': 'owner'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ArtifactVersionHistoryAPITest(APITestCase):
+    """Test GET /api/artifacts/{id}/versions/."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="History Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="History Artifact")
+        other = Artifact.objects.create(project=self.project, name="Other Artifact")
+        ArtifactVersion.objects.create(artifact=other, version_number=1, url='https://example.com/other')
+        for number in range(1, 8):
+            version = ArtifactVersion.objects.create(
+                artifact=self.artifact, version_number=number, url=f'https://example.com/history/v{number}'
+            )
+            if number % 2:
+                ApprovalDecision.objects.create(
+                    artifact_version=version, decision=ApprovalDecision.Decision.REJECT, decided_by='c@client.com'
+                )
+
+    def test_history_is_ordered_and_keyset_paginated(self):
+        """Test newest-first ordering and following the next link to the end."""
+        url = f'/api/artifacts/{self.artifact.id}/versions/'
+        numbers = []
+        pages = 0
+        while url:
+            response = self.client.get(url, {'page_size': 3} if pages == 0 else None)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            numbers.extend(v['version_number'] for v in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        self.assertEqual(numbers, [7, 6, 5, 4, 3, 2, 1])
+        self.assertEqual(pages, 3)
+
+    def test_page_query_count_does_not_depend_on_page_size(self):
+        """Test that decisions are joined rather than fetched per version."""
+        url = f'/api/artifacts/{self.artifact.id}/versions/'
+        # artifact lookup + live versions + archived versions
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'page_size': 7})
+        self.assertEqual(response.data['results'][0]['status'], 'REJECTED')
+        self.assertEqual(response.data['results'][1]['decision'], None)
+        self.assertIsNone(response.data['next'])
+
+    def test_history_includes_archived_versions(self):
+        """Test that archived versions appear in their place in the history."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command('archive_decided_versions', older_than_days=-1, sleep=0, stdout=StringIO())
+        response = self.client.get(f'/api/artifacts/{self.artifact.id}/versions/', {'before': 6, 'fields': 'version_number,status'})
+        self.assertEqual(
+            response.data['results'],
+            [
+                {'version_number': 5, 'status': 'REJECTED'},
+                {'version_number': 4, 'status': 'AWAITING_APPROVAL'},
+                {'version_number': 3, 'status': 'REJECTED'},
+                {'version_number': 2, 'status': 'AWAITING_APPROVAL'},
+                {'version_number': 1, 'status': 'REJECTED'},
+            ]
+        )
+
+    def test_unknown_artifact_and_bad_cursor(self):
+        """Test 404 for a missing artifact and 400 for a malformed cursor."""
+        self.assertEqual(self.client.get('/api/artifacts/99999/versions/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f'/api/artifacts/{self.artifact.id}/versions/', {'before': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProjectStatusCounterTest(APITestCase):
+    """Test the incrementally maintained per-project status counters."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Counter Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Counter Artifact")
+
+    def submit(self):
+        response = self.client.post(
+            '/api/artifact-versions/',
+            {'artifact': self.artifact.id, 'url': 'https://example.com/counter'},
+            format='json'
+        )
+        return response.data['id']
+
+    def summary(self):
+        response = self.client.get(f'/api/projects/{self.project.id}/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return (response.data['awaiting_approval'], response.data['approved'], response.data['rejected'])
+
+    def test_counters_follow_submissions_and_decisions(self):
+        """Test that create/approve/reject keep the summary in step."""
+        first, second, _ = self.submit(), self.submit(), self.submit()
+        self.assertEqual(self.summary(), (3, 0, 0))
+
+        self.client.post(f'/api/artifact-versions/{first}/approve/', {'decided_by': 'c@client.com'}, format='json')
+        self.client.post(f'/api/artifact-versions/{second}/reject/', {'decided_by': 'c@client.com'}, format='json')
+        # A 409 must not move the counters.
+        self.client.post(f'/api/artifact-versions/{second}/approve/', {'decided_by': 'c@client.com'}, format='json')
+        self.assertEqual(self.summary(), (1, 1, 1))
+
+    def test_summary_is_a_single_counter_read(self):
+        """Test that the summary does not scan versions."""
+        self.submit()
+        # project lookup + counter rows
+        with self.assertNumQueries(2):
+            self.client.get(f'/api/projects/{self.project.id}/summary/')
+
+    def test_counters_follow_deletes_and_ignore_archiving(self):
+        """Test cascade and direct deletes, and that archiving keeps counts."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        approved, rejected, pending = self.submit(), self.submit(), self.submit()
+        self.client.post(f'/api/artifact-versions/{approved}/approve/', {'decided_by': 'c@client.com'}, format='json')
+        self.client.post(f'/api/artifact-versions/{rejected}/reject/', {'decided_by': 'c@client.com'}, format='json')
+
+        ApprovalDecision.objects.get(artifact_version_id=rejected).delete()
+        self.assertEqual(self.summary(), (2, 1, 0))
+
+        ArtifactVersion.objects.get(pk=approved).delete()
+        self.assertEqual(self.summary(), (2, 0, 0))
+
+        self.client.post(f'/api/artifact-versions/{pending}/approve/', {'decided_by': 'c@client.com'}, format='json')
+        call_command('archive_decided_versions', older_than_days=-1, sleep=0, stdout=StringIO())
+        self.assertEqual(self.summary(), (1, 1, 0))
+
+        self.artifact.delete()
+        self.assertEqual(self.summary(), (0, 0, 0))
+
+    def test_counters_follow_orm_and_admin_writes(self):
+        """Test that versions and decisions written outside the API are counted both ways."""
+        version = ArtifactVersion.objects.create(artifact=self.artifact, version_number=1, url='https://example.com/orm')
+        self.assertEqual(self.summary(), (1, 0, 0))
+        version.delete()
+        self.assertEqual(self.summary(), (0, 0, 0))
+
+        version = ArtifactVersion.objects.create(artifact=self.artifact, version_number=2, url='https://example.com/orm')
+        decision = ApprovalDecision.objects.create(artifact_version=version, decision='APPROVE', decided_by='admin')
+        self.assertEqual(self.summary(), (0, 1, 0))
+        decision.delete()
+        version.delete()
+        self.assertEqual(self.summary(), (0, 0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        """Test that the reconciliation command fixes tampered counters."""
+        from io import StringIO
+        from django.core.management import call_command
+        from artifacts.models import ProjectStatusCounter
+
+        self.submit()
+        self.submit()
+        ProjectStatusCounter.objects.filter(project=self.project).update(count=40)
+
+        out = StringIO()
+        call_command('reconcile_status_counters', stdout=out)
+        self.assertIn('stored 40, actual 2', out.getvalue())
+        self.assertEqual(self.summary(), (2, 0, 0))
+
+
+class StandInApiHandler(http.server.BaseHTTPRequestHandler):
+    """A local stand-in for the version API, just enough for the load generator's users."""
+
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    requests = 0
+    next_id = 1
+    decided = {}  # version id -> decided yet
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, data=None):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            pending = [{'id': pk} for pk, decided in cls.decided.items() if not decided]
+        path = self.path.split('?')[0]
+        if path == '/api/artifact-versions/':
+            self.reply(200, pending)
+        elif path.startswith('/api/artifact-versions/'):
+            self.reply(200, {'id': int(path.split('/')[3])})
+        else:
+            self.reply(404, {})
+
+    def do_POST(self):
+        cls = type(self)
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with cls.lock:
+            cls.requests += 1
+            if self.path in ('/api/artifacts/', '/api/artifact-versions/'):
+                pk, cls.next_id = cls.next_id, cls.next_id + 1
+                if self.path == '/api/artifact-versions/':
+                    cls.decided[pk] = False
+                code, data = 201, {'id': pk}
+            else:
+                pk = int(self.path.split('/')[3])
+                code, data = (409, {}) if cls.decided.get(pk, True) else (200, {'id': pk})
+                cls.decided[pk] = True
+        self.reply(code, data)
+
+
+class LoadTestHarnessTest(SimpleTestCase):
+    """Test the load generator against a local stand-in API."""
+
+    def setUp(self):
+        StandInApiHandler.requests = 0
+        StandInApiHandler.decided = {}
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInApiHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    def test_run_records_every_request_per_endpoint(self):
+        """Test that every user type runs, each request is recorded once, and double decisions count as 409s."""
+        import asyncio
+        from benchmarks.loadtest import Scenario, run_stage
+
+        scenario = Scenario(base_url=self.base_url, poll_interval=0.05, think_time=0.02, double_decide_rate=1.0)
+        report = asyncio.run(run_stage(scenario, pollers=2, agencies=1, clients=1, duration=0.5)).report()
+
+        self.assertEqual(sum(row['requests'] for row in report.values()), StandInApiHandler.requests)
+        for endpoint in (
+            'GET /api/artifact-versions/', 'POST /api/artifacts/', 'POST /api/artifact-versions/',
+            'GET /api/artifact-versions/?status=AWAITING_APPROVAL', 'GET /api/artifact-versions/{id}/',
+        ):
+            self.assertGreater(report[endpoint]['requests'], 0, endpoint)
+        decided = [row for endpoint, row in report.items() if endpoint.endswith(('/approve/', '/reject/'))]
+        self.assertTrue(decided)
+        # Every first decision is followed by a second one, which must be a 409.
+        for row in decided:
+            self.assertEqual(row['expected_409'], row['statuses'].get(409, 0))
+            self.assertEqual(row['statuses'].get(200, 0), row['expected_409'])
+        for endpoint, row in report.items():
+            self.assertEqual(row['error_rate'], 0.0, f'{endpoint}: {row["statuses"]}')
+            self.assertEqual(
+                set(row), {'requests', 'rps', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'error_rate', 'expected_409', 'statuses'}
+            )
+            self.assertLessEqual(row['p50_ms'], row['p90_ms'])
+            self.assertLessEqual(row['p99_ms'], row['max_ms'])
+
+
+class OverdueEscalationTest(APITestCase):
+    """Test pending-approval tracking and the overdue escalation scan."""
+
+    def setUp(self):
+        from artifacts.escalations import _default_receiver, version_overdue
+
+        self.project = Project.objects.create(name="SLA Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="SLA Artifact")
+        self.sent = []
+
+        def receiver(sender, pending, level, **kwargs):
+            self.sent.append((pending.version_id, level))
+
+        version_overdue.connect(receiver, weak=False, dispatch_uid='test-escalations')
+        self.addCleanup(version_overdue.disconnect, dispatch_uid='test-escalations')
+        # Keep the default logging/email receiver quiet.
+        version_overdue.disconnect(dispatch_uid='artifacts.escalations.default')
+        self.addCleanup(version_overdue.connect, _default_receiver, dispatch_uid='artifacts.escalations.default')
+
+    def submit(self, hours_ago, artifact=None):
+        from datetime import timedelta
+        from django.utils import timezone
+        from artifacts.models import PendingApproval
+
+        response = self.client.post('/api/artifact-versions/', {
+            'artifact': (artifact or self.artifact).id,
+            'url': 'https://example.com/sla',
+            'submitted_by': 'agency@example.com',
+        }, format='json')
+        version_id = response.data['id']
+        PendingApproval.objects.filter(pk=version_id).update(submitted_at=timezone.now() - timedelta(hours=hours_ago))
+        return version_id
+
+    def scan(self):
+        from artifacts.escalations import escalate_overdue
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return escalate_overdue(batch_size=2)
+
+    def test_tracking_follows_the_version_lifecycle(self):
+        """Test that submitting tracks a version and deciding stops tracking it."""
+        from artifacts.models import PendingApproval
+
+        version_id = self.submit(hours_ago=0)
+        self.assertTrue(PendingApproval.objects.filter(pk=version_id, project=self.project).exists())
+
+        self.client.post(f'/api/artifact-versions/{version_id}/approve/', {'decided_by': 'c@client.com'}, format='json')
+        self.assertFalse(PendingApproval.objects.filter(pk=version_id).exists())
+
+    def test_plain_orm_writes_are_tracked(self):
+        """Test that versions and decisions written outside the API are tracked, and the link checker sees them."""
+        from artifacts.linkcheck import versions_due
+        from artifacts.models import PendingApproval
+
+        version = ArtifactVersion.objects.create(artifact=self.artifact, version_number=1, url='https://example.com/orm')
+        pending = PendingApproval.objects.get(pk=version.pk)
+        self.assertEqual((pending.project_id, pending.submitted_at), (self.project.id, version.created_at))
+        self.assertIn(version, versions_due(ttl=3600))
+
+        decision = ApprovalDecision.objects.create(
+            artifact_version=version, decision=ApprovalDecision.Decision.APPROVE, decided_by='c@client.com'
+        )
+        self.assertFalse(PendingApproval.objects.filter(pk=version.pk).exists())
+        self.assertNotIn(version, versions_due(ttl=3600))
+
+        # Deleting just the decision puts the version back in the queue...
+        decision.delete()
+        self.assertTrue(PendingApproval.objects.filter(pk=version.pk).exists())
+
+        # ...but a decision deleted along with its version leaves nothing behind
+        ApprovalDecision.objects.create(
+            artifact_version=version, decision=ApprovalDecision.Decision.REJECT, decided_by='c@client.com'
+        )
+        version.delete()
+        self.assertFalse(PendingApproval.objects.exists())
+
+    def test_reminds_then_escalates_exactly_once(self):
+        """Test that each level is notified once, in keyset batches, and old versions skip straight to escalation."""
+        from artifacts.escalations import Level
+
+        fresh = self.submit(hours_ago=1)
+        reminders = [self.submit(hours_ago=50 + i) for i in range(3)]
+        ancient = self.submit(hours_ago=500)
+
+        sent = self.scan()
+        self.assertEqual((sent[Level.REMINDED], sent[Level.ESCALATED]), (3, 1))
+        self.assertCountEqual(self.sent, [(v, Level.REMINDED) for v in reminders] + [(ancient, Level.ESCALATED)])
+        self.assertNotIn(fresh, [v for v, _ in self.sent])
+
+        self.sent.clear()
+        self.assertEqual(sum(self.scan().values()), 0)
+        self.assertEqual(self.sent, [])
+
+    def test_project_thresholds_override_defaults(self):
+        """Test that a project's own SLA is used instead of the site-wide one."""
+        from datetime import timedelta
+        from artifacts.escalations import Level
+
+        strict = Project.objects.create(name="Strict", reminder_after=timedelta(hours=1), escalate_after=timedelta(hours=3))
+        strict_artifact = Artifact.objects.create(project=strict, name="Strict Artifact")
+        relaxed = self.submit(hours_ago=2)
+        reminded = self.submit(hours_ago=2, artifact=strict_artifact)
+        escalated = self.submit(hours_ago=4, artifact=strict_artifact)
+
+        self.scan()
+        self.assertCountEqual(self.sent, [(reminded, Level.REMINDED), (escalated, Level.ESCALATED)])
+        self.assertNotIn(relaxed, [v for v, _ in self.sent])
+
+    def test_failed_notification_is_retried(self):
+        """Test that a receiver error undoes the claim so the next scan retries it."""
+        from artifacts.escalations import Level, version_overdue
+        from artifacts.models import PendingApproval
+
+        version_id = self.submit(hours_ago=50)
+
+        def broken(sender, **kwargs):
+            raise RuntimeError('mail server down')
+
+        version_overdue.connect(broken, weak=False, dispatch_uid='test-broken')
+        with self.assertLogs('artifacts.escalations', level='ERROR'):
+            self.scan()
+        version_overdue.disconnect(dispatch_uid='test-broken')
+        self.assertEqual(PendingApproval.objects.get(pk=version_id).level, Level.NONE)
+
+        self.sent.clear()
+        self.scan()
+        self.assertEqual(self.sent, [(version_id, Level.REMINDED)])
+
+    def test_command_dry_run_and_sync(self):
+        """Test that --sync repairs tracking rows and --dry-run only reports."""
+        from io import StringIO
+        from django.core.management import call_command
+        from artifacts.models import PendingApproval
+
+        self.submit(hours_ago=50)
+        # bulk_create sends no post_save, so nothing tracks this one
+        [orphan] = ArtifactVersion.objects.bulk_create([
+            ArtifactVersion(artifact=self.artifact, version_number=99, url='https://example.com/o')
+        ])
+        self.assertFalse(PendingApproval.objects.filter(pk=orphan.pk).exists())
+
+        out = StringIO()
+        call_command('escalate_overdue_approvals', sync=True, dry_run=True, stdout=out)
+        self.assertIn('1 added', out.getvalue())
+        self.assertIn('Due now: 1 reminder(s), 0 escalation(s)', out.getvalue())
+        self.assertTrue(PendingApproval.objects.filter(pk=orphan.pk).exists())
+        self.assertEqual(self.sent, [])
+
+
+class StandInLinkHandler(http.server.BaseHTTPRequestHandler):
+    """A local stand-in for the sites version URLs point at."""
+
+    protocol_version = 'HTTP/1.1'
+    hits = []
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, headers=()):
+        self.hits.append((self.command, self.path))
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self.path == '/ok':
+            self.reply(200)
+        elif self.path == '/private':
+            self.reply(403)
+        elif self.path == '/moved':
+            self.reply(301, [('Location', '/ok')])
+        elif self.path == '/loop':
+            self.reply(302, [('Location', '/loop')])
+        elif self.path == '/no-head':
+            self.reply(405)
+        elif self.path == '/slow':
+            time.sleep(1)
+            self.reply(200)
+        elif self.path.startswith('/busy'):
+            time.sleep(0.1)
+            self.reply(200)
+        elif self.path == '/to-internal':
+            self.reply(302, [('Location', f'http://127.0.0.2:{self.server.server_address[1]}/ok')])
+        else:
+            self.reply(404)
+
+    def do_GET(self):
+        self.reply(200 if self.path == '/no-head' else 404)
+
+
+def stand_in_link_checker_class():
+    from artifacts.linkcheck import LinkChecker
+
+    class StandInSiteChecker(LinkChecker):
+        """Treats the stand-in site on 127.0.0.1 as public; every other private address stays refused."""
+
+        def allows(self, address):
+            return str(address) == '127.0.0.1' or super().allows(address)
+
+    return StandInSiteChecker
+
+
+class LinkHealthCheckTest(TestCase):
+    """Test the link checker and the link health stored on versions."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInLinkHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StandInLinkHandler.hits = []
+        self.project = Project.objects.create(name="Links Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Links Artifact")
+
+    def check(self, *paths, **options):
+        import asyncio
+
+        async def run():
+            checker = stand_in_link_checker_class()(timeout=options.pop('timeout', 5), **options)
+            try:
+                return await checker.check_many(self.base + path for path in paths)
+            finally:
+                await checker.close()
+
+        results = asyncio.run(run())
+        return [results[self.base + path] for path in paths]
+
+    def test_classifies_responses(self):
+        """Test status classification, redirects, the GET fallback and timeouts."""
+        ok, private, missing, moved, no_head, looping, slow = self.check(
+            '/ok', '/private', '/missing', '/moved', '/no-head', '/loop', '/slow', timeout=0.3, max_redirects=3,
+        )
+        self.assertEqual((ok.status, ok.http_status), ('OK', 200))
+        self.assertEqual((private.status, private.http_status), ('RESTRICTED', 403))
+        self.assertEqual((missing.status, missing.http_status), ('BROKEN', 404))
+        self.assertEqual((moved.status, moved.http_status), ('OK', 200))
+        self.assertEqual((no_head.status, no_head.http_status), ('OK', 200))
+        self.assertIn(('GET', '/no-head'), StandInLinkHandler.hits)
+        self.assertEqual(looping.status, 'BROKEN')
+        self.assertIn('redirects', looping.error)
+        self.assertEqual(slow.status, 'UNREACHABLE')
+        self.assertIn('timed out', slow.error)
+
+    def test_queueing_behind_a_busy_host_does_not_time_out(self):
+        """Test that the timeout covers each request, not the wait for a host slot."""
+        # 30 URLs x 100ms on one host, 2 at a time, queue for ~1.5s: well past
+        # the 0.5s timeout, which each request on its own stays under.
+        results = self.check(*(f'/busy/{n}' for n in range(30)), per_host=2, timeout=0.5)
+        self.assertEqual({result.status for result in results}, {'OK'})
+        self.assertEqual(sum(path.startswith('/busy') for _, path in StandInLinkHandler.hits), 30)
+
+    def test_refuses_non_public_addresses(self):
+        """Test that loopback, metadata and private redirect targets are never contacted."""
+        import asyncio
+        from artifacts.linkcheck import LinkChecker
+
+        async def run(checker, *urls):
+            try:
+                return await checker.check_many(urls)
+            finally:
+                await checker.close()
+
+        results = asyncio.run(run(LinkChecker(timeout=2), self.base + '/ok', 'http://169.254.169.254/latest/'))
+        self.assertEqual({result.status for result in results.values()}, {'UNREACHABLE'})
+        self.assertEqual(
+            sorted(result.error for result in results.values()),
+            ['127.0.0.1 is not a public address', '169.254.169.254 is not a public address'],
+        )
+        self.assertEqual(StandInLinkHandler.hits, [])
+
+        # The stand-in site is allowed, but its redirect to 127.0.0.2 is not followed.
+        internal, = self.check('/to-internal')
+        self.assertEqual((internal.status, internal.error), ('UNREACHABLE', '127.0.0.2 is not a public address'))
+        self.assertEqual(StandInLinkHandler.hits, [('HEAD', '/to-internal')])
+
+        # A name that resolved to a public address but connects somewhere
+        # private is caught at connect time.
+        class Rebound(LinkChecker):
+            async def _addresses(self, host, port):
+                return ['127.0.0.1']
+
+        rebound = asyncio.run(run(Rebound(timeout=2), self.base + '/ok'))[self.base + '/ok']
+        self.assertEqual((rebound.status, rebound.error), ('UNREACHABLE', '127.0.0.1 is not a public address'))
+        self.assertEqual(StandInLinkHandler.hits, [('HEAD', '/to-internal')])
+
+    def test_unreachable_host(self):
+        """Test that a refused connection is reported, not raised."""
+        import asyncio
+        import socket
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        result = asyncio.run(stand_in_link_checker_class()(timeout=2).check(f'http://127.0.0.1:{port}/'))
+        self.assertEqual(result.status, 'UNREACHABLE')
+        self.assertTrue(result.error)
+
+    def test_duplicate_urls_and_cache_share_one_request(self):
+        """Test that repeated and concurrent checks of a URL hit the host once within the TTL."""
+        import asyncio
+
+        async def run():
+            checker = stand_in_link_checker_class()(timeout=5)
+            url = self.base + '/ok'
+            await asyncio.gather(checker.check(url), checker.check(url), checker.check_many([url, url]))
+            await checker.check(url)
+            await checker.close()
+
+        asyncio.run(run())
+        self.assertEqual(StandInLinkHandler.hits, [('HEAD', '/ok')])
+
+    def test_pending_versions_are_checked_and_serialized(self):
+        """Test that only due pending versions are checked and the result shows in the API."""
+        from datetime import timedelta
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        def submit(path):
+            response = self.client.post('/api/artifact-versions/', {
+                'artifact': self.artifact.id, 'url': self.base + path, 'submitted_by': 'agency@example.com',
+            }, content_type='application/json')
+            return response.json()['id']
+
+        working, broken, decided, recent = submit('/ok'), submit('/missing'), submit('/ok'), submit('/missing')
+        self.client.post(f'/api/artifact-versions/{decided}/approve/', {'decided_by': 'c@client.com'},
+                         content_type='application/json')
+        ArtifactVersion.objects.filter(pk=recent).update(link_status='OK', link_checked_at=timezone.now())
+        self.assertEqual(
+            self.client.get(f'/api/artifact-versions/{working}/').json()['link_health'],
+            {'status': 'UNCHECKED', 'checked_at': None},
+        )
+
+        out = StringIO()
+        with mock.patch('artifacts.linkcheck.LinkChecker', stand_in_link_checker_class()):
+            call_command('check_version_links', batch_size=1, stdout=out)
+        self.assertIn('Checked 2 link(s)', out.getvalue())
+
+        health = self.client.get(f'/api/artifact-versions/{working}/?fields=link_health').json()['link_health']
+        self.assertEqual(health['status'], 'OK')
+        self.assertIsNotNone(health['checked_at'])
+        # The HTTP status and error are recorded for the admin, not published.
+        self.assertEqual(set(health), {'status', 'checked_at'})
+        broken_version = ArtifactVersion.objects.get(pk=broken)
+        self.assertEqual((broken_version.link_status, broken_version.link_http_status), ('BROKEN', 404))
+        self.assertEqual(ArtifactVersion.objects.get(pk=decided).link_status, 'UNCHECKED')
+        self.assertEqual(ArtifactVersion.objects.get(pk=recent).link_status, 'OK')
+
+        # Nothing is due again until the TTL passes.
+        ArtifactVersion.objects.filter(pk=broken).update(link_checked_at=timezone.now() - timedelta(days=1))
+        out = StringIO()
+        with mock.patch('artifacts.linkcheck.LinkChecker', stand_in_link_checker_class()):
+            call_command('check_version_links', stdout=out)
+        self.assertIn('Checked 1 link(s)', out.getvalue())
+
+
+class RateLimitAndLoadSheddingTest(APITestCase):
+    """Test per-client write rate limits and in-flight load shedding."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.project = Project.objects.create(name="Limits Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Limits Artifact")
+
+    def submit(self, client_ip='10.0.0.1'):
+        return self.client.post('/api/artifact-versions/', {
+            'artifact': self.artifact.id, 'url': 'https://example.com/limits', 'submitted_by': 'a@agency.com',
+        }, format='json', REMOTE_ADDR=client_ip)
+
+    @override_settings(RATE_LIMITING_ENABLED=True, WRITE_RATE_LIMITS={
+        'default': (600, 5), 'artifactversion-list-create': (60, 3),
+    })
+    def test_write_bucket_per_client_and_endpoint(self):
+        """Test that a client's burst is capped per endpoint while reads and other clients carry on."""
+        self.assertEqual([self.submit().status_code for _ in range(3)], [201] * 3)
+        throttled = self.submit()
+        self.assertEqual(throttled.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(throttled['Retry-After'], '1')
+
+        self.assertEqual(self.submit(client_ip='10.0.0.2').status_code, 201)
+        self.assertEqual(self.client.get('/api/artifact-versions/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+        created = self.client.post('/api/artifacts/', {'name': 'Other endpoint'}, format='json', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(created.status_code, 201)
+
+    @override_settings(RATE_LIMITING_ENABLED=True, WRITE_RATE_LIMITS={'default': (600, 5), 'artifactversion-list-create': (60, 2)})
+    def test_forwarded_for_header_does_not_pick_the_bucket(self):
+        """Test that a client can't dodge its limit with X-Forwarded-For, and that NUM_PROXIES picks the proxy's entry."""
+        from django.conf import settings
+
+        def submit(forwarded_for, client_ip='10.0.0.1'):
+            return self.client.post('/api/artifact-versions/', {
+                'artifact': self.artifact.id, 'url': 'https://example.com/limits', 'submitted_by': 'a@agency.com',
+            }, format='json', REMOTE_ADDR=client_ip, HTTP_X_FORWARDED_FOR=forwarded_for).status_code
+
+        self.assertEqual([submit(f'203.0.113.{n}') for n in range(3)], [201, 201, 429])
+
+        # Behind one proxy, the last entry is the one the proxy added.
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            codes = [submit(f'198.51.100.{n}, 192.0.2.7', client_ip='10.0.0.9') for n in range(3)]
+            self.assertEqual(codes, [201, 201, 429])
+            self.assertEqual(submit('192.0.2.8', client_ip='10.0.0.9'), 201)
+
+    def test_token_bucket_refills(self):
+        """Test that tokens come back at the configured rate and never beyond the burst."""
+        from unittest import mock
+        from thatfridayfeeling import throttling
+
+        bucket = throttling.TokenBucket(per_minute=60, burst=2)
+        clock = [1_000_000]
+        with mock.patch.object(throttling, '_now_ms', lambda: clock[0]):
+            self.assertEqual([bucket.take('c') for _ in range(2)], [0, 0])
+            self.assertEqual(bucket.take('c'), 1.0)
+            clock[0] += 500
+            self.assertEqual(bucket.take('c'), 0.5)
+            clock[0] += 500
+            self.assertEqual(bucket.take('c'), 0)
+            self.assertGreater(bucket.take('c'), 0)
+
+            # A long idle period refills to the burst, not past it.
+            clock[0] += 60_000
+            self.assertEqual([bucket.take('c') > 0 for _ in range(3)], [False, False, True])
+
+    def hold(self, count):
+        """
+        Start ``count`` real API requests that stay in flight until the
+        returned function is called; it returns their status codes.
+        """
+        from unittest import mock
+        from rest_framework.response import Response
+        from artifacts.views import ApiRoot
+
+        entered = threading.Semaphore(0)
+        release = threading.Event()
+
+        def get(view, request):
+            entered.release()
+            release.wait(10)
+            return Response({})
+
+        patcher = mock.patch.object(ApiRoot, 'get', get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(release.set)
+        codes = []
+        threads = [
+            threading.Thread(target=lambda: codes.append(self.client_class().get('/api/').status_code))
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for _ in range(count):
+            self.assertTrue(entered.acquire(timeout=10))
+
+        def finish():
+            release.set()
+            for thread in threads:
+                thread.join(10)
+            return codes
+
+        return finish
+
+    @override_settings(LOAD_SHEDDING_ENABLED=True, LOAD_SHED_MAX_IN_FLIGHT=4, LOAD_SHED_WRITE_SHARE=0.5)
+    def test_sheds_writes_before_reads(self):
+        """Test that writes are turned away first as in-flight requests build up."""
+        finish_first = self.hold(2)
+        shed = self.submit()
+        self.assertEqual(shed.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(shed['Retry-After'], '2')
+        self.assertEqual(self.client.get('/api/artifact-versions/').status_code, 200)
+
+        finish_second = self.hold(2)
+        self.assertEqual(self.client.get('/api/artifact-versions/').status_code, 503)
+        self.assertEqual(self.client.get('/api/ready/').status_code, 200)
+
+        self.assertEqual(finish_second() + finish_first(), [200] * 4)
+        self.assertEqual(self.submit().status_code, 201)
+
+    @override_settings(LOAD_SHEDDING_ENABLED=True)
+    def test_default_sizing_sheds_on_a_full_host(self):
+        """Test that at the shipped defaults (2 slots) a request beside a running one is shed."""
+        from django.conf import settings
+
+        # One less than WEB_CONCURRENCY (2) x GUNICORN_THREADS (1).
+        self.assertEqual(settings.LOAD_SHED_MAX_IN_FLIGHT, 1)
+        self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(self.client.get('/api/artifact-versions/').status_code, 200)
+
+        finish = self.hold(1)
+        self.assertEqual(self.submit().status_code, 503)
+        self.assertEqual(self.client.get('/api/artifact-versions/').status_code, 503)
+        self.assertEqual(finish(), [200])
+        self.assertEqual(self.client.get('/api/artifact-versions/').status_code, 200)
+
+
+class DecisionLedgerTest(APITestCase):
+    """Test the hash-chained decision ledger and its verification."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Ledger Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Ledger Artifact")
+
+    def decide(self, count=1, artifact=None, action='approve'):
+        ids = []
+        for _ in range(count):
+            version = self.client.post('/api/artifact-versions/', {
+                'artifact': (artifact or self.artifact).id, 'url': 'https://example.com/ledger',
+                'submitted_by': 'a@agency.com',
+            }, format='json').data['id']
+            response = self.client.post(f'/api/artifact-versions/{version}/{action}/', {
+                'decided_by': 'c@client.com', 'reason': 'Looks good',
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            ids.append(version)
+        return ids
+
+    def verify(self, **options):
+        from approvals.ledger import verify_project
+
+        return verify_project(self.project.id, **options)
+
+    def test_decisions_are_chained_per_project(self):
+        """Test that each project's decisions form their own contiguous chain ending at the head."""
+        from approvals.models import DecisionLedger
+
+        other = Artifact.objects.create(project=Project.objects.create(name="Other"), name="Other Artifact")
+        self.decide(2)
+        self.decide(1, artifact=other)
+        self.decide(1, action='reject')
+
+        chain = list(ApprovalDecision.objects.filter(project=self.project).order_by('sequence'))
+        self.assertEqual([d.sequence for d in chain], [1, 2, 3])
+        self.assertEqual(chain[0].prev_hash, DecisionLedger.GENESIS)
+        self.assertEqual([d.prev_hash for d in chain[1:]], [d.chain_hash for d in chain[:-1]])
+        head = DecisionLedger.objects.get(project=self.project)
+        self.assertEqual((head.head_sequence, head.head_hash), (3, chain[-1].chain_hash))
+        self.assertEqual(ApprovalDecision.objects.get(project=other.project).sequence, 1)
+
+    def test_verification_is_incremental_from_the_checkpoint(self):
+        """Test that a routine check only reads decisions recorded since the last one."""
+        self.decide(3)
+        first = self.verify()
+        self.assertTrue(first.ok, first.problems)
+        self.assertEqual(first.checked, 3)
+
+        self.decide(2)
+        second = self.verify()
+        self.assertTrue(second.ok, second.problems)
+        self.assertEqual((second.start_sequence, second.checked), (3, 2))
+        self.assertEqual(self.verify().checked, 0)
+
+    def test_tampering_is_detected(self):
+        """Test that edits, deletions, truncation and unchained rows all fail verification."""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        self.decide(4)
+        self.assertTrue(self.verify().ok)
+
+        ApprovalDecision.objects.filter(project=self.project, sequence=2).update(reason='Edited later')
+        self.assertTrue(self.verify(save=False).ok)  # before the checkpoint: only a full run reads it
+        self.assertIn('entry 2 has been modified', self.verify(full=True, save=False).problems)
+
+        ApprovalDecision.objects.filter(project=self.project, sequence=4).update(decided_by='someone@else.com')
+        self.assertIn('checkpoint entry 4 has changed since it was verified', self.verify(save=False).problems)
+
+        ApprovalDecision.objects.filter(project=self.project, sequence=3).delete()
+        problems = self.verify(full=True, save=False).problems
+        self.assertIn('entries 3-3 are missing', problems)
+
+        unchained = ArtifactVersion.objects.create(artifact=self.artifact, version_number=99, url='https://example.com/x')
+        ApprovalDecision.objects.create(artifact_version=unchained, decision='APPROVE', decided_by='raw@sql.com')
+        self.assertIn('1 decision(s) were recorded outside the ledger', self.verify(full=True, save=False).problems)
+
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 of 1 project ledger(s) failed verification'):
+            call_command('verify_decision_ledger', full=True, stderr=err)
+        self.assertIn(f'Project {self.project.id}: entry 2 has been modified', err.getvalue())
+
+    def test_truncated_chain_is_detected(self):
+        """Test that deleting the newest decisions is caught against the ledger head."""
+        self.decide(3)
+        ApprovalDecision.objects.filter(project=self.project, sequence=3).delete()
+        self.assertIn('entries 3-3 are missing', self.verify().problems)
+
+    def test_archived_and_imported_decisions_stay_verifiable(self):
+        """Test that archiving moves chain entries intact and imports are sealed onto the chain."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from artifacts.archive import archive_batch
+        from artifacts.importer import HistoryImporter, parse_row
+        from approvals.models import ArchivedApprovalDecision
+
+        self.decide(3)
+        archive_batch(cutoff=timezone.now() + timedelta(seconds=1), batch_size=2)
+        self.assertEqual(ArchivedApprovalDecision.objects.filter(project=self.project).count(), 2)
+
+        HistoryImporter().import_chunk([parse_row({
+            'project': self.project.name, 'artifact': 'Imported', 'url': 'https://example.com/old',
+            'decision': 'REJECT', 'decided_by': 'old@client.com', 'decided_at': '2024-01-01T10:00:00Z',
+        }, line=2)])
+        self.assertEqual(ApprovalDecision.objects.get(decided_by='old@client.com').sequence, 4)
+
+        report = self.verify(full=True)
+        self.assertTrue(report.ok, report.problems)
+        self.assertEqual(report.checked, 4)
+
+
+class DecisionLedgerParallelVerifyTest(TransactionTestCase):
+    """Test a full re-verify across projects in worker threads."""
+
+    def test_parallel_full_verify(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from approvals import ledger
+
+        for p in range(4):
+            artifact = Artifact.objects.create(project=Project.objects.create(name=f"P{p}"), name="A")
+            for n in range(3):
+                version = ArtifactVersion.objects.create(artifact=artifact, version_number=n + 1, url='https://example.com/')
+                ledger.append(
+                    ApprovalDecision.objects.create(artifact_version=version, decision='APPROVE', decided_by='c@c.com'),
+                    artifact.project_id,
+                )
+
+        out = StringIO()
+        call_command('verify_decision_ledger', full=True, workers=3, batch_size=2, stdout=out)
+        self.assertIn('4 project ledger(s) intact: 12 decision(s) checked', out.getvalue())
+
+
+def sample_image(color, size=(1600, 1000), format='PNG') -> bytes:
+    import io
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new('RGB', size, color).save(output, format)
+    return output.getvalue()
+
+
+class StandInFetcher:
+    """A local stand-in for fetching version URLs: serves canned images and records every fetch."""
+
+    def __init__(self, images):
+        self.images = images
+        self.fetched = []
+
+    def __call__(self, url):
+        from artifacts.previews import PreviewUnavailable
+
+        self.fetched.append(url)
+        if url not in self.images:
+            raise PreviewUnavailable('HTTP 404')
+        return self.images[url]
+
+
+class StandInPreviewHandler(http.server.BaseHTTPRequestHandler):
+    """A local stand-in for a design tool's share page and its preview image."""
+
+    image = b''
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, content_type, body):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/file/abc':
+            self.reply('text/html; charset=utf-8', b'<html><head><meta property="og:image" content="/thumb.png"></head></html>')
+        elif self.path == '/thumb.png':
+            self.reply('image/png', self.image)
+        elif self.path == '/plain':
+            self.reply('text/html', b'<html><head><title>No image</title></head></html>')
+        elif self.path == '/file/internal':
+            internal = f'http://127.0.0.2:{self.server.server_address[1]}/thumb.png'
+            self.reply('text/html', f'<meta property="og:image" content="{internal}">'.encode())
+        elif self.path == '/to-internal':
+            self.send_response(302)
+            self.send_header('Location', f'http://127.0.0.2:{self.server.server_address[1]}/thumb.png')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self.send_error(404)
+
+
+def stand_in_fetcher_class():
+    from artifacts.previews import HttpFetcher
+
+    class StandInSiteFetcher(HttpFetcher):
+        """Treats the stand-in site on 127.0.0.1 as public; every other private address stays refused."""
+
+        def allows(self, address):
+            return str(address) == '127.0.0.1' or super().allows(address)
+
+    return StandInSiteFetcher
+
+
+class PreviewPipelineTest(APITestCase):
+    """Test preview generation, the content-addressed cache and serving previews."""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        overrides = override_settings(PREVIEW_CACHE_DIR=self.cache_dir, PREVIEW_SIZE=(320, 200))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.project = Project.objects.create(name="Preview Project")
+        self.artifact = Artifact.objects.create(project=self.project, name="Homepage")
+
+    def submit(self, url):
+        response = self.client.post(
+            '/api/artifact-versions/', {'artifact': self.artifact.pk, 'url': url, 'submitted_by': 'designer'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def generate(self, fetcher, **options):
+        from artifacts.previews import generate_pending_previews
+
+        return generate_pending_previews(fetcher=fetcher, workers=2, **options)
+
+    def test_generates_previews_and_reuses_duplicate_urls(self):
+        """Test that each URL is fetched once, and previews are served with long-lived cache headers."""
+        import io
+        from PIL import Image
+
+        fetcher = StandInFetcher({
+            'https://figma.example/a': sample_image('red'),
+            'https://figma.example/b': sample_image('blue', format='JPEG'),
+        })
+        created = self.submit('https://figma.example/a')
+        self.assertIsNone(created['preview_url'])
+        self.submit('https://figma.example/a')
+        self.submit('https://figma.example/b')
+
+        self.assertEqual(self.generate(fetcher), {'READY': 3})
+        self.assertCountEqual(fetcher.fetched, ['https://figma.example/a', 'https://figma.example/b'])
+
+        first, second, other = ArtifactVersion.objects.order_by('pk')
+        self.assertEqual(first.preview_digest, second.preview_digest)
+        self.assertNotEqual(first.preview_digest, other.preview_digest)
+
+        # A later submission of a known URL reuses the cached preview.
+        fetcher.fetched.clear()
+        self.submit('https://figma.example/a')
+        self.assertEqual(self.generate(fetcher), {'READY': 1})
+        self.assertEqual(fetcher.fetched, [])
+        self.assertEqual(ArtifactVersion.objects.order_by('pk').last().preview_digest, first.preview_digest)
+
+        preview_url = self.client.get(f'/api/artifact-versions/{first.pk}/').data['preview_url']
+        self.assertEqual(preview_url, f'/api/previews/{first.preview_digest}.webp')
+        listed = self.client.get('/api/artifact-versions/', {'fields': 'id,preview_url'}).data
+        self.assertEqual({row['preview_url'] for row in listed}, {preview_url, f'/api/previews/{other.preview_digest}.webp'})
+
+        response = self.client.get(preview_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 200))
+
+        response = self.client.get(preview_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(f'/api/previews/{"0" * 64}.webp').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_submission_does_not_generate_previews(self):
+        """Test that creating a version only queues it, whatever the fetcher."""
+        with override_settings(PREVIEW_FETCHER='artifacts.tests.StandInFetcher'):
+            created = self.submit('https://figma.example/a')
+        version = ArtifactVersion.objects.get(pk=created['id'])
+        self.assertEqual(version.preview_status, ArtifactVersion.PreviewStatus.PENDING)
+        self.assertIsNone(created['preview_url'])
+        self.assertEqual(list(Path(self.cache_dir).iterdir()), [])
+
+    def test_records_failures(self):
+        """Test that unreachable URLs and unreadable images are marked failed."""
+        fetcher = StandInFetcher({'https://example.com/not-an-image': b'<html></html>'})
+        missing = self.submit('https://example.com/missing')
+        unreadable = self.submit('https://example.com/not-an-image')
+
+        self.assertEqual(self.generate(fetcher), {'FAILED': 2})
+        missing = ArtifactVersion.objects.get(pk=missing['id'])
+        unreadable = ArtifactVersion.objects.get(pk=unreadable['id'])
+        self.assertEqual((missing.preview_status, missing.preview_error), ('FAILED', 'HTTP 404'))
+        self.assertIn('not a readable image', unreadable.preview_error)
+        self.assertEqual(self.generate(fetcher), {})
+
+    def start_stand_in_site(self) -> str:
+        StandInPreviewHandler.image = sample_image('green', size=(40, 30))
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInPreviewHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f'http://127.0.0.1:{server.server_address[1]}'
+
+    def test_http_fetcher_follows_page_preview_image(self):
+        """Test that the HTTP fetcher resolves a page's og:image and rejects pages without one."""
+        from artifacts.previews import PreviewUnavailable
+
+        base = self.start_stand_in_site()
+        StandInSiteFetcher = stand_in_fetcher_class()
+        fetcher = StandInSiteFetcher(timeout=5)
+        self.assertEqual(fetcher(f'{base}/file/abc'), StandInPreviewHandler.image)
+        self.assertEqual(fetcher(f'{base}/thumb.png'), StandInPreviewHandler.image)
+        with self.assertRaisesMessage(PreviewUnavailable, 'no preview image'):
+            fetcher(f'{base}/plain')
+        with self.assertRaisesMessage(PreviewUnavailable, 'HTTP 404'):
+            fetcher(f'{base}/gone')
+        with self.assertRaisesMessage(PreviewUnavailable, 'too large'):
+            StandInSiteFetcher(timeout=5, max_bytes=10)(f'{base}/thumb.png')
+
+    def test_http_fetcher_refuses_non_public_addresses(self):
+        """Test that loopback, metadata and private hops are refused, including redirects and og:image."""
+        from artifacts.previews import HttpFetcher, PreviewUnavailable
+
+        base = self.start_stand_in_site()
+        with self.assertRaisesMessage(PreviewUnavailable, 'not a public address'):
+            HttpFetcher(timeout=5)(f'{base}/thumb.png')
+        with self.assertRaisesMessage(PreviewUnavailable, 'not a public address'):
+            HttpFetcher(timeout=5)('http://169.254.169.254/latest/meta-data/')
+
+        # The stand-in site is allowed, but what it points at on 127.0.0.2 is not.
+        fetcher = stand_in_fetcher_class()(timeout=5)
+        for path in ('/to-internal', '/file/internal'):
+            with self.assertRaisesMessage(PreviewUnavailable, '127.0.0.2 is not a public address'):
+                fetcher(base + path)
+
+        # A name that resolved to a public address when checked but connects
+        # somewhere private (DNS rebinding) is caught at connect time.
+        class Rebound(HttpFetcher):
+            def check_url(self, url):
+                pass
+
+        with self.assertRaisesMessage(PreviewUnavailable, 'not a public address'):
+            Rebound(timeout=5)(f'{base}/thumb.png')
+
+    def test_sources_held_at_once_are_bounded(self):
+        """Test that fetching stops while the allowed number of sources wait to be rendered."""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from artifacts.previews import _generate, get_cache
+
+        fetched = []
+        rendering = threading.Event()
+
+        def fetch(url):
+            fetched.append(url)
+            return sample_image('blue', size=(8, 8))
+
+        def render(source):
+            rendering.wait(10)
+            return source
+
+        def finish_rendering():
+            time.sleep(0.3)
+            fetched_while_rendering.append(len(fetched))
+            rendering.set()
+
+        fetched_while_rendering = []
+        threading.Thread(target=finish_rendering, daemon=True).start()
+        urls = {f'https://example.com/bounded/{n}' for n in range(10)}
+        with ThreadPoolExecutor(4) as fetch_pool, ThreadPoolExecutor(10) as render_pool:
+            outcomes = _generate(urls, fetch, get_cache(), fetch_pool, render_pool, render, threading.BoundedSemaphore(3))
+        self.assertEqual(fetched_while_rendering, [3])
+        self.assertEqual(len(fetched), 10)
+        self.assertEqual({error for _, error in outcomes.values()}, {''})
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test LRU eviction and that versions using an evicted preview are released."""
+        import os
+        from artifacts.previews import PreviewCache, release
+
+        cache = PreviewCache(self.cache_dir, max_bytes=250)
+        old, used, new = (cache.put(bytes([n]) * 100) for n in range(3))
+        self.assertEqual(cache.put(bytes([2]) * 100), new)
+        for age, digest in ((300, old), (200, used), (100, new)):
+            stamp = time.time() - age
+            os.utime(cache.path(digest), (stamp, stamp))
+        cache.open(used).close()
+
+        self.assertEqual(cache.evict(), {old: 100})
+        self.assertEqual(cache.used_bytes, 200)
+        self.assertFalse(cache.exists(old))
+        self.assertTrue(cache.exists(used) and cache.exists(new))
+        self.assertEqual(cache.evict(), {})
+
+        pending = ArtifactVersion.objects.get(pk=self.submit('https://example.com/pending')['id'])
+        decided = ArtifactVersion.objects.get(pk=self.submit('https://example.com/decided')['id'])
+        ArtifactVersion.objects.filter(pk__in=[pending.pk, decided.pk]).update(preview_status='READY', preview_digest=old)
+        self.client.post(f'/api/artifact-versions/{decided.pk}/approve/', {'decided_by': 'client'}, format='json')
+
+        release({old: 100}, room=100)
+        pending.refresh_from_db()
+        decided.refresh_from_db()
+        self.assertEqual((pending.preview_status, pending.preview_digest), ('PENDING', ''))
+        self.assertEqual((decided.preview_status, decided.preview_digest), ('EXPIRED', ''))
+
+        # Without room for it, a pending version's preview isn't regenerated
+        # only to push another one out.
+        ArtifactVersion.objects.filter(pk=pending.pk).update(preview_status='READY', preview_digest=old)
+        release({old: 100}, room=99)
+        pending.refresh_from_db()
+        self.assertEqual((pending.preview_status, pending.preview_digest), ('EXPIRED', ''))
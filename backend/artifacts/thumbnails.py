@@ -0,0 +1,45 @@
+"""
+Thumbnail rendering for version previews.
+
+``render_thumbnail`` runs in the preview pipeline's worker processes (see
+``artifacts/previews.py``), so this module only depends on Pillow and can be
+imported without Django being set up.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+FORMAT = 'WEBP'
+EXTENSION = 'webp'
+CONTENT_TYPE = 'image/webp'
+
+# Refuse sources whose decoded size would be excessive (decompression bombs).
+MAX_SOURCE_PIXELS = 40_000_000
+Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+
+
+class ThumbnailError(ValueError):
+    pass
+
+
+def render_thumbnail(data: bytes, size=(640, 400), quality: int = 80) -> bytes:
+    """Scale an image down to fit within ``size`` and encode it as WebP."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_SOURCE_PIXELS:
+                raise ThumbnailError(f'image is too large ({image.width}x{image.height})')
+            # JPEGs can be decoded at a fraction of their size, which is much
+            # faster than decoding in full and scaling down.
+            image.draft('RGB', size)
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+            image.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+            output = io.BytesIO()
+            image.save(output, FORMAT, quality=quality, method=4)
+            return output.getvalue()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        # Unreadable or truncated images; Pillow's own errors may not pickle
+        # back from a worker process, so report them as ours.
+        raise ThumbnailError(f'not a readable image: {exc}') from None
@@ -1,19 +1,25 @@
-from django.urls import path
+from django.urls import path, re_path
 
 from .views import (
     ArtifactCreateView,
     ArtifactVersionApproveView,
     ArtifactVersionCreateView,
     ArtifactVersionDetailView,
+    ArtifactVersionHistoryView,
     ArtifactVersionRejectView,
     ApiRoot,
+    PreviewView,
+    ProjectSummaryView,
 )
 
 urlpatterns = [
     path('', ApiRoot.as_view(), name='api-root'),
     path('artifacts/', ArtifactCreateView.as_view(), name='artifact-create'),
+    path('artifacts/<int:pk>/versions/', ArtifactVersionHistoryView.as_view(), name='artifact-version-history'),
+    path('projects/<int:pk>/summary/', ProjectSummaryView.as_view(), name='project-summary'),
     path('artifact-versions/', ArtifactVersionCreateView.as_view(), name='artifactversion-list-create'),
     path('artifact-versions/<int:pk>/', ArtifactVersionDetailView.as_view(), name='artifactversion-detail'),
     path('artifact-versions/<int:pk>/approve/', ArtifactVersionApproveView.as_view(), name='artifactversion-approve'),
     path('artifact-versions/<int:pk>/reject/', ArtifactVersionRejectView.as_view(), name='artifactversion-reject'),
+    re_path(r'^previews/(?P<digest>[0-9a-f]{64})\.webp$', PreviewView.as_view(), name='preview'),
 ]
@@ -1,11 +1,18 @@
 from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
+from analytics.rollups import record_decisions
+from approvals import ledger
 from approvals.models import ApprovalDecision
-from .models import Artifact, ArtifactVersion
+from . import counters, previews
+from .idempotency import idempotent
+from .models import ArchivedArtifactVersion, Artifact, ArtifactVersion, Project
 from .serializers import (
     ApprovalDecisionSerializer,
     ArtifactCreateSerializer,
@@ -15,6 +22,78 @@ from .serializers import (
 )
 
 
+# Columns each serializer field needs, used to narrow the SELECT via .only().
+DECISION_COLUMNS = [
+    'approval_decision__decision',
+    'approval_decision__reason',
+    'approval_decision__note',
+    'approval_decision__decided_by',
+    'approval_decision__decided_at',
+]
+VERSION_FIELD_COLUMNS = {
+    'id': ['id'],
+    'artifact': ['artifact'],
+    'version_number': ['version_number'],
+    'url': ['url'],
+    'submitted_by': ['submitted_by'],
+    'link_health': ['link_status', 'link_checked_at'],
+    'preview_url': ['preview_status', 'preview_digest'],
+    'status': ['approval_decision__decision'],
+    'created_at': ['created_at'],
+    'updated_at': ['updated_at'],
+    'decision': DECISION_COLUMNS,
+}
+INCLUDE_COLUMNS = {
+    'artifact': ['artifact', 'artifact__project', 'artifact__name', 'artifact__artifact_type', 'artifact__created_at'],
+    'project': ['artifact', 'artifact__project', 'artifact__project__name'],
+    'decision': DECISION_COLUMNS,
+}
+INCLUDE_RELATIONS = {
+    'artifact': 'artifact',
+    'project': 'artifact__project',
+    'decision': 'approval_decision',
+}
+
+
+def _csv_param(request, name: str, allowed):
+    raw = request.query_params.get(name)
+    if raw is None:
+        return None
+    values = [value.strip() for value in raw.split(',') if value.strip()]
+    unknown = sorted(set(values) - set(allowed))
+    if unknown:
+        raise ValidationError({name: f"Unknown value(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}."})
+    return values
+
+
+def sparse_params(request):
+    """Parse ``?fields=`` and ``?include=`` for the version endpoints."""
+    fields = _csv_param(request, 'fields', list(VERSION_FIELD_COLUMNS))
+    include = _csv_param(request, 'include', ArtifactVersionSerializer.INCLUDES) or []
+    return fields, include
+
+
+def sparse_version_queryset(queryset, fields, include):
+    """
+    Join exactly the relations the requested output needs, in one query, and
+    fetch only the columns it reads.
+    """
+    wanted = set(VERSION_FIELD_COLUMNS if fields is None else fields)
+    relations = {INCLUDE_RELATIONS[name] for name in include}
+    if wanted & {'status', 'decision'}:
+        relations.add('approval_decision')
+    queryset = queryset.select_related(*sorted(relations))
+
+    if fields is None:
+        return queryset
+    columns = {'id'}
+    for name in wanted:
+        columns.update(VERSION_FIELD_COLUMNS[name])
+    for name in include:
+        columns.update(INCLUDE_COLUMNS[name])
+    return queryset.only(*sorted(columns))
+
+
 class ApiRoot(APIView):
     """Simple API root that lists primary endpoints for developer convenience."""
     def get(self, request, format=None):
@@ -28,6 +107,7 @@ class ApiRoot(APIView):
 
 
 class ArtifactCreateView(APIView):
+    @idempotent
     def post(self, request):
         serializer = ArtifactCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -37,19 +117,30 @@ class ArtifactCreateView(APIView):
 
 class ArtifactVersionCreateView(APIView):
     def get(self, request):
-        """List all artifact versions, optionally filtered by status."""
+        """
+        List all artifact versions, optionally filtered by status.
+
+        Supports ``?fields=`` and ``?include=`` (see ``ArtifactVersionSerializer``).
+        """
         status_filter = request.query_params.get('status')
-        
-        versions = ArtifactVersion.objects.select_related('approval_decision').all().order_by('-created_at')
-        serializer = ArtifactVersionSerializer(versions, many=True)
-        
-        # Filter by status in Python since it's computed
-        data = serializer.data
-        if status_filter:
-            data = [v for v in data if v['status'] == status_filter]
-        
-        return Response(data)
+        fields, include = sparse_params(request)
+
+        versions = sparse_version_queryset(ArtifactVersion.objects.all(), fields, include).order_by('-created_at')
+
+        # Status is derived from the decision, so filter on the join
+        if status_filter == 'AWAITING_APPROVAL':
+            versions = versions.filter(approval_decision__isnull=True)
+        elif status_filter == 'APPROVED':
+            versions = versions.filter(approval_decision__decision=ApprovalDecision.Decision.APPROVE)
+        elif status_filter == 'REJECTED':
+            versions = versions.filter(approval_decision__decision=ApprovalDecision.Decision.REJECT)
+        elif status_filter:
+            versions = versions.none()
 
+        serializer = ArtifactVersionSerializer(versions, many=True, fields=fields, include=include)
+        return Response(serializer.data)
+
+    @idempotent
     def post(self, request):
         serializer = ArtifactVersionCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -59,16 +150,115 @@ class ArtifactVersionCreateView(APIView):
 
 class ArtifactVersionDetailView(APIView):
     def get(self, request, pk: int):
-        version = get_object_or_404(ArtifactVersion.objects.select_related('approval_decision'), pk=pk)
-        return Response(ArtifactVersionSerializer(version).data)
+        fields, include = sparse_params(request)
+        version = sparse_version_queryset(ArtifactVersion.objects.all(), fields, include).filter(pk=pk).first()
+        if version is None:
+            # Old decided versions live in the archive table under the same id.
+            version = get_object_or_404(
+                sparse_version_queryset(ArchivedArtifactVersion.objects.all(), fields, include), pk=pk
+            )
+        return Response(ArtifactVersionSerializer(version, fields=fields, include=include).data)
+
+
+class ArtifactVersionHistoryView(APIView):
+    """
+    All versions of one artifact, newest version number first.
+
+    Keyset-paginated on ``version_number`` (``?before=<n>&page_size=<k>``) so
+    every page is an index range scan on ``(artifact_id, version_number)``
+    regardless of how deep it is. Archived versions are merged in.
+    Supports ``?fields=`` and ``?include=`` like the other version endpoints.
+    """
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    def get(self, request, pk: int):
+        artifact = get_object_or_404(Artifact, pk=pk)
+        fields, include = sparse_params(request)
+        before = self._int_param(request, 'before', default=None)
+        page_size = min(self._int_param(request, 'page_size', default=self.DEFAULT_PAGE_SIZE), self.MAX_PAGE_SIZE)
+
+        versions = []
+        for model in (ArtifactVersion, ArchivedArtifactVersion):
+            queryset = model.objects.filter(artifact=artifact)
+            if before is not None:
+                queryset = queryset.filter(version_number__lt=before)
+            queryset = sparse_version_queryset(queryset, fields and [*fields, 'version_number'], include)
+            # One extra row tells us whether there is another page.
+            versions.extend(queryset.order_by('-version_number')[:page_size + 1])
+
+        versions.sort(key=lambda version: version.version_number, reverse=True)
+        page, has_more = versions[:page_size], len(versions) > page_size
+
+        next_url = None
+        if has_more:
+            next_url = replace_query_param(request.build_absolute_uri(), 'before', page[-1].version_number)
+        return Response({
+            'artifact': artifact.pk,
+            'next': next_url,
+            'results': ArtifactVersionSerializer(page, many=True, fields=fields, include=include).data,
+        })
+
+    @staticmethod
+    def _int_param(request, name: str, default):
+        raw = request.query_params.get(name)
+        if raw is None:
+            return default
+        if not raw.isdigit() or int(raw) < 1:
+            raise ValidationError({name: 'Must be a positive integer.'})
+        return int(raw)
+
+
+class ProjectSummaryView(APIView):
+    """Version counts per status for a project, read from the status counters."""
+    def get(self, request, pk: int):
+        project = get_object_or_404(Project, pk=pk)
+        counts = counters.summary(project.pk)
+        return Response({
+            'project': project.pk,
+            'name': project.name,
+            'awaiting_approval': counts[counters.Status.AWAITING_APPROVAL],
+            'approved': counts[counters.Status.APPROVED],
+            'rejected': counts[counters.Status.REJECTED],
+            'total': sum(counts.values()),
+        })
+
+
+class PreviewView(APIView):
+    """
+    A preview thumbnail from the preview cache (see ``artifacts/previews.py``).
+
+    Previews are content-addressed, so the file behind a URL never changes
+    and clients and CDNs may keep it for good.
+    """
+    CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+    def get(self, request, digest: str):
+        etag = f'"{digest}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            try:
+                response = FileResponse(previews.get_cache().open(digest), content_type=previews.CONTENT_TYPE)
+            except FileNotFoundError:
+                raise Http404
+        response['ETag'] = etag
+        response['Cache-Control'] = self.CACHE_CONTROL
+        return response
 
 
 class ArtifactVersionApproveView(APIView):
+    @idempotent
     def post(self, request, pk: int):
         return self._decide(request=request, pk=pk, decision=ApprovalDecision.Decision.APPROVE)
 
     def _decide(self, request, pk: int, decision: str):
-        version = get_object_or_404(ArtifactVersion, pk=pk)
+        version = ArtifactVersion.objects.select_related('artifact').filter(pk=pk).first()
+        if version is None:
+            if ArchivedArtifactVersion.objects.filter(pk=pk).exists():
+                # Only decided versions are archived, so this is a finality violation.
+                return Response({'detail': 'A decision already exists for this version.'}, status=status.HTTP_409_CONFLICT)
+            raise Http404
 
         decided_by = request.data.get('decided_by') or ''
         if not decided_by:
@@ -81,13 +271,15 @@ class ArtifactVersionApproveView(APIView):
             if ApprovalDecision.objects.filter(artifact_version=version).exists():
                 return Response({'detail': 'A decision already exists for this version.'}, status=status.HTTP_409_CONFLICT)
 
-            ApprovalDecision.objects.create(
+            approval_decision = ApprovalDecision.objects.create(
                 artifact_version=version,
                 decision=decision,
                 decided_by=decided_by,
                 reason=reason,
                 note=note,
             )
+            ledger.append(approval_decision, version.artifact.project_id)
+            record_decisions([approval_decision])
             # Reload to get the new approval_decision relation
             version.refresh_from_db()
 
@@ -96,5 +288,6 @@ class ArtifactVersionApproveView(APIView):
 
 
 class ArtifactVersionRejectView(ArtifactVersionApproveView):
+    @idempotent
     def post(self, request, pk: int):
         return self._decide(request=request, pk=pk, decision=ApprovalDecision.Decision.REJECT)
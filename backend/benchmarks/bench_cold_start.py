@@ -0,0 +1,120 @@
+"""
+Measure cold-start time of the gunicorn deployment, before and after warm-up.
+
+For each configuration the script starts gunicorn from scratch several times
+and records:
+
+- spawn -> port accepting connections
+- spawn -> first successful GET /api/artifact-versions/ (the cold-start time
+  a user waking the instance actually sees)
+- latency of that first request, and of a second (warm) request
+
+Configurations:
+
+- ``baseline``: stock gunicorn, no preload, no warm-up (empty config file)
+- ``tuned``: the shipped ``gunicorn.conf.py`` (preload + warm-up hooks)
+
+Run from the ``backend`` directory (needs gunicorn; uses a throwaway SQLite
+database unless DATABASE_URL is set):
+
+    python benchmarks/bench_cold_start.py --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, deadline: float):
+    while time.perf_counter() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.005)
+    raise TimeoutError(f'port {port} never opened')
+
+
+def timed_get(url: str) -> float:
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def one_run(config: str, env: dict) -> dict:
+    port = free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn', 'thatfridayfeeling.wsgi',
+        '-c', config, '--bind', f'127.0.0.1:{port}', '--workers', '1',
+    ]
+    spawned = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port, spawned + 60)
+        port_open = time.perf_counter() - spawned
+        url = f'http://127.0.0.1:{port}/api/artifact-versions/'
+        first = timed_get(url)
+        first_response = time.perf_counter() - spawned
+        warm = timed_get(url)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {
+        'port_open': port_open,
+        'first_response': first_response,
+        'first_request': first,
+        'warm_request': warm,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure gunicorn cold-start time.')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tff-coldstart-')
+    env = {**os.environ, 'DEBUG': 'False', 'PYTHONPATH': str(BACKEND)}
+    if 'DATABASE_URL' not in env:
+        env['DATABASE_URL'] = f'sqlite:///{workdir}/bench.sqlite3'
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'], cwd=BACKEND, env=env, check=True
+        )
+
+    empty_config = Path(workdir) / 'empty.conf.py'
+    empty_config.write_text('')
+    configs = {
+        'baseline': str(empty_config),
+        'tuned': str(BACKEND / 'gunicorn.conf.py'),
+    }
+
+    print(f"{'config':<10} {'port open':>10} {'1st resp':>10} {'1st req':>10} {'warm req':>10}   (median ms of {args.runs})")
+    for name, config in configs.items():
+        runs = [one_run(config, env) for _ in range(args.runs)]
+        medians = {
+            key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]
+        }
+        print(
+            f"{name:<10} {medians['port_open']:>10.1f} {medians['first_response']:>10.1f}"
+            f" {medians['first_request']:>10.1f} {medians['warm_request']:>10.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
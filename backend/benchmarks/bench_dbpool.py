@@ -0,0 +1,168 @@
+"""
+Benchmark database connection strategies under concurrent requests.
+
+Compares, against the PostgreSQL database in ``DATABASE_URL``:
+
+- ``connect``: a new connection per request (``DATABASE_CONN_MAX_AGE=0``)
+- ``persistent``: one persistent connection per thread (the default)
+- ``pool``: one shared pool per process (``DATABASE_POOL=True``; needs
+  ``psycopg[binary,pool]``)
+
+Each mode runs in a fresh interpreter. ``--threads`` threads each make
+``--requests`` requests; a request is one query wrapped in Django's
+request_started/request_finished signals, the same as under gunicorn, so
+connections are opened, kept or returned exactly as they would be in
+production. It reports throughput, latency percentiles and the peak number
+of server connections the run held (from ``pg_stat_activity``), plus wait
+times for the pool.
+
+Run from the ``backend`` directory:
+
+    DATABASE_URL=postgres://localhost/tff python benchmarks/bench_dbpool.py
+    DATABASE_URL=... python benchmarks/bench_dbpool.py --threads 32 --pool-size 8 --modes persistent pool
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+APP_NAME = 'tff-bench'
+
+MODES = {
+    'connect': {'DATABASE_POOL': 'False', 'DATABASE_CONN_MAX_AGE': '0'},
+    'persistent': {'DATABASE_POOL': 'False', 'DATABASE_CONN_MAX_AGE': '600'},
+    'pool': {'DATABASE_POOL': 'True'},
+}
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_worker(threads: int, requests: int, query: str) -> dict:
+    """Run one mode in this process (configured by the environment) and return its numbers."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thatfridayfeeling.settings')
+    import django
+
+    django.setup()
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    from thatfridayfeeling.dbpool import close_pools, open_pools, pool_stats
+
+    params = connection.get_connection_params()
+    params['application_name'] = f'{APP_NAME}-monitor'
+    monitor = connection.Database.connect(**params)
+    monitor.autocommit = True
+    peak = [0]
+    done = threading.Event()
+
+    def watch():
+        with monitor.cursor() as cursor:
+            while not done.is_set():
+                cursor.execute('SELECT count(*) FROM pg_stat_activity WHERE application_name = %s', [APP_NAME])
+                peak[0] = max(peak[0], cursor.fetchone()[0])
+                time.sleep(0.005)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        mine = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            request_started.send(sender=None)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(query)
+                    cursor.fetchall()
+            finally:
+                request_finished.send(sender=None)
+            mine.append((time.perf_counter() - started) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+
+    open_pools()
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    watcher.join()
+    monitor.close()
+
+    latencies.sort()
+    result = {
+        'requests_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'max_ms': round(latencies[-1], 3),
+        'peak_server_connections': peak[0],
+    }
+    pools = pool_stats()
+    if pools:
+        stats = pools['default']
+        result.update(
+            pool_wait_ms_avg=stats['wait_ms_avg'],
+            pool_requests_queued=stats['requests_queued'],
+            pool_connections_opened=stats['connections_opened'],
+        )
+    close_pools()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help='Requests per thread.')
+    parser.add_argument('--pool-size', type=int, default=4, help='DATABASE_POOL_MAX_SIZE for the pool mode.')
+    parser.add_argument('--query', default='SELECT 1')
+    parser.add_argument('--worker', choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.threads, args.requests, args.query)))
+        return
+
+    if not os.getenv('DATABASE_URL', '').startswith(('postgres://', 'postgresql://')):
+        sys.exit('Set DATABASE_URL to a PostgreSQL database to run this benchmark.')
+
+    print(f'{args.threads} threads x {args.requests} requests, query {args.query!r}, pool max {args.pool_size}')
+    for mode in args.modes:
+        env = {
+            **os.environ, **MODES[mode], 'PGAPPNAME': APP_NAME,
+            'DATABASE_POOL_MIN_SIZE': str(min(2, args.pool_size)), 'DATABASE_POOL_MAX_SIZE': str(args.pool_size),
+        }
+        completed = subprocess.run(
+            [sys.executable, __file__, '--worker', mode, '--threads', str(args.threads),
+             '--requests', str(args.requests), '--query', args.query],
+            env=env, cwd=BACKEND_DIR, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            print(f'  {mode:<11} failed:\n{completed.stderr.strip()}')
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        line = (
+            f'  {mode:<11} {result["requests_per_s"]:>9,.0f} req/s   p50 {result["p50_ms"]:7.2f}ms   '
+            f'p99 {result["p99_ms"]:7.2f}ms   peak connections {result["peak_server_connections"]:>3}'
+        )
+        if 'pool_wait_ms_avg' in result:
+            line += f'   avg wait {result["pool_wait_ms_avg"]:.2f}ms ({result["pool_requests_queued"]} queued)'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark the link checker's throughput and per-host politeness.
+
+Starts ``--hosts`` local stand-in servers (one port each, so each is a
+separate host to the checker) that answer after ``--latency`` seconds and
+record how many requests they were serving at once. Then checks ``--urls``
+distinct URLs spread across them and reports URLs/minute and the peak
+concurrency any single host saw, which must never exceed ``--per-host``.
+
+Run from the ``backend`` directory:
+
+    python benchmarks/bench_linkcheck.py
+    python benchmarks/bench_linkcheck.py --urls 20000 --hosts 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import http.server
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thatfridayfeeling.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from artifacts.linkcheck import LinkChecker  # noqa: E402
+
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency: float):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.requests = 0
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.requests += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(server.latency)
+            # Every tenth URL is dead, so both outcomes are exercised.
+            self.send_response(404 if self.path.endswith('0') else 200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+async def run_checks(urls, concurrency, per_host, timeout):
+    checker = LinkChecker(concurrency=concurrency, per_host=per_host, timeout=timeout)
+    try:
+        return await checker.check_many(urls)
+    finally:
+        await checker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', type=int, default=5000)
+    parser.add_argument('--hosts', type=int, default=25)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds each stand-in takes to answer.')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    args = parser.parse_args()
+
+    servers = [StandInServer(args.latency) for _ in range(args.hosts)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [
+        f'http://127.0.0.1:{servers[i % args.hosts].server_address[1]}/projects/{i}'
+        for i in range(args.urls)
+    ]
+
+    started = time.perf_counter()
+    results = asyncio.run(run_checks(urls, args.concurrency, args.per_host, args.timeout))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for result in results.values():
+        statuses[result.status] = statuses.get(result.status, 0) + 1
+    peak = max(server.peak for server in servers)
+    print(f'{len(urls)} URLs on {args.hosts} hosts, {args.latency * 1000:.0f}ms per response')
+    print(f'  elapsed          {elapsed:.2f}s')
+    print(f'  throughput       {len(urls) / elapsed * 60:,.0f} URLs/min')
+    print(f'  results          {", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))}')
+    print(f'  peak per host    {peak} in flight (limit {args.per_host})')
+    print(f'  requests served  {sum(server.requests for server in servers)}')
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    if peak > args.per_host:
+        sys.exit('per-host limit exceeded')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark preview rendering in-process versus on a process pool.
+
+Generates ``--images`` distinct screenshot-sized sources (half PNG, half
+JPEG, ``--width`` x ``--height``), then renders them to thumbnails the way
+``generate_pending_previews`` does, first one at a time in this process and
+then on a pool of ``--workers`` processes. Reports images/second for each
+and the average source and thumbnail sizes.
+
+Run from the ``backend`` directory:
+
+    python benchmarks/bench_previews.py
+    python benchmarks/bench_previews.py --images 200 --workers 8
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from artifacts.thumbnails import render_thumbnail  # noqa: E402
+
+
+def build_sources(count: int, size: tuple) -> list:
+    sources = []
+    for i in range(count):
+        image = Image.new('RGB', size, (i * 37 % 256, i * 91 % 256, i * 53 % 256))
+        draw = ImageDraw.Draw(image)
+        # Some structure so the encoders have real work to do.
+        for row in range(0, size[1], 40):
+            draw.rectangle([40, row, size[0] - 40, row + 18], fill=((row + i) % 256, 200, 120))
+        output = io.BytesIO()
+        image.save(output, 'PNG' if i % 2 else 'JPEG', **({} if i % 2 else {'quality': 90}))
+        sources.append(output.getvalue())
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=60)
+    parser.add_argument('--width', type=int, default=2880)
+    parser.add_argument('--height', type=int, default=1800)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    sources = build_sources(args.images, (args.width, args.height))
+    render = partial(render_thumbnail, size=(640, 400), quality=80)
+
+    started = time.perf_counter()
+    thumbnails = [render(source) for source in sources]
+    serial = time.perf_counter() - started
+
+    with ProcessPoolExecutor(args.workers) as pool:
+        # Start the workers before timing, as the pipeline reuses its pool.
+        list(pool.map(render, sources[:args.workers]))
+        started = time.perf_counter()
+        list(pool.map(render, sources))
+        pooled = time.perf_counter() - started
+
+    print(f'{args.images} sources at {args.width}x{args.height}, {os.cpu_count()} CPUs')
+    print(f'  source size      {sum(map(len, sources)) / len(sources) / 1024:,.0f} KiB avg')
+    print(f'  thumbnail size   {sum(map(len, thumbnails)) / len(thumbnails) / 1024:,.1f} KiB avg')
+    print(f'  in-process       {args.images / serial:,.1f} images/s')
+    print(f'  {args.workers} workers        {args.images / pooled:,.1f} images/s ({serial / pooled:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark the per-request cost of rate limiting and load shedding.
+
+Times, against the configured ``RATE_LIMIT_CACHE`` (local memory by default;
+set ``REDIS_URL`` to measure a shared Redis):
+
+- ``TokenBucket.take`` for granted and for refused requests
+- one ``InFlightCounter`` enter/leave pair
+- a full write through the Django test client with both features off and on
+  (the difference is the end-to-end overhead; the write is refused by a
+  validation error before touching the database)
+
+Run from the ``backend`` directory:
+
+    python benchmarks/bench_ratelimit.py
+    python benchmarks/bench_ratelimit.py --iterations 20000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thatfridayfeeling.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from thatfridayfeeling.throttling import InFlightCounter, TokenBucket  # noqa: E402
+
+
+def time_calls(fn, iterations: int) -> list:
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f'  {label:<34} mean {statistics.fmean(samples):8.1f}us   p99 {p99:8.1f}us')
+
+
+def request_samples(iterations: int, enabled: bool) -> list:
+    with override_settings(
+        RATE_LIMITING_ENABLED=enabled,
+        LOAD_SHEDDING_ENABLED=enabled,
+        WRITE_RATE_LIMITS={'default': (1e9, 10**6)},
+        LOAD_SHED_MAX_IN_FLIGHT=10**6,
+        ALLOWED_HOSTS=['*'],
+    ):
+        client = Client()
+        # An empty body fails validation before any query is made.
+        return time_calls(
+            lambda i: client.post('/api/artifacts/', {}, content_type='application/json', REMOTE_ADDR=f'10.0.{i % 200}.1'),
+            iterations,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    # Every benchmarked write is a 400; don't log each one.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    cache = caches[settings.RATE_LIMIT_CACHE]
+    cache.clear()
+    print(f'{args.iterations} iterations, cache backend {cache.__class__.__name__}')
+
+    granted = TokenBucket(per_minute=1e9, burst=10**6)
+    report('TokenBucket.take (granted)', time_calls(lambda i: granted.take(f'client-{i % 1000}'), args.iterations))
+    refused = TokenBucket(per_minute=1, burst=1)
+    refused.take('flooder')
+    report('TokenBucket.take (refused)', time_calls(lambda i: refused.take('flooder'), args.iterations))
+
+    counter = InFlightCounter(window=30)
+    report('InFlightCounter enter + leave', time_calls(lambda i: counter.leave(counter.enter()[0]), args.iterations))
+
+    request_samples(200, enabled=True)  # warm up URL resolution and serializers
+    off = request_samples(args.iterations, enabled=False)
+    on = request_samples(args.iterations, enabled=True)
+    report('write request, limits off', off)
+    report('write request, limits on', on)
+    overhead = statistics.median(on) - statistics.median(off)
+    print(f'  {"overhead per request (median)":<34} {overhead:8.1f}us')
+    cache.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark JSON rendering and bytes on the wire for the version list payload.
+
+Builds synthetic rows shaped exactly like ``ArtifactVersionSerializer`` output
+(half of them decided) and reports, for 1k/10k/100k rows:
+
+- render time with DRF's stock ``JSONRenderer`` vs ``ORJSONRenderer``
+- raw body size and the size under each available content-coding
+
+Run from the ``backend`` directory:
+
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --rows 1000 10000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thatfridayfeeling.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from thatfridayfeeling.middleware import available_encodings  # noqa: E402
+from thatfridayfeeling.renderers import ORJSONRenderer, orjson  # noqa: E402
+
+
+def build_rows(count: int) -> list:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        created = (start + timedelta(minutes=i)).isoformat().replace('+00:00', 'Z')
+        decision = None
+        status = 'AWAITING_APPROVAL'
+        if i % 2:
+            approved = i % 4 == 1
+            status = 'APPROVED' if approved else 'REJECTED'
+            decision = {
+                'decision': 'APPROVE' if approved else 'REJECT',
+                'reason': '' if approved else 'Needs revision',
+                'note': '',
+                'decided_by': 'client@example.com',
+                'decided_at': created,
+            }
+        rows.append({
+            'id': i + 1,
+            'artifact': i // 10 + 1,
+            'version_number': i % 10 + 1,
+            'url': f'https://staging.example-agency.com/projects/acme/homepage/v{i % 10 + 1}',
+            'submitted_by': 'designer@agency.com',
+            'link_health': {'status': 'OK', 'checked_at': created},
+            'preview_url': f'/api/previews/{i:064x}.webp',
+            'status': status,
+            'created_at': created,
+            'updated_at': created,
+            'decision': decision,
+        })
+    return rows
+
+
+def time_render(renderer, rows, repeat: int) -> tuple:
+    best = float('inf')
+    body = b''
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = renderer.render(rows, 'application/json', {})
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    encoders = available_encodings()
+    print(f"orjson: {'yes' if orjson else 'no (fallback)'}; encodings: {', '.join(encoders)}")
+    print()
+
+    header = f"{'rows':>8}  {'drf ms':>9}  {'orjson ms':>9}  {'speedup':>7}  {'raw KiB':>9}"
+    header += ''.join(f"  {name + ' KiB':>9}  {name + ' ms':>8}" for name in encoders)
+    print(header)
+
+    for count in args.rows:
+        rows = build_rows(count)
+        drf_time, _ = time_render(JSONRenderer(), rows, args.repeat)
+        fast_time, fast_body = time_render(ORJSONRenderer(), rows, args.repeat)
+
+        line = (
+            f"{count:>8}  {drf_time * 1000:>9.1f}  {fast_time * 1000:>9.1f}"
+            f"  {drf_time / fast_time:>6.1f}x  {len(fast_body) / 1024:>9.1f}"
+        )
+        for compress, _ in encoders.values():
+            started = time.perf_counter()
+            compressed = compress(fast_body)
+            elapsed = time.perf_counter() - started
+            line += f"  {len(compressed) / 1024:>9.1f}  {elapsed * 1000:>8.1f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
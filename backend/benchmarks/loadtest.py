@@ -0,0 +1,381 @@
+"""
+Multi-client load generator for a running ThatFridayFeeling backend.
+
+Models the real traffic mix with asyncio virtual users, each holding its own
+keep-alive connection like a browser tab does:
+
+- pollers: ApprovalListPage tabs fetching the version list every few seconds
+- agencies: create an artifact, then submit one or more versions of it
+- clients: pick a pending version, open it, approve or reject it, and now
+  and then decide it a second time on purpose (which must return 409)
+
+Each stage runs for ``--duration`` seconds with the user counts multiplied by
+that stage's scale factor, so stepping through ``--stages 1,2,4,8`` shows the
+concurrency at which throughput stops rising and latency climbs. Results are
+reported per endpoint: throughput, p50/p90/p99/max latency and error rate.
+
+Start a server first (runserver, gunicorn or uvicorn), then from ``backend/``:
+
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:8000 \\
+        --pollers 20 --agencies 2 --clients 5 --duration 30 --stages 1,2,4
+
+Only the standard library is used, so it runs anywhere the backend does.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import ssl
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+# ---------------------------------------------------------------------------
+# Minimal asyncio HTTP/1.1 client
+# ---------------------------------------------------------------------------
+
+class HttpError(Exception):
+    """The connection failed or the response could not be parsed."""
+
+
+class HttpConnection:
+    """One keep-alive connection, reopened transparently when the server drops it."""
+
+    def __init__(self, base_url: str, compression: bool = True, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.host_header = parts.netloc
+        self.compression = compression
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, payload=None, headers=None):
+        """Send a request and return ``(status, parsed JSON or None)``."""
+        body = b'' if payload is None else json.dumps(payload).encode()
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host_header}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+            f'Content-Length: {len(body)}',
+        ]
+        if self.compression:
+            lines.append('Accept-Encoding: gzip')
+        if payload is not None:
+            lines.append('Content-Type: application/json')
+        for name, value in (headers or {}).items():
+            lines.append(f'{name}: {value}')
+        raw = ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+        # A reused connection may have been closed by the server while idle;
+        # retry once on a fresh one (writes carry an Idempotency-Key).
+        for attempt in (1, 2):
+            reused = self.writer is not None
+            try:
+                if self.writer is None:
+                    self.reader, self.writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout
+                    )
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await asyncio.wait_for(self._read_response(), self.timeout)
+            except (ConnectionError, OSError, asyncio.IncompleteReadError, HttpError) as exc:
+                await self.close()
+                if attempt == 2 or not reused:
+                    raise HttpError(str(exc) or exc.__class__.__name__) from exc
+            except asyncio.TimeoutError as exc:
+                await self.close()
+                raise HttpError('timeout') from exc
+
+    async def _read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError('connection closed')
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f'bad status line: {status_line!r}')
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        if headers.get('content-encoding') == 'gzip':
+            body = gzip.decompress(body)
+
+        data = None
+        if body and headers.get('content-type', '').startswith('application/json'):
+            data = json.loads(body)
+        return status, data
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+@dataclass
+class EndpointStats:
+    latencies: list = field(default_factory=list)
+    statuses: dict = field(default_factory=lambda: defaultdict(int))
+    errors: int = 0
+    expected_conflicts: int = 0
+
+
+class Metrics:
+    def __init__(self):
+        self.endpoints = defaultdict(EndpointStats)
+        self.started = time.perf_counter()
+        self.stopped = None
+
+    def record(self, endpoint: str, status, latency: float, ok: bool, expected_conflict: bool = False):
+        stats = self.endpoints[endpoint]
+        stats.latencies.append(latency)
+        stats.statuses[status] += 1
+        if not ok:
+            stats.errors += 1
+        if expected_conflict:
+            stats.expected_conflicts += 1
+
+    def report(self) -> dict:
+        elapsed = (self.stopped or time.perf_counter()) - self.started
+        result = {}
+        for endpoint, stats in sorted(self.endpoints.items()):
+            latencies = sorted(stats.latencies)
+            count = len(latencies)
+            result[endpoint] = {
+                'requests': count,
+                'rps': round(count / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(_percentile(latencies, 0.50) * 1000, 1),
+                'p90_ms': round(_percentile(latencies, 0.90) * 1000, 1),
+                'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+                'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0,
+                'error_rate': round(stats.errors / count, 4) if count else 0.0,
+                'expected_409': stats.expected_conflicts,
+                'statuses': dict(stats.statuses),
+            }
+        return result
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[max(0, min(98, round(q * 100) - 1))]
+
+
+# ---------------------------------------------------------------------------
+# Virtual users
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Scenario:
+    base_url: str
+    poll_interval: float = 4.0
+    think_time: float = 1.0
+    double_decide_rate: float = 0.1
+    compression: bool = True
+
+
+async def _call(connection, metrics, endpoint, method, path, payload=None, ok_statuses=(200,), headers=None):
+    started = time.perf_counter()
+    try:
+        status, data = await connection.request(method, path, payload, headers)
+    except HttpError:
+        metrics.record(endpoint, 'error', time.perf_counter() - started, ok=False)
+        return None, None
+    metrics.record(endpoint, status, time.perf_counter() - started, ok=status in ok_statuses)
+    return status, data
+
+
+async def poller(scenario: Scenario, metrics: Metrics, stop: asyncio.Event):
+    """An open ApprovalListPage tab."""
+    connection = HttpConnection(scenario.base_url, scenario.compression)
+    # Tabs are opened at different moments, not in lockstep.
+    await _sleep_or_stop(stop, random.uniform(0, scenario.poll_interval))
+    while not stop.is_set():
+        await _call(connection, metrics, 'GET /api/artifact-versions/', 'GET', '/api/artifact-versions/')
+        await _sleep_or_stop(stop, scenario.poll_interval)
+    await connection.close()
+
+
+async def agency(scenario: Scenario, metrics: Metrics, stop: asyncio.Event):
+    """An agency user creating artifacts and submitting versions."""
+    connection = HttpConnection(scenario.base_url, scenario.compression)
+    while not stop.is_set():
+        status, artifact = await _call(
+            connection, metrics, 'POST /api/artifacts/', 'POST', '/api/artifacts/',
+            {'name': f'Load test {uuid.uuid4().hex[:8]}', 'artifact_type': 'Design'},
+            ok_statuses=(201,), headers={'Idempotency-Key': str(uuid.uuid4())},
+        )
+        if status == 201:
+            for _ in range(random.randint(1, 3)):
+                await _call(
+                    connection, metrics, 'POST /api/artifact-versions/', 'POST', '/api/artifact-versions/',
+                    {'artifact': artifact['id'], 'url': f'https://staging.example.com/{uuid.uuid4().hex}',
+                     'submitted_by': 'loadtest@agency.example'},
+                    ok_statuses=(201,), headers={'Idempotency-Key': str(uuid.uuid4())},
+                )
+        await _sleep_or_stop(stop, random.expovariate(1 / scenario.think_time))
+    await connection.close()
+
+
+async def client(scenario: Scenario, metrics: Metrics, stop: asyncio.Event):
+    """A client user reviewing and deciding pending versions."""
+    connection = HttpConnection(scenario.base_url, scenario.compression)
+    while not stop.is_set():
+        status, pending = await _call(
+            connection, metrics, 'GET /api/artifact-versions/?status=AWAITING_APPROVAL', 'GET',
+            '/api/artifact-versions/?status=AWAITING_APPROVAL&fields=id',
+        )
+        if status == 200 and pending:
+            version_id = random.choice(pending)['id']
+            await _call(
+                connection, metrics, 'GET /api/artifact-versions/{id}/', 'GET',
+                f'/api/artifact-versions/{version_id}/?include=artifact,project',
+            )
+            action = random.choice(('approve', 'reject'))
+            payload = {'decided_by': 'loadtest@client.example', 'reason': 'Load test' if action == 'reject' else ''}
+            endpoint = f'POST /api/artifact-versions/{{id}}/{action}/'
+            path = f'/api/artifact-versions/{version_id}/{action}/'
+            # Another client may have decided it first; 409 is a correct answer.
+            status, _ = await _call(
+                connection, metrics, endpoint, 'POST', path, payload, ok_statuses=(200, 409),
+                headers={'Idempotency-Key': str(uuid.uuid4())},
+            )
+            if status == 200 and random.random() < scenario.double_decide_rate:
+                started = time.perf_counter()
+                try:
+                    second, _ = await connection.request(
+                        'POST', path, payload, {'Idempotency-Key': str(uuid.uuid4())}
+                    )
+                except HttpError:
+                    metrics.record(endpoint, 'error', time.perf_counter() - started, ok=False)
+                else:
+                    metrics.record(
+                        endpoint, second, time.perf_counter() - started,
+                        ok=second == 409, expected_conflict=second == 409,
+                    )
+        await _sleep_or_stop(stop, random.expovariate(1 / scenario.think_time))
+    await connection.close()
+
+
+async def _sleep_or_stop(stop: asyncio.Event, seconds: float):
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def run_stage(scenario: Scenario, pollers: int, agencies: int, clients: int, duration: float) -> Metrics:
+    """Run one load stage and return its metrics."""
+    metrics = Metrics()
+    stop = asyncio.Event()
+    tasks = (
+        [asyncio.create_task(poller(scenario, metrics, stop)) for _ in range(pollers)]
+        + [asyncio.create_task(agency(scenario, metrics, stop)) for _ in range(agencies)]
+        + [asyncio.create_task(client(scenario, metrics, stop)) for _ in range(clients)]
+    )
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    metrics.stopped = time.perf_counter()
+    return metrics
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def print_report(title: str, report: dict):
+    print(f'\n== {title}')
+    print(f"{'endpoint':<58} {'req':>6} {'rps':>7} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7} {'err%':>6} {'409ok':>5}")
+    total = errors = 0
+    for endpoint, row in report.items():
+        total += row['requests']
+        errors += round(row['error_rate'] * row['requests'])
+        print(
+            f"{endpoint:<58} {row['requests']:>6} {row['rps']:>7.1f} {row['p50_ms']:>7.1f}"
+            f" {row['p90_ms']:>7.1f} {row['p99_ms']:>7.1f} {row['max_ms']:>7.1f}"
+            f" {row['error_rate'] * 100:>5.1f}% {row['expected_409']:>5}"
+        )
+    print(f"{'total':<58} {total:>6}   errors: {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test a running ThatFridayFeeling backend.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--pollers', type=int, default=20, help='Open dashboard tabs (default: 20).')
+    parser.add_argument('--agencies', type=int, default=2, help='Agency users submitting work (default: 2).')
+    parser.add_argument('--clients', type=int, default=5, help='Client users deciding (default: 5).')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds per stage (default: 30).')
+    parser.add_argument('--stages', default='1', help='Comma-separated user multipliers, e.g. 1,2,4,8.')
+    parser.add_argument('--poll-interval', type=float, default=4.0)
+    parser.add_argument('--think-time', type=float, default=1.0, help='Mean pause between user actions.')
+    parser.add_argument('--double-decide-rate', type=float, default=0.1)
+    parser.add_argument('--no-compression', action='store_true', help='Do not send Accept-Encoding: gzip.')
+    parser.add_argument('--json', help='Also write the per-stage reports to this file.')
+    args = parser.parse_args()
+
+    scenario = Scenario(
+        base_url=args.base_url.rstrip('/'),
+        poll_interval=args.poll_interval,
+        think_time=args.think_time,
+        double_decide_rate=args.double_decide_rate,
+        compression=not args.no_compression,
+    )
+
+    results = {}
+    for scale in (float(value) for value in args.stages.split(',')):
+        counts = [max(0, round(n * scale)) for n in (args.pollers, args.agencies, args.clients)]
+        metrics = asyncio.run(run_stage(scenario, *counts, duration=args.duration))
+        title = f'stage x{scale:g}: {counts[0]} pollers, {counts[1]} agencies, {counts[2]} clients'
+        results[title] = metrics.report()
+        print_report(title, results[title])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for ThatFridayFeeling.
+
+Gunicorn picks this file up automatically when started from ``backend/``:
+
+    gunicorn thatfridayfeeling.wsgi
+
+The app is preloaded in the master so Django setup, app imports, URL resolver
+compilation and serializer field building happen once and are shared with
+every worker by fork. Each worker then opens its database connection before
+it accepts its first request. See ``thatfridayfeeling/startup.py``.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = 5
+accesslog = '-'
+
+# Load the application before forking workers.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded (with preload_app) and before
+    # workers are forked. Connections must not be opened here: a socket
+    # inherited across fork would be shared by every worker.
+    if not server.cfg.preload_app:
+        return
+    from thatfridayfeeling.startup import warm_up
+
+    warm_up(connect=False)
+    server.log.info('Warmed URL resolver and serializers in master')
+
+
+def post_worker_init(worker):
+    # Runs in each worker before it starts accepting requests.
+    from thatfridayfeeling.startup import warm_up
+
+    warm_up(connect=True)
+    worker.log.info('Worker %s warmed and connected', worker.pid)
+
+
+def worker_exit(server, worker):
+    # Close pooled database connections cleanly instead of dropping them.
+    from thatfridayfeeling.dbpool import close_pools
+
+    close_pools()
@@ -0,0 +1,72 @@
+"""
+Minimal SVG flame graph renderer for collapsed stacks.
+
+Draws an icicle chart (callers on top, callees below) with a tooltip per
+frame, enough to read a single request profile in the admin without
+external tools. For anything fancier, download the ``.collapsed`` file and
+open it in speedscope or flamegraph.pl.
+"""
+import zlib
+from html import escape
+
+
+WIDTH = 1200
+ROW_HEIGHT = 17
+MIN_WIDTH = 0.5  # Frames narrower than this many pixels are not drawn.
+
+
+def _tree(stacks: dict) -> dict:
+    root = {'name': 'all', 'value': 0, 'children': {}}
+    for stack, weight in stacks.items():
+        root['value'] += weight
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'name': name, 'value': 0, 'children': {}})
+            node['value'] += weight
+    return root
+
+
+def _colour(name: str) -> str:
+    # Stable warm colours so a frame keeps its colour across profiles.
+    h = zlib.crc32(name.encode())
+    return f'rgb({205 + h % 50},{(h >> 8) % 180},{(h >> 16) % 55})'
+
+
+def render_svg(stacks: dict, unit: str = 'samples') -> str:
+    """Render ``{'a;b;c': weight}`` stacks as a standalone SVG document."""
+    root = _tree(stacks)
+    total = root['value'] or 1
+    scale = WIDTH / total
+    rects = []
+    depth = 0
+
+    def draw(node, x, level):
+        nonlocal depth
+        width = node['value'] * scale
+        if width < MIN_WIDTH:
+            return
+        depth = max(depth, level)
+        y = level * ROW_HEIGHT
+        name = escape(node['name'])
+        title = f'{name} ({node["value"]} {unit}, {node["value"] * 100 / total:.1f}%)'
+        label = name if width > 40 else ''
+        if label and len(label) * 7 > width:
+            label = label[:max(0, int(width / 7) - 2)] + '..'
+        rects.append(
+            f'<g><title>{title}</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{ROW_HEIGHT - 1}" fill="{_colour(node["name"])}"/>'
+            f'<text x="{x + 3:.1f}" y="{y + ROW_HEIGHT - 5}">{label}</text></g>'
+        )
+        child_x = x
+        for child in sorted(node['children'].values(), key=lambda n: n['name']):
+            draw(child, child_x, level + 1)
+            child_x += child['value'] * scale
+
+    draw(root, 0.0, 0)
+    height = (depth + 1) * ROW_HEIGHT
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+        f'viewBox="0 0 {WIDTH} {height}" font-family="monospace" font-size="11">'
+        + ''.join(rects)
+        + '</svg>'
+    )
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from profiling.middleware import make_token
+from profiling.profilers import PROFILERS
+
+
+class Command(BaseCommand):
+    help = 'Print a signed X-Profile header value that profiles the requests carrying it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=sorted(PROFILERS), default='sample',
+                            help='sample (statistical, low overhead) or trace (deterministic, slow).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token(options['mode']))
+        self.stderr.write(f'Valid for {settings.PROFILING_TOKEN_MAX_AGE} seconds. Send it as: X-Profile: <token>')
@@ -0,0 +1,144 @@
+"""
+On-demand request profiling.
+
+``ProfilingMiddleware`` profiles a request when one of these is true:
+
+- it carries an ``X-Profile`` header holding a token from
+  ``manage.py profile_token`` (signed with ``SECRET_KEY``; expires)
+- the admin toggle at ``/admin/profiles/`` is on, for its sample rate
+- ``PROFILING_SAMPLE_RATE`` is above zero, for that fraction of requests
+
+The view and every middleware below this one run under the chosen profiler
+and the SQL of every query is logged. Both are saved under ``PROFILING_DIR``
+(see ``profiling.storage``), and the response gets an ``X-Profile-Id`` header.
+
+With ``PROFILING_ENABLED`` off the middleware raises ``MiddlewareNotUsed``,
+so Django drops it from the chain and unprofiled requests pay nothing.
+"""
+import random
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import storage
+from .profilers import PROFILERS
+
+
+TOKEN_SALT = 'profiling.token'
+TOGGLE_REFRESH = 1.0  # Seconds between re-reads of the admin toggle file.
+
+
+def make_token(mode: str = 'sample') -> str:
+    """A signed ``X-Profile`` header value."""
+    return signing.dumps({'mode': mode}, salt=TOKEN_SALT)
+
+
+def read_token(token: str):
+    """The profiler mode a token asks for, or ``None`` if it is invalid or expired."""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    mode = payload.get('mode') if isinstance(payload, dict) else None
+    return mode if mode in PROFILERS else None
+
+
+class QueryLog:
+    """``execute_wrapper`` recording each statement and how long it took."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'many': many,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.default_mode = settings.PROFILING_MODE
+        self.excluded = tuple(settings.PROFILING_EXCLUDE)
+        self._toggle = {'until': 0, 'sample_rate': 0.0}
+        self._toggle_checked = 0.0
+
+    def __call__(self, request):
+        trigger, mode = self._should_profile(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self._profile(request, trigger, mode)
+
+    def _should_profile(self, request):
+        token = request.META.get('HTTP_X_PROFILE')
+        if token:
+            mode = read_token(token)
+            if mode:
+                return 'header', mode
+
+        if request.path.startswith(self.excluded):
+            return None, None
+
+        now = time.monotonic()
+        if now - self._toggle_checked > TOGGLE_REFRESH:
+            self._toggle = storage.read_toggle()
+            self._toggle_checked = now
+        if self._toggle['until'] > time.time() and random.random() < self._toggle['sample_rate']:
+            return 'admin', self.default_mode
+
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled', self.default_mode
+        return None, None
+
+    def _profile(self, request, trigger, mode):
+        profiler = PROFILERS[mode](**({'interval': settings.PROFILING_INTERVAL} if mode == 'sample' else {}))
+        query_log = QueryLog()
+        started_at = datetime.now(timezone.utc)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_log))
+            started = time.perf_counter()
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+            duration = time.perf_counter() - started
+
+        profile_id = storage.new_profile_id()
+        storage.save_profile(
+            profile_id,
+            {
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'started_at': started_at.isoformat(),
+                'duration_ms': round(duration * 1000, 2),
+                'mode': mode,
+                'unit': profiler.unit,
+                'trigger': trigger,
+                'weight': sum(profiler.stacks.values()),
+                'sql_count': len(query_log.queries),
+                'sql_ms': round(sum(q['ms'] for q in query_log.queries), 2),
+            },
+            profiler.stacks,
+            query_log.queries,
+        )
+        response.headers['X-Profile-Id'] = profile_id
+        return response
@@ -0,0 +1,129 @@
+"""
+Per-request profilers producing collapsed stacks.
+
+Both profilers record ``{'outer;...;inner': weight}`` counters, the collapsed
+format read by flamegraph.pl, speedscope and ``profiling.flamegraph``:
+
+- ``StackSampler`` (statistical): a helper thread snapshots the request
+  thread's stack every ``interval`` seconds. Low overhead; weights are
+  sample counts, so very short requests may record only a few samples.
+- ``TraceProfiler`` (deterministic): ``sys.setprofile`` on the request
+  thread times every Python and C call. Exact, but slows the request down
+  several times over; weights are microseconds of self time.
+
+Stacks are rooted at the frame that started the profiler, so server and
+middleware frames above the profiling hook are left out.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+
+_labels = {}
+
+
+def frame_label(code) -> str:
+    """``path/to/module.py:Class.method`` for a code object, cached per code object."""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if 'site-packages' + os.sep in filename:
+            filename = filename.rsplit('site-packages' + os.sep, 1)[1]
+        elif filename.startswith(str(settings.BASE_DIR)):
+            filename = os.path.relpath(filename, settings.BASE_DIR)
+        else:
+            filename = os.path.basename(filename)
+        name = getattr(code, 'co_qualname', code.co_name)
+        # ';' separates frames in the collapsed format.
+        label = _labels[code] = f'{filename}:{name}'.replace(';', ',').replace(' ', '_')
+    return label
+
+
+class StackSampler:
+    unit = 'samples'
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        # Frames at or above the caller are the server's, not the request's.
+        self._root = sys._getframe(1)
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            labels = []
+            while frame is not None and frame is not self._root:
+                labels.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if frame is not None and labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+
+class TraceProfiler:
+    unit = 'us'
+
+    def __init__(self):
+        self.stacks = Counter()
+        # Stacks are interned as a trie while tracing: node id -> (parent id,
+        # label). Building the ';'-joined path on every call would cost time
+        # and memory proportional to the stack depth.
+        self._nodes = {}
+        self._keys = []
+        self._weights = Counter()
+        # One entry per open call: [node id, started, time spent in children].
+        self._open = []
+
+    def start(self):
+        self._previous = sys.getprofile()
+        sys.setprofile(self._event)
+
+    def stop(self):
+        sys.setprofile(self._previous)
+        self._open.clear()
+        paths = []
+        for parent, label in self._keys:
+            paths.append(label if parent < 0 else f'{paths[parent]};{label}')
+        for node, weight in self._weights.items():
+            self.stacks[paths[node]] += weight
+
+    def _event(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == 'call' or event == 'c_call':
+            if event == 'call':
+                label = frame_label(frame.f_code)
+            else:
+                label = f'<builtin>:{getattr(arg, "__qualname__", repr(arg))}'.replace(';', ',').replace(' ', '_')
+            key = (self._open[-1][0] if self._open else -1, label)
+            node = self._nodes.get(key)
+            if node is None:
+                node = self._nodes[key] = len(self._keys)
+                self._keys.append(key)
+            self._open.append([node, now, 0.0])
+        elif self._open:
+            # Returns from frames entered before start() have no open entry.
+            node, started, children = self._open.pop()
+            elapsed = now - started
+            self._weights[node] += max(0, round((elapsed - children) * 1_000_000))
+            if self._open:
+                self._open[-1][2] += elapsed
+
+
+PROFILERS = {
+    'sample': StackSampler,
+    'trace': TraceProfiler,
+}
@@ -0,0 +1,144 @@
+"""
+Local-directory storage for request profiles and the admin toggle.
+
+Each profile is two files in ``PROFILING_DIR``:
+
+- ``<id>.json``: request metadata and the SQL log
+- ``<id>.collapsed.gz``: one ``stack weight`` line per distinct stack, gzipped
+  (deep stacks repeat long prefixes and compress very well)
+
+Ids start with a UTC timestamp, so name order is age order. After every write
+the oldest profiles are deleted until the directory is back under
+``PROFILING_MAX_BYTES`` (the profile just written is always kept). The
+directory is shared by every worker on the host; concurrent writers and
+deleters only ever race on whole files.
+"""
+import gzip
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+
+TOGGLE_FILE = 'toggle.json'
+COLLAPSED = '.collapsed.gz'
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILING_DIR)
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def new_profile_id() -> str:
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f') + '-' + uuid.uuid4().hex[:6]
+
+
+def save_profile(profile_id: str, meta: dict, stacks: dict, queries: list):
+    """Write one profile and rotate the directory."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    collapsed = ''.join(f'{stack} {weight}\n' for stack, weight in sorted(stacks.items()))
+    _write_atomic(directory / f'{profile_id}{COLLAPSED}', gzip.compress(collapsed.encode(), compresslevel=6))
+    _write_atomic(directory / f'{profile_id}.json', json.dumps({**meta, 'id': profile_id, 'queries': queries}).encode())
+    rotate(directory, settings.PROFILING_MAX_BYTES, keep=profile_id)
+
+
+def rotate(directory: Path, max_bytes: int, keep: str = None) -> int:
+    """Delete the oldest profiles (except ``keep``) until the directory fits in ``max_bytes``."""
+    sizes = {}
+    for entry in os.scandir(directory):
+        if entry.name.endswith(('.json', COLLAPSED)) and entry.name != TOGGLE_FILE:
+            try:
+                profile_id = entry.name.split('.', 1)[0]
+                sizes[profile_id] = sizes.get(profile_id, 0) + entry.stat().st_size
+            except FileNotFoundError:
+                continue
+
+    total = sum(sizes.values())
+    deleted = 0
+    for profile_id in sorted(sizes):
+        if total <= max_bytes:
+            break
+        if profile_id == keep:
+            continue
+        for suffix in ('.json', COLLAPSED):
+            try:
+                (directory / f'{profile_id}{suffix}').unlink()
+            except FileNotFoundError:
+                pass
+        total -= sizes[profile_id]
+        deleted += 1
+    return deleted
+
+
+def list_profiles(limit: int = 100) -> list:
+    """Metadata of the newest profiles, newest first (without the SQL log)."""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    names = sorted(
+        (name for name in os.listdir(directory) if name.endswith('.json') and name != TOGGLE_FILE),
+        reverse=True,
+    )
+    profiles = []
+    for name in names[:limit]:
+        try:
+            meta = json.loads((directory / name).read_text())
+        except (FileNotFoundError, ValueError):
+            continue
+        meta.pop('queries', None)
+        profiles.append(meta)
+    return profiles
+
+
+def _safe_path(profile_id: str, suffix: str) -> Path:
+    # Ids come from URLs; never let one escape the profile directory.
+    if not profile_id or os.sep in profile_id or profile_id.startswith('.'):
+        raise FileNotFoundError(profile_id)
+    return profile_dir() / f'{profile_id}{suffix}'
+
+
+def load_profile(profile_id: str):
+    """Return ``(meta, stacks)`` for one profile; raises ``FileNotFoundError``."""
+    meta = json.loads(_safe_path(profile_id, '.json').read_text())
+    return meta, parse_collapsed(read_collapsed(profile_id))
+
+
+def read_collapsed(profile_id: str) -> str:
+    return gzip.decompress(_safe_path(profile_id, COLLAPSED).read_bytes()).decode()
+
+
+def parse_collapsed(text: str) -> dict:
+    stacks = {}
+    for line in text.splitlines():
+        stack, _, weight = line.rpartition(' ')
+        if stack:
+            stacks[stack] = stacks.get(stack, 0) + int(weight)
+    return stacks
+
+
+def read_toggle() -> dict:
+    """The admin toggle: ``{'until': epoch seconds, 'sample_rate': 0..1}``."""
+    try:
+        toggle = json.loads((profile_dir() / TOGGLE_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return {'until': 0, 'sample_rate': 0.0}
+    if toggle.get('until', 0) <= time.time():
+        return {'until': 0, 'sample_rate': 0.0}
+    return toggle
+
+
+def write_toggle(minutes: float, sample_rate: float):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    until = time.time() + minutes * 60 if minutes > 0 else 0
+    _write_atomic(directory / TOGGLE_FILE, json.dumps({'until': until, 'sample_rate': sample_rate}).encode())
@@ -0,0 +1,134 @@
+"""
+Tests for on-demand request profiling.
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from artifacts.models import Artifact, ArtifactVersion, Project
+from profiling import storage
+from profiling.flamegraph import render_svg
+from profiling.middleware import ProfilingMiddleware, make_token
+
+
+class ProfilingTestMixin:
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        overrides = override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class ProfilingMiddlewareTest(ProfilingTestMixin, APITestCase):
+    """Test when requests are profiled and what gets stored."""
+
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(name="Profiled Project")
+        artifact = Artifact.objects.create(project=project, name="Profiled Artifact")
+        ArtifactVersion.objects.create(artifact=artifact, version_number=1, url='https://example.com/p1')
+
+    def test_disabled_middleware_drops_out_of_the_chain(self):
+        """Test that the middleware is not used at all when profiling is off."""
+        with override_settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: None)
+
+    def test_unprofiled_request_stores_nothing(self):
+        """Test that requests without a trigger are passed straight through."""
+        response = self.client.get('/api/artifact-versions/')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(storage.list_profiles(), [])
+
+    def test_signed_header_profiles_request(self):
+        """Test that a valid token stores the stacks and the SQL log."""
+        response = self.client.get('/api/artifact-versions/', HTTP_X_PROFILE=make_token('trace'))
+        profile_id = response['X-Profile-Id']
+
+        meta, stacks = storage.load_profile(profile_id)
+        self.assertEqual(meta['path'], '/api/artifact-versions/')
+        self.assertEqual(meta['trigger'], 'header')
+        self.assertEqual(meta['status'], 200)
+        self.assertGreater(meta['sql_count'], 0)
+        self.assertTrue(any('artifact_version' in q['sql'] for q in meta['queries']))
+        self.assertTrue(any('ArtifactVersionSerializer' in stack for stack in stacks))
+        self.assertIn('<svg', render_svg(stacks, meta['unit']))
+
+    def test_sampling_profiler_records_stacks(self):
+        """Test that the statistical profiler produces a profile too."""
+        response = self.client.get('/api/artifact-versions/', HTTP_X_PROFILE=make_token('sample'))
+        meta, _ = storage.load_profile(response['X-Profile-Id'])
+        self.assertEqual((meta['mode'], meta['unit']), ('sample', 'samples'))
+
+    def test_invalid_token_is_ignored(self):
+        """Test that a forged or unknown-mode token does not profile the request."""
+        for token in ('forged', make_token('bogus')):
+            response = self.client.get('/api/artifact-versions/', HTTP_X_PROFILE=token)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile-Id', response)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sample_rate_profiles_requests(self):
+        """Test that configured sampling profiles requests but skips excluded paths."""
+        response = self.client.get('/api/artifact-versions/')
+        self.assertEqual(storage.load_profile(response['X-Profile-Id'])[0]['trigger'], 'sampled')
+        self.assertNotIn('X-Profile-Id', self.client.get('/admin/login/'))
+
+
+class ProfileRotationTest(ProfilingTestMixin, TestCase):
+    """Test the size-bounded profile directory."""
+
+    def test_oldest_profiles_are_deleted_first(self):
+        """Test that rotation keeps the newest profiles within the byte budget."""
+        ids = [f'2024010{i}T000000000000-aaaaaa' for i in range(1, 6)]
+        with override_settings(PROFILING_MAX_BYTES=10 ** 9):
+            for profile_id in ids:
+                storage.save_profile(profile_id, {'method': 'GET'}, {'a;b': 1000}, [{'sql': 'x' * 1000}])
+        size = sum(f.stat().st_size for f in Path(self.directory).iterdir()) // len(ids)
+
+        storage.rotate(Path(self.directory), size * 2)
+        self.assertEqual([p['id'] for p in storage.list_profiles()], [ids[4], ids[3]])
+
+    def test_profile_ids_cannot_escape_the_directory(self):
+        """Test that path-like ids are rejected."""
+        with self.assertRaises(FileNotFoundError):
+            storage.load_profile('../settings')
+
+
+class ProfileAdminTest(ProfilingTestMixin, TestCase):
+    """Test the admin toggle and the profile pages."""
+
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+
+    def test_toggle_profiles_live_traffic(self):
+        """Test that switching the toggle on profiles unsigned requests."""
+        self.client.post('/admin/profiles/', {'action': 'enable', 'minutes': '5', 'percent': '100'})
+        response = self.client.get('/api/artifact-versions/')
+        profile_id = response['X-Profile-Id']
+        self.assertEqual(storage.load_profile(profile_id)[0]['trigger'], 'admin')
+
+        listing = self.client.get('/admin/profiles/')
+        self.assertContains(listing, f'/admin/profiles/{profile_id}/')
+        detail = self.client.get(f'/admin/profiles/{profile_id}/')
+        self.assertContains(detail, '<svg')
+        collapsed = self.client.get(f'/admin/profiles/{profile_id}/collapsed/')
+        self.assertEqual(collapsed.status_code, 200)
+
+        self.client.post('/admin/profiles/', {'action': 'disable', 'minutes': '5', 'percent': '100'})
+        self.assertEqual(storage.read_toggle()['until'], 0)
+
+    def test_pages_require_staff(self):
+        """Test that anonymous users are sent to the admin login."""
+        self.client.logout()
+        response = self.client.get('/admin/profiles/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/admin/login/', response['Location'])
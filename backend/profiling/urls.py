@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'profiling'
+
+urlpatterns = [
+    path('', views.profile_list, name='list'),
+    path('<str:profile_id>/', views.profile_detail, name='detail'),
+    path('<str:profile_id>/collapsed/', views.profile_collapsed, name='collapsed'),
+]
@@ -0,0 +1,70 @@
+"""
+Admin pages for request profiles, served under ``/admin/profiles/``.
+"""
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin import site
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect, render
+from django.utils.safestring import mark_safe
+
+from . import storage
+from .flamegraph import render_svg
+
+
+@staff_member_required
+def profile_list(request):
+    """Recent profiles, newest first, plus the profile-live-traffic toggle."""
+    if request.method == 'POST':
+        try:
+            minutes = float(request.POST.get('minutes', 0))
+            sample_rate = float(request.POST.get('percent', 100)) / 100
+        except ValueError:
+            messages.error(request, 'Minutes and percent must be numbers.')
+            return redirect('profiling:list')
+        if request.POST.get('action') == 'disable':
+            minutes = 0
+        storage.write_toggle(minutes, min(max(sample_rate, 0.0), 1.0))
+        messages.success(request, 'Profiling toggle updated.')
+        return redirect('profiling:list')
+
+    toggle = storage.read_toggle()
+    return render(request, 'profiling/profile_list.html', {
+        **site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': storage.list_profiles(),
+        'toggle': toggle,
+        'toggle_until': datetime.fromtimestamp(toggle['until'], timezone.utc) if toggle['until'] else None,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+    })
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    """Flame graph and SQL log of one profile."""
+    try:
+        meta, stacks = storage.load_profile(profile_id)
+    except (FileNotFoundError, ValueError):
+        raise Http404('No such profile.')
+
+    return render(request, 'profiling/profile_detail.html', {
+        **site.each_context(request),
+        'title': f'{meta["method"]} {meta["path"]}',
+        'profile': meta,
+        'flamegraph': mark_safe(render_svg(stacks, meta['unit'])),
+    })
+
+
+@staff_member_required
+def profile_collapsed(request, profile_id):
+    """The raw collapsed stacks, for speedscope or flamegraph.pl."""
+    try:
+        collapsed = storage.read_collapsed(profile_id)
+    except FileNotFoundError:
+        raise Http404('No such profile.')
+    response = HttpResponse(collapsed, content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{profile_id}.collapsed"'
+    return response
@@ -0,0 +1,99 @@
+"""
+Optional database connection pooling, and its metrics.
+
+By default every worker thread keeps its own persistent connection
+(``DATABASE_CONN_MAX_AGE``). With ``DATABASE_POOL=True`` the threads of a
+worker process share one pool instead, using Django's built-in pool for
+PostgreSQL. This needs Django 5.1+, ``psycopg`` 3 and ``psycopg_pool``
+(``pip install "psycopg[binary,pool]"``). The pool keeps between
+``DATABASE_POOL_MIN_SIZE`` and ``DATABASE_POOL_MAX_SIZE`` connections open.
+It replaces connections older than ``DATABASE_POOL_MAX_LIFETIME`` or idle
+longer than ``DATABASE_POOL_MAX_IDLE``. With ``DATABASE_POOL_CHECK`` (Django's
+``CONN_HEALTH_CHECKS``, which the pool honours) it pings each connection
+before handing it out. A request that cannot get a
+connection within ``DATABASE_POOL_TIMEOUT`` seconds fails.
+
+``pool_stats()`` reports each pool's size, usage and wait times. They are
+included in the ``/api/ready/`` response.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+POSTGRES_ENGINE = 'django.db.backends.postgresql'
+
+
+def configure_pool(database: dict, env) -> dict:
+    """Switch one ``DATABASES`` entry to pooled connections, configured from ``env``."""
+    if database.get('ENGINE') != POSTGRES_ENGINE:
+        raise ImproperlyConfigured('DATABASE_POOL requires a PostgreSQL DATABASE_URL.')
+
+    pool = {
+        'min_size': int(env.get('DATABASE_POOL_MIN_SIZE', '2')),
+        'max_size': int(env.get('DATABASE_POOL_MAX_SIZE', '10')),
+        'timeout': float(env.get('DATABASE_POOL_TIMEOUT', '10')),
+        'max_lifetime': float(env.get('DATABASE_POOL_MAX_LIFETIME', '3600')),
+        'max_idle': float(env.get('DATABASE_POOL_MAX_IDLE', '600')),
+    }
+
+    # Connections go back to the pool at the end of each request. Django
+    # passes the pool its own ``check`` callback when CONN_HEALTH_CHECKS is
+    # set, so it must not be in the pool options too.
+    database['CONN_MAX_AGE'] = 0
+    database['CONN_HEALTH_CHECKS'] = env.get('DATABASE_POOL_CHECK', 'True') == 'True'
+    database.setdefault('OPTIONS', {})['pool'] = pool
+    return database
+
+
+def _pool(connection):
+    if connection.settings_dict.get('OPTIONS', {}).get('pool'):
+        return connection.pool
+    return None
+
+
+def pool_stats() -> dict:
+    """``{alias: stats}`` for every pooled database in this process."""
+    from django.db import connections
+
+    stats = {}
+    for alias in connections:
+        pool = _pool(connections[alias])
+        if pool is None:
+            continue
+        raw = pool.get_stats()
+        requests = raw.get('requests_num', 0)
+        stats[alias] = {
+            'min_size': raw.get('pool_min'),
+            'max_size': raw.get('pool_max'),
+            'size': raw.get('pool_size', 0),
+            'available': raw.get('pool_available', 0),
+            'in_use': raw.get('pool_size', 0) - raw.get('pool_available', 0),
+            'waiting': raw.get('requests_waiting', 0),
+            'requests': requests,
+            # Requests that found no idle connection and had to wait.
+            'requests_queued': raw.get('requests_queued', 0),
+            'requests_timed_out': raw.get('requests_errors', 0),
+            'wait_ms_total': raw.get('requests_wait_ms', 0),
+            'wait_ms_avg': round(raw.get('requests_wait_ms', 0) / requests, 3) if requests else 0.0,
+            'connections_opened': raw.get('connections_num', 0),
+            'connect_ms_total': raw.get('connections_ms', 0),
+            'connections_lost': raw.get('connections_lost', 0),
+            'bad_returns': raw.get('returns_bad', 0),
+        }
+    return stats
+
+
+def open_pools(timeout: float = 30.0):
+    """Open every configured pool and wait until it holds ``min_size`` connections."""
+    from django.db import connections
+
+    for alias in connections:
+        pool = _pool(connections[alias])
+        if pool is not None and pool.closed:
+            pool.open(wait=True, timeout=timeout)
+
+
+def close_pools():
+    from django.db import connections
+
+    for alias in connections:
+        if _pool(connections[alias]) is not None:
+            connections[alias].close_pool()
@@ -0,0 +1,227 @@
+"""
+Project-wide middleware.
+
+``CompressionMiddleware`` is a content-negotiating replacement for Django's
+``GZipMiddleware``. It picks the best encoding the client accepts out of
+zstd, brotli and gzip (zstd and brotli only when their optional packages are
+installed), skips bodies below ``COMPRESSION_MIN_SIZE`` bytes and compresses
+streaming responses chunk by chunk, flushing after each chunk so that
+long-lived streams are never held back by the compressor.
+
+Only JSON is compressed. HTML pages (the admin, login, the browsable API)
+carry CSRF tokens next to reflected input, which compression would expose
+to BREACH; Django's ``GZipMiddleware`` pads those against it, this
+middleware simply leaves them alone.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+DEFAULT_MIN_SIZE = 512
+DEFAULT_ENCODINGS = ('zstd', 'br', 'gzip')
+
+COMPRESSIBLE_TYPES = ('application/json',)
+
+
+class _GzipStream:
+    def __init__(self, level=6):
+        # wbits=31 selects the gzip container rather than raw zlib.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality=4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level=3):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _gzip_bytes(data: bytes) -> bytes:
+    # mtime is left out of the header so identical bodies compress identically.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _brotli_bytes(data: bytes) -> bytes:
+    return brotli.compress(data, quality=4)
+
+
+def _zstd_bytes(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def available_encodings() -> dict:
+    """Map each usable content-coding to its (one-shot, streaming) compressors."""
+    encodings = {'gzip': (_gzip_bytes, _GzipStream)}
+    if brotli is not None:
+        encodings['br'] = (_brotli_bytes, _BrotliStream)
+    if zstandard is not None:
+        encodings['zstd'] = (_zstd_bytes, _ZstdStream)
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Parse an Accept-Encoding header into a ``{coding: qvalue}`` mapping."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header: str, preference=DEFAULT_ENCODINGS, available=None):
+    """
+    Return the content-coding to use for a request, or ``None``.
+
+    The client's q-values win; server ``preference`` order breaks ties.
+    """
+    if not header:
+        return None
+    available = available if available is not None else available_encodings()
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+
+    best, best_q = None, 0.0
+    for coding in preference:
+        if coding not in available:
+            continue
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with the best encoding the client accepts.
+
+    Settings:
+        COMPRESSION_MIN_SIZE: bodies shorter than this are sent as-is.
+        COMPRESSION_ENCODINGS: server preference order of content-codings.
+        COMPRESSION_STREAMING: compress streaming responses (default True).
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+        self.preference = tuple(getattr(settings, 'COMPRESSION_ENCODINGS', DEFAULT_ENCODINGS))
+        self.streaming = getattr(settings, 'COMPRESSION_STREAMING', True)
+        self.encoders = available_encodings()
+
+    def process_response(self, request, response):
+        # Avoid double-encoding and leave partial content alone.
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return response
+
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        if response.streaming:
+            if not self.streaming:
+                return response
+        elif len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        coding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            preference=self.preference,
+            available=self.encoders,
+        )
+        if coding is None:
+            return response
+
+        compress_bytes, stream_class = self.encoders[coding]
+
+        if response.streaming:
+            self._compress_stream(response, stream_class)
+        else:
+            compressed = compress_bytes(response.content)
+            # Return the compressed content only if it's actually shorter.
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag no longer matches the encoded bytes; weaken it so
+        # conditional requests still work (RFC 9110 Section 8.8.1).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    @staticmethod
+    def _compress_stream(response, stream_class):
+        # Pull to lexical scope in case streaming_content is replaced later.
+        original = response.streaming_content
+
+        if response.is_async:
+            async def compressed():
+                stream = stream_class()
+                async for chunk in original:
+                    data = stream.compress(chunk)
+                    if data:
+                        yield data
+                yield stream.finish()
+        else:
+            def compressed():
+                stream = stream_class()
+                for chunk in original:
+                    data = stream.compress(chunk)
+                    if data:
+                        yield data
+                yield stream.finish()
+
+        response.streaming_content = compressed()
+        # The compressed size is unknown until the stream has been sent.
+        del response.headers['Content-Length']
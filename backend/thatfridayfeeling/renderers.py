@@ -0,0 +1,37 @@
+"""
+JSON renderers for the API.
+
+``ORJSONRenderer`` is a drop-in replacement for DRF's ``JSONRenderer`` that
+encodes with orjson when it is installed and falls back to the stock
+renderer otherwise, so a missing wheel never takes the API down.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render API responses with orjson, producing compact UTF-8 JSON."""
+
+    # Reuse DRF's encoder for anything orjson does not know natively
+    # (lazy translation strings, Decimals, querysets, ...).
+    _fallback_encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        # Honour ?indent= style requests from the browsable API by deferring
+        # to the stock renderer; the fast path is for compact output only.
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type or '', renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return orjson.dumps(data, default=self._fallback_encoder.default)
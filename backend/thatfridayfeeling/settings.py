@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,11 +45,15 @@ INSTALLED_APPS = [
     'corsheaders',
     'artifacts',
     'approvals',
-    
+    'analytics',
+    'profiling',
 ]
 
 MIDDLEWARE = [
+    'profiling.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'thatfridayfeeling.throttling.LoadSheddingMiddleware',
+    'thatfridayfeeling.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,10 +92,37 @@ import dj_database_url
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3'),
-        conn_max_age=600
+        conn_max_age=int(os.getenv('DATABASE_CONN_MAX_AGE', '600')),
+        # Off by default, as before: a check costs a round trip on the first
+        # query of every request.
+        conn_health_checks=os.getenv('DATABASE_CONN_HEALTH_CHECKS', 'False') == 'True',
     )
 }
 
+# Optional connection pool shared by each worker's threads (PostgreSQL with
+# psycopg 3 only; see thatfridayfeeling/dbpool.py for the DATABASE_POOL_*
+# settings). Replaces the persistent connection per thread above.
+
+DATABASE_POOL = os.getenv('DATABASE_POOL', 'False') == 'True'
+if DATABASE_POOL:
+    from thatfridayfeeling.dbpool import configure_pool
+
+    configure_pool(DATABASES['default'], os.environ)
+
+# Cache
+# Rate limits and load shedding keep their counters here. Set REDIS_URL (needs
+# the redis package) so every gunicorn worker shares them; without it each
+# worker process uses its own local-memory cache.
+
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -131,8 +165,119 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# REST Framework
+# orjson-backed JSON renderer; falls back to DRF's encoder if orjson is missing.
+
+# NUM_PROXIES is how many reverse proxies sit in front of the app (1 on
+# Render). Anonymous clients are identified by the address that many hops back
+# in X-Forwarded-For; at 0 only REMOTE_ADDR is used. It must not be left
+# unset, as DRF would then key on the whole client-supplied header.
+
+REST_FRAMEWORK = {
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+    'DEFAULT_RENDERER_CLASSES': [
+        'thatfridayfeeling.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'thatfridayfeeling.throttling.WriteRateThrottle',
+    ],
+}
+
+# Rate limiting and load shedding (see thatfridayfeeling/throttling.py). Both
+# are on by default when DEBUG is off.
+# WRITE_RATE_LIMITS maps a URL name to (requests per minute, burst) for each
+# client; 'default' covers every other write endpoint.
+
+RATE_LIMIT_CACHE = 'default'
+RATE_LIMITING_ENABLED = os.getenv('RATE_LIMITING_ENABLED', str(not DEBUG)) == 'True'
+WRITE_RATE_LIMITS = {
+    'default': (
+        float(os.getenv('WRITE_RATE_LIMIT_PER_MINUTE', '60')),
+        int(os.getenv('WRITE_RATE_LIMIT_BURST', '20')),
+    ),
+    'artifactversion-list-create': (30, 10),
+}
+
+# Reads are shed once LOAD_SHED_MAX_IN_FLIGHT other requests are in flight on
+# the host, writes once LOAD_SHED_WRITE_SHARE of that are. Requests queued in
+# the listen backlog aren't counted, so a running request sees at most the
+# host's slots (WEB_CONCURRENCY x GUNICORN_THREADS) minus one others; the
+# limit defaults to exactly that, so the last free slot is never taken by a
+# request that would leave others queueing. LOAD_SHED_WINDOW must be at least
+# the gunicorn timeout.
+# The count is only shared between workers through REDIS_URL. Without it
+# each worker process counts its own requests and never sees the other
+# workers, so with sync workers (GUNICORN_THREADS=1) nothing is ever shed.
+
+LOAD_SHEDDING_ENABLED = os.getenv('LOAD_SHEDDING_ENABLED', str(not DEBUG)) == 'True'
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv(
+    'LOAD_SHED_MAX_IN_FLIGHT',
+    str(max(1, int(os.getenv('WEB_CONCURRENCY', '2')) * int(os.getenv('GUNICORN_THREADS', '1')) - 1)),
+))
+LOAD_SHED_WRITE_SHARE = float(os.getenv('LOAD_SHED_WRITE_SHARE', '0.5'))
+LOAD_SHED_WINDOW = int(os.getenv('LOAD_SHED_WINDOW', os.getenv('GUNICORN_TIMEOUT', '30')))
+LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', '2'))
+
+# Response compression (see thatfridayfeeling/middleware.py).
+# zstd and br are offered only when the zstandard / brotli packages are installed.
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '512'))
+COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+COMPRESSION_STREAMING = True
+
+# Idempotency-Key support for POST endpoints (see artifacts/idempotency.py).
+
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+IDEMPOTENCY_WAIT_TIMEOUT = 10.0
+
+# Overdue-approval reminders and escalations (see artifacts/escalations.py).
+# Projects can override both thresholds; notifications are emailed to
+# APPROVAL_NOTIFY_EMAILS (comma-separated) when set, and always logged.
+
+APPROVAL_REMINDER_AFTER = timedelta(hours=int(os.getenv('APPROVAL_REMINDER_AFTER_HOURS', '48')))
+APPROVAL_ESCALATE_AFTER = timedelta(hours=int(os.getenv('APPROVAL_ESCALATE_AFTER_HOURS', '120')))
+APPROVAL_NOTIFY_EMAILS = [e for e in os.getenv('APPROVAL_NOTIFY_EMAILS', '').split(',') if e]
+
+# Link-health checks for pending versions (see artifacts/linkcheck.py). A link
+# is re-checked once its last result is older than LINK_CHECK_TTL seconds.
+
+LINK_CHECK_CONCURRENCY = int(os.getenv('LINK_CHECK_CONCURRENCY', '200'))
+LINK_CHECK_PER_HOST = int(os.getenv('LINK_CHECK_PER_HOST', '4'))
+LINK_CHECK_TIMEOUT = float(os.getenv('LINK_CHECK_TIMEOUT', '10'))
+LINK_CHECK_TTL = int(os.getenv('LINK_CHECK_TTL', str(60 * 60)))
+
+# Version preview thumbnails (see artifacts/previews.py), generated by the
+# generate_previews command into a content-addressed disk cache that keeps the
+# most recently used PREVIEW_CACHE_MAX_BYTES. PREVIEW_FETCHER is the dotted
+# path of the callable class that fetches a URL's image.
+
+PREVIEW_CACHE_DIR = os.getenv('PREVIEW_CACHE_DIR', str(BASE_DIR / 'previews'))
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv('PREVIEW_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+PREVIEW_SIZE = (int(os.getenv('PREVIEW_WIDTH', '640')), int(os.getenv('PREVIEW_HEIGHT', '400')))
+PREVIEW_QUALITY = int(os.getenv('PREVIEW_QUALITY', '80'))
+PREVIEW_FETCHER = os.getenv('PREVIEW_FETCHER', 'artifacts.previews.HttpFetcher')
+PREVIEW_FETCH_CONCURRENCY = int(os.getenv('PREVIEW_FETCH_CONCURRENCY', '16'))
+PREVIEW_FETCH_TIMEOUT = float(os.getenv('PREVIEW_FETCH_TIMEOUT', '10'))
+PREVIEW_MAX_SOURCE_BYTES = int(os.getenv('PREVIEW_MAX_SOURCE_BYTES', str(20 * 1024 * 1024)))
+PREVIEW_WORKERS = int(os.getenv('PREVIEW_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# On-demand request profiling (see profiling/middleware.py). When disabled the
+# middleware removes itself at start-up and costs nothing per request.
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_BYTES = int(os.getenv('PROFILING_MAX_BYTES', str(50 * 1024 * 1024)))
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_MODE = os.getenv('PROFILING_MODE', 'sample')
+PROFILING_INTERVAL = 0.001
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_EXCLUDE = ('/admin/', '/static/')
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
     "https://thatfridayfeeling-frontend.onrender.com",  # Production frontend
 ]
+
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-profile')
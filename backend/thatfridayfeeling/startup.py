@@ -0,0 +1,107 @@
+"""
+Start-up warm-up and profiling.
+
+``warm_up()`` does the work the first request would otherwise pay for:
+compiling the URL resolver, building serializer fields (which fills the model
+``_meta`` caches), importing the configured DRF renderers/parsers and,
+optionally, opening database connections. The gunicorn config calls it in the
+master before forking (without DB) and in each worker before it accepts
+traffic (DB only).
+
+Running this module directly performs a cold Django start-up and prints the
+time spent in each phase as JSON; ``manage.py profile_startup`` runs it under
+``python -X importtime`` to attribute import time to modules.
+"""
+import json
+import os
+import sys
+import time
+
+WARMED = False
+
+
+def warm_code_paths():
+    """Compile URL patterns and build serializer/renderer state."""
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    from artifacts import serializers
+
+    resolver = get_resolver()
+    # Accessing reverse_dict compiles every pattern, including included URLconfs.
+    resolver.reverse_dict
+
+    for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES',
+                 'DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES'):
+        getattr(api_settings, name)
+
+    for serializer_class in (
+        serializers.ArtifactVersionSerializer,
+        serializers.ArtifactVersionCreateSerializer,
+        serializers.ArtifactSerializer,
+        serializers.ArtifactCreateSerializer,
+        serializers.ApprovalDecisionSerializer,
+    ):
+        serializer_class().fields
+
+
+def warm_connections():
+    """Open a connection for every configured database and check it works."""
+    from django.db import connections
+
+    from .dbpool import open_pools
+
+    # Fill connection pools to their minimum size before taking traffic.
+    open_pools()
+    for alias in connections:
+        connection = connections[alias]
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def warm_up(connect: bool = True):
+    """Run all warm-up steps and mark the process as ready."""
+    global WARMED
+    warm_code_paths()
+    if connect:
+        warm_connections()
+    WARMED = True
+
+
+def profile_phases() -> dict:
+    """Time each phase of a cold start in this (fresh) interpreter, in ms."""
+    phases = {}
+
+    def timed(name, func):
+        started = time.perf_counter()
+        func()
+        phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thatfridayfeeling.settings')
+
+    def load_settings():
+        from django.conf import settings
+        settings.INSTALLED_APPS
+
+    def setup_apps():
+        import django
+        django.setup(set_prefix=False)
+
+    def load_wsgi():
+        from django.core.handlers.wsgi import WSGIHandler
+        WSGIHandler()
+
+    timed('import_django', lambda: __import__('django'))
+    timed('settings', load_settings)
+    timed('apps_populate', setup_apps)
+    timed('wsgi_handler_and_middleware', load_wsgi)
+    timed('url_resolver_and_serializers', warm_code_paths)
+    timed('first_db_connection', warm_connections)
+    phases['total'] = round(sum(phases.values()), 2)
+    return phases
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    print(json.dumps(profile_phases()))
@@ -0,0 +1,218 @@
+"""
+Rate limiting and load shedding.
+
+``WriteRateThrottle`` is a DRF throttle that gives every client a token bucket
+per write endpoint (keyed by URL name), sized by ``WRITE_RATE_LIMITS``. A
+client that empties its bucket gets ``429 Too Many Requests`` with
+``Retry-After``; reads are never rate limited.
+
+``LoadSheddingMiddleware`` counts the API requests in flight across the
+workers of this host and turns new ones away with ``503 Service
+Unavailable`` and ``Retry-After`` before every worker is busy. A request is
+admitted while the number of *other* requests in flight is below its
+limit: ``LOAD_SHED_MAX_IN_FLIGHT`` for reads, ``LOAD_SHED_WRITE_SHARE`` of
+that for writes. Writes are shed first, which keeps the rest of the slots
+free for the dashboards' polling reads.
+
+Requests waiting in gunicorn's listen backlog are not counted: a request
+only runs once it has a slot, so it sees at most the host's slots minus one
+others. The limits must be below that to shed anything, which is why
+``LOAD_SHED_MAX_IN_FLIGHT`` defaults to one less than the host's slots.
+
+Both keep their state in the ``RATE_LIMIT_CACHE`` cache and only use its
+atomic operations (``add``, ``incr``, ``decr``), so with a shared cache
+(Redis, memcached) the limits hold across gunicorn workers, and rate limits
+across hosts too. In-flight counts are kept per host (the key includes the
+hostname), matching a limit sized from one host's workers. With the default
+local-memory cache each worker process counts on its own. If
+the cache is unavailable, requests are let through.
+"""
+import logging
+import socket
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+# Paths that are never shed: load balancer health checks must keep answering.
+SHED_EXEMPT_PATHS = ('/api/ready/',)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class TokenBucket:
+    """
+    A token bucket holding up to ``burst`` tokens, refilled at ``per_minute``.
+
+    Stored as a single integer, the bucket's theoretical arrival time (GCRA):
+    the moment, in milliseconds, at which it would be full again. Taking a
+    token adds one refill interval with ``incr``; if that pushes it more than
+    ``burst`` intervals into the future the bucket was empty, and the token
+    is handed back with ``decr``. The key expires when the bucket is full,
+    so idle clients cost nothing.
+    """
+
+    def __init__(self, per_minute: float, burst: int, cache=None, prefix: str = 'tb'):
+        self.per_minute = per_minute
+        self.burst = burst
+        self.interval = max(1, round(60000 / per_minute))
+        self.capacity = self.interval * max(1, burst)
+        self.cache = cache or caches[settings.RATE_LIMIT_CACHE]
+        self.prefix = prefix
+
+    def take(self, key: str) -> float:
+        """Take one token; returns 0 when granted, else seconds until one is available."""
+        key = f'{self.prefix}:{key}'
+        now = _now_ms()
+        if self.cache.add(key, now + self.interval, timeout=self._timeout(self.interval)):
+            return 0.0
+        try:
+            full_at = self.cache.incr(key, self.interval)
+        except ValueError:
+            # Expired between add() and incr().
+            self.cache.set(key, now + self.interval, timeout=self._timeout(self.interval))
+            return 0.0
+        if full_at - self.interval < now:
+            # The bucket was already full; restart it from now. Racing
+            # requests may both do this, which only ever lets a full bucket
+            # through, never an empty one.
+            self.cache.set(key, now + self.interval, timeout=self._timeout(self.interval))
+            return 0.0
+        if full_at - now > self.capacity:
+            self.cache.decr(key, self.interval)
+            return (full_at - now - self.capacity) / 1000
+        self.cache.touch(key, timeout=self._timeout(full_at - now))
+        return 0.0
+
+    @staticmethod
+    def _timeout(ms: int) -> int:
+        return ms // 1000 + 2
+
+
+class WriteRateThrottle(BaseThrottle):
+    """
+    Per-client, per-endpoint token buckets for unsafe methods.
+
+    Clients are identified by user when authenticated, otherwise by address:
+    ``REMOTE_ADDR``, or with ``NUM_PROXIES`` set the address that many proxies
+    back in ``X-Forwarded-For``. Entries a client adds to that header itself
+    are never used, so it can't pick a fresh bucket per request.
+    """
+
+    _buckets = {}
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0.0
+        if not settings.RATE_LIMITING_ENABLED or request.method in SAFE_METHODS:
+            return True
+
+        endpoint = request.resolver_match.url_name if request.resolver_match else view.__class__.__name__
+        user = getattr(request, 'user', None)
+        client = f'user-{user.pk}' if user is not None and user.is_authenticated else self.get_ident(request)
+        try:
+            self.wait_seconds = self.bucket(endpoint).take(f'{endpoint}:{client}')
+        except Exception:
+            logger.warning('Rate limit check failed; allowing request', exc_info=True)
+            return True
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+    @classmethod
+    def bucket(cls, endpoint: str) -> TokenBucket:
+        limits = settings.WRITE_RATE_LIMITS
+        per_minute, burst = limits.get(endpoint, limits['default'])
+        bucket = cls._buckets.get(endpoint)
+        if bucket is None or (bucket.per_minute, bucket.burst) != (per_minute, burst):
+            bucket = cls._buckets[endpoint] = TokenBucket(per_minute, burst, prefix='rate')
+        return bucket
+
+
+class InFlightCounter:
+    """
+    Requests in flight across the processes of this host.
+
+    Counts live in one key per ``window`` seconds: a request increments the
+    current window's key and decrements that same key when it finishes. The
+    total is the current plus the previous window, which covers every live
+    request as long as none runs longer than ``window`` (set it to at least
+    the gunicorn timeout). A worker killed mid-request leaks its count only
+    until the key expires, two windows later.
+    """
+
+    def __init__(self, window: int, cache=None, prefix: str = None):
+        self.window = window
+        self.cache = cache or caches[settings.RATE_LIMIT_CACHE]
+        # Hosts share the cache but each has its own worker slots.
+        self.prefix = prefix or f'inflight:{socket.gethostname()}'
+
+    def enter(self):
+        """Count a request in; returns ``(key, requests in flight including it)``."""
+        epoch = int(time.time()) // self.window
+        key = f'{self.prefix}:{epoch}'
+        try:
+            current = self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, timeout=self.window * 2 + 5):
+                current = 1
+            else:
+                current = self.cache.incr(key)
+        previous = self.cache.get(f'{self.prefix}:{epoch - 1}', 0)
+        return key, current + max(previous, 0)
+
+    def leave(self, key: str):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+
+class LoadSheddingMiddleware:
+    """
+    Answer 503 with ``Retry-After`` instead of queueing API requests behind a
+    saturated worker pool. Reads are admitted while fewer than
+    ``LOAD_SHED_MAX_IN_FLIGHT`` other requests are in flight, writes while
+    fewer than ``LOAD_SHED_WRITE_SHARE`` of that are. At the default of one
+    less than the host's slots, a request that lands in the last free slot
+    is answered at once, so a full host works through its backlog with
+    quick 503s instead of queueing it.
+    """
+
+    def __init__(self, get_response):
+        if not settings.LOAD_SHEDDING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.read_limit = settings.LOAD_SHED_MAX_IN_FLIGHT
+        self.write_limit = self.read_limit * settings.LOAD_SHED_WRITE_SHARE
+        self.retry_after = str(settings.LOAD_SHED_RETRY_AFTER)
+        self.counter = InFlightCounter(settings.LOAD_SHED_WINDOW)
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/') or request.path in SHED_EXEMPT_PATHS:
+            return self.get_response(request)
+
+        try:
+            key, in_flight = self.counter.enter()
+        except Exception:
+            logger.warning('In-flight count failed; not shedding', exc_info=True)
+            return self.get_response(request)
+
+        try:
+            limit = self.read_limit if request.method in SAFE_METHODS else self.write_limit
+            # in_flight counts this request too.
+            if in_flight - 1 >= limit:
+                response = JsonResponse({'detail': 'The server is busy. Please retry shortly.'}, status=503)
+                response['Retry-After'] = self.retry_after
+                return response
+            return self.get_response(request)
+        finally:
+            self.counter.leave(key)
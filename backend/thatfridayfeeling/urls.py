@@ -18,8 +18,13 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic.base import RedirectView
 
+from .views import ReadinessView
+
 urlpatterns = [
     path('', RedirectView.as_view(url='/api/', permanent=False)),
+    path('admin/profiles/', include('profiling.urls')),
     path('admin/', admin.site.urls),
+    path('api/ready/', ReadinessView.as_view(), name='readiness'),
+    path('api/analytics/', include('analytics.urls')),
     path('api/', include('artifacts.urls')),
 ]
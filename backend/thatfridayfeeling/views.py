@@ -0,0 +1,36 @@
+import logging
+
+from django.db import DatabaseError
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import dbpool, startup
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessView(APIView):
+    """
+    Readiness probe for the load balancer.
+
+    Returns 200 once this process can reach the database, 503 otherwise.
+    ``warmed`` reports whether the start-up warm-up has run in this process,
+    and ``database_pool`` this process's connection pool metrics when
+    pooling is enabled.
+    """
+    def get(self, request):
+        try:
+            startup.warm_connections()
+        except DatabaseError:
+            # Driver errors can name hosts, users and databases; keep them in the logs.
+            logger.exception('Readiness check could not reach the database')
+            return Response(
+                {'status': 'unavailable', 'database': 'unavailable', 'warmed': startup.WARMED},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        body = {'status': 'ok', 'database': 'ok', 'warmed': startup.WARMED}
+        pools = dbpool.pool_stats()
+        if pools:
+            body['database_pool'] = pools
+        return Response(body)
@@ -26,17 +26,455 @@ export interface Artifact {
   created_at: string;
 }
 
+export interface ProjectSummary {
+  id: number;
+  name: string;
+}
+
+export interface LinkHealth {
+  status: "UNCHECKED" | "OK" | "RESTRICTED" | "BROKEN" | "UNREACHABLE";
+  checked_at: string | null;
+}
+
 export interface ArtifactVersion {
   id: number;
-  artifact: number;
+  // An id, or the full artifact when requested with include: ["artifact"]
+  artifact: number | Artifact;
+  // Only present when requested with include: ["project"]
+  project?: ProjectSummary;
   version_number: number;
   url: string;
   status: "AWAITING_APPROVAL" | "APPROVED" | "REJECTED";
   submitted_by: string;
+  link_health: LinkHealth;
+  // API path of the version's thumbnail, or null until one has been generated
+  preview_url: string | null;
   created_at: string;
   decision: ApprovalDecision | null;
 }
 
+// Sparse fieldsets for the version endpoints: `fields` trims the response to
+// the named fields, `include` embeds related objects in the same request.
+export type VersionField = keyof Omit<ArtifactVersion, "project">;
+export type VersionInclude = "artifact" | "project" | "decision";
+
+export interface VersionQuery {
+  fields?: VersionField[];
+  include?: VersionInclude[];
+}
+
+function applyVersionQuery(url: URL, query: VersionQuery = {}): URL {
+  if (query.fields?.length) {
+    url.searchParams.set("fields", query.fields.join(","));
+  }
+  if (query.include?.length) {
+    url.searchParams.set("include", query.include.join(","));
+  }
+  return url;
+}
+
+// ============================================================================
+// RESPONSE CACHE
+// ============================================================================
+// Every GET goes through `cachedGet`, keyed by its full URL:
+//
+// - Concurrent calls for the same URL share one in-flight request.
+// - Stale-while-revalidate: data younger than `maxAgeMs` is returned as-is;
+//   older data is returned immediately while a refresh runs in the
+//   background and is delivered to watchers when it lands.
+// - Tabs share one poller. The tab holding the LEADER_LOCK web lock polls
+//   every URL that any tab is watching and posts the results on a
+//   BroadcastChannel, so N open dashboards cost one request per interval
+//   instead of N. Followers re-announce what they watch every tick and only
+//   fetch themselves if the leader's updates stop arriving.
+// - approve/reject responses are written into every cached list and detail
+//   that holds the version (in every tab), so screens update without a
+//   refetch.
+
+const CHANNEL_NAME = "tff-api-cache";
+const LEADER_LOCK = "tff-api-cache-leader";
+const FRESH_MS = 2000;
+const TICK_MS = 1000;
+// A follower polls for itself once its data is this many intervals old.
+const FOLLOWER_GRACE = 2.5;
+// The leader forgets another tab's watch after this many missed intervals.
+const REMOTE_WATCH_TTL = 3;
+
+export interface CacheOptions {
+  // Return cached data without revalidating if it is younger than this
+  maxAgeMs?: number;
+}
+
+export type CacheListener<T> = (data: T | undefined, error?: Error) => void;
+
+interface CacheEntry {
+  data: unknown;
+  fetchedAt: number;
+}
+
+interface Watch {
+  intervalMs: number;
+  errorMessage: string;
+  listeners: Set<CacheListener<any>>;
+}
+
+type CacheMessage =
+  | { type: "update"; url: string; data: unknown; fetchedAt: number }
+  | { type: "watch"; url: string; intervalMs: number; errorMessage: string }
+  | { type: "version"; version: ArtifactVersion }
+  | { type: "invalidate"; prefixes: string[] };
+
+const cache = new Map<string, CacheEntry>();
+const inFlight = new Map<string, Promise<unknown>>();
+const watches = new Map<string, Watch>();
+const remoteWatches = new Map<string, { intervalMs: number; errorMessage: string; lastSeen: number }>();
+// Polling pauses for a URL until this time after a 429/503 with Retry-After.
+const backoffUntil = new Map<string, number>();
+
+let channel: BroadcastChannel | null = null;
+let coordinationStarted = false;
+let isLeader = true;
+let tickTimer: ReturnType<typeof setInterval> | null = null;
+
+function ensureCoordination(): void {
+  if (coordinationStarted) return;
+  coordinationStarted = true;
+
+  if (typeof BroadcastChannel === "undefined") return;
+  channel = new BroadcastChannel(CHANNEL_NAME);
+  channel.onmessage = (event: MessageEvent<CacheMessage>) => handleMessage(event.data);
+
+  // Without web locks every tab polls for itself, as before.
+  if (typeof navigator !== "undefined" && navigator.locks) {
+    isLeader = false;
+    navigator.locks.request(LEADER_LOCK, () => {
+      isLeader = true;
+      startTicking();
+      // Hold the lock until this tab closes; the browser then hands it on.
+      return new Promise<never>(() => {});
+    });
+  }
+}
+
+function broadcast(message: CacheMessage): void {
+  channel?.postMessage(message);
+}
+
+function notify(url: string, data: unknown, error?: Error): void {
+  watches.get(url)?.listeners.forEach((listener) => listener(data, error));
+}
+
+function store(url: string, data: unknown, fetchedAt: number): void {
+  cache.set(url, { data, fetchedAt });
+  notify(url, data);
+}
+
+function handleMessage(message: CacheMessage): void {
+  switch (message.type) {
+    case "update": {
+      const entry = cache.get(message.url);
+      if (!entry || entry.fetchedAt < message.fetchedAt) {
+        store(message.url, message.data, message.fetchedAt);
+      }
+      break;
+    }
+    case "watch":
+      if (isLeader) {
+        remoteWatches.set(message.url, {
+          intervalMs: message.intervalMs,
+          errorMessage: message.errorMessage,
+          lastSeen: Date.now(),
+        });
+        startTicking();
+      }
+      break;
+    case "version":
+      applyVersion(message.version);
+      break;
+    case "invalidate":
+      markStale(message.prefixes);
+      break;
+  }
+}
+
+function revalidate<T>(url: string, errorMessage: string): Promise<T> {
+  const pending = inFlight.get(url);
+  if (pending) return pending as Promise<T>;
+
+  const request = (async () => {
+    try {
+      const res = await fetch(url, { method: "GET" });
+      if (res.status === 429 || res.status === 503) {
+        backoffUntil.set(url, Date.now() + retryAfterMs(res));
+      }
+      if (!res.ok) {
+        const errorText = await res.text();
+        console.log("Error response:", errorText);
+        throw new Error(errorMessage);
+      }
+      const data = await res.json();
+      const fetchedAt = Date.now();
+      store(url, data, fetchedAt);
+      broadcast({ type: "update", url, data, fetchedAt });
+      return data as T;
+    } catch (err) {
+      notify(url, cache.get(url)?.data, err as Error);
+      throw err;
+    } finally {
+      inFlight.delete(url);
+    }
+  })();
+  inFlight.set(url, request);
+  return request;
+}
+
+async function cachedGet<T>(
+  url: string,
+  errorMessage: string,
+  { maxAgeMs = FRESH_MS }: CacheOptions = {}
+): Promise<T> {
+  ensureCoordination();
+  const entry = cache.get(url);
+  if (!entry) {
+    return revalidate<T>(url, errorMessage);
+  }
+  if (Date.now() - entry.fetchedAt >= maxAgeMs) {
+    // Serve the stale copy now; watchers get the fresh one when it arrives.
+    revalidate<T>(url, errorMessage).catch(() => {});
+  }
+  return entry.data as T;
+}
+
+function watch<T>(
+  url: string,
+  errorMessage: string,
+  intervalMs: number,
+  listener: CacheListener<T>
+): () => void {
+  ensureCoordination();
+  const current: Watch = watches.get(url) ?? { intervalMs, errorMessage, listeners: new Set() };
+  watches.set(url, current);
+  current.intervalMs = Math.min(current.intervalMs, intervalMs);
+  current.listeners.add(listener);
+  startTicking();
+
+  // First paint: cached data straight away, then a fetch if it is stale
+  // (whose result reaches the listener through `store`).
+  const entry = cache.get(url);
+  if (entry) {
+    listener(entry.data as T);
+  }
+  if (!entry || Date.now() - entry.fetchedAt >= FRESH_MS) {
+    revalidate<T>(url, errorMessage).catch(() => {});
+  }
+
+  return () => {
+    current.listeners.delete(listener);
+    if (current.listeners.size === 0) {
+      watches.delete(url);
+    }
+  };
+}
+
+function startTicking(): void {
+  if (tickTimer === null) {
+    tickTimer = setInterval(tick, TICK_MS);
+  }
+}
+
+function tick(): void {
+  const now = Date.now();
+  const due = new Map<string, { intervalMs: number; errorMessage: string }>();
+
+  watches.forEach(({ intervalMs, errorMessage }, url) => {
+    due.set(url, { intervalMs, errorMessage });
+    if (!isLeader) {
+      broadcast({ type: "watch", url, intervalMs, errorMessage });
+    }
+  });
+  if (isLeader) {
+    remoteWatches.forEach((remote, url) => {
+      if (now - remote.lastSeen > remote.intervalMs * REMOTE_WATCH_TTL) {
+        remoteWatches.delete(url);
+      } else if (!due.has(url) || due.get(url)!.intervalMs > remote.intervalMs) {
+        due.set(url, remote);
+      }
+    });
+  }
+
+  if (due.size === 0 && tickTimer !== null) {
+    clearInterval(tickTimer);
+    tickTimer = null;
+    return;
+  }
+
+  due.forEach(({ intervalMs, errorMessage }, url) => {
+    if ((backoffUntil.get(url) ?? 0) > now) return;
+    const age = now - (cache.get(url)?.fetchedAt ?? 0);
+    if (age >= (isLeader ? intervalMs : intervalMs * FOLLOWER_GRACE)) {
+      revalidate(url, errorMessage).catch(() => {});
+    }
+  });
+}
+
+function mergeVersion(cached: ArtifactVersion, updated: ArtifactVersion): ArtifactVersion {
+  // Keep the cached entry's shape: only the fields it was fetched with, and
+  // its expanded artifact/project rather than the bare ids in `updated`.
+  const merged: Record<string, unknown> = { ...cached };
+  for (const key of Object.keys(cached)) {
+    if (key in updated && !(key === "artifact" && typeof cached.artifact === "object")) {
+      merged[key] = updated[key as keyof ArtifactVersion];
+    }
+  }
+  return merged as unknown as ArtifactVersion;
+}
+
+function applyVersion(version: ArtifactVersion): void {
+  cache.forEach((entry, url) => {
+    const statusFilter = new URL(url).searchParams.get("status");
+    let data = entry.data;
+
+    if (Array.isArray(data) || Array.isArray((data as VersionHistoryPage)?.results)) {
+      const items = (Array.isArray(data) ? data : (data as VersionHistoryPage).results) as ArtifactVersion[];
+      if (!items.some((item) => item.id === version.id)) return;
+      let next = items.map((item) => (item.id === version.id ? mergeVersion(item, version) : item));
+      if (statusFilter && statusFilter !== version.status) {
+        next = next.filter((item) => item.id !== version.id);
+      }
+      data = Array.isArray(data) ? next : { ...(data as VersionHistoryPage), results: next };
+    } else if ((data as ArtifactVersion)?.id === version.id && "version_number" in (data as object)) {
+      data = mergeVersion(data as ArtifactVersion, version);
+    } else {
+      return;
+    }
+    // Same timestamp: a decision changes content, not freshness.
+    cache.set(url, { data, fetchedAt: entry.fetchedAt });
+    notify(url, data);
+  });
+}
+
+function markStale(prefixes: string[]): void {
+  cache.forEach((entry, url) => {
+    if (!prefixes.some((prefix) => url.startsWith(`${API_BASE}${prefix}`))) return;
+    const watched = watches.get(url) ?? remoteWatches.get(url);
+    if (!watched) {
+      // Refetched on next use.
+      entry.fetchedAt = 0;
+    } else if (isLeader) {
+      // Followers keep theirs; the leader's refetch reaches them.
+      revalidate(url, watched.errorMessage).catch(() => {});
+    }
+  });
+}
+
+/**
+ * Write a version returned by a mutation into every cached response (in
+ * every tab) that contains it.
+ */
+function updateCachedVersion(version: ArtifactVersion): void {
+  applyVersion(version);
+  // Status counts moved too; let the summaries refetch.
+  invalidate(["/api/projects/"]);
+  broadcast({ type: "version", version });
+}
+
+function invalidate(prefixes: string[]): void {
+  markStale(prefixes);
+  broadcast({ type: "invalidate", prefixes });
+}
+
+/**
+ * The freshest copy of a version already held by any cached list or detail,
+ * without a request. Lets a page render immediately while it loads the rest.
+ */
+export function peekArtifactVersion(versionId: number): ArtifactVersion | undefined {
+  let found: ArtifactVersion | undefined;
+  let foundAt = -1;
+  cache.forEach((entry) => {
+    const data = entry.data;
+    const items = (Array.isArray(data)
+      ? data
+      : Array.isArray((data as VersionHistoryPage)?.results)
+        ? (data as VersionHistoryPage).results
+        : [data]) as ArtifactVersion[];
+    const match = items.find((item) => item?.id === versionId && "status" in item);
+    if (match && entry.fetchedAt >= foundAt) {
+      found = match;
+      foundAt = entry.fetchedAt;
+    }
+  });
+  return found;
+}
+
+/**
+ * Drop every cached response (e.g. on logout, or between tests).
+ */
+export function clearApiCache(): void {
+  cache.clear();
+  inFlight.clear();
+  watches.clear();
+  remoteWatches.clear();
+  backoffUntil.clear();
+  if (tickTimer !== null) {
+    clearInterval(tickTimer);
+    tickTimer = null;
+  }
+}
+
+// ============================================================================
+// IDEMPOTENT POSTS
+// ============================================================================
+// Write requests carry an Idempotency-Key header. If the network drops the
+// response, we retry with the SAME key and the backend replays the stored
+// result instead of creating a duplicate version or returning a 409.
+
+const MAX_POST_ATTEMPTS = 3;
+// A rate-limited (429) or shed (503) write is retried after its Retry-After
+// if that is no longer than this; otherwise the error is shown.
+const MAX_RETRY_AFTER_MS = 5000;
+
+function retryAfterMs(res: Response): number {
+  const seconds = Number(res.headers.get("Retry-After"));
+  return Number.isFinite(seconds) && seconds > 0 ? seconds * 1000 : 1000;
+}
+
+export function newIdempotencyKey(): string {
+  return crypto.randomUUID();
+}
+
+async function postIdempotent(
+  url: string,
+  body: unknown,
+  idempotencyKey: string
+): Promise<Response> {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      const res = await fetch(url, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "Idempotency-Key": idempotencyKey,
+        },
+        body: JSON.stringify(body),
+      });
+      if ((res.status === 429 || res.status === 503) && attempt < MAX_POST_ATTEMPTS) {
+        const delay = retryAfterMs(res);
+        if (delay <= MAX_RETRY_AFTER_MS) {
+          await new Promise((resolve) => setTimeout(resolve, delay));
+          continue;
+        }
+      }
+      return res;
+    } catch (err) {
+      // fetch only rejects on network failures; HTTP errors are returned
+      if (attempt >= MAX_POST_ATTEMPTS) {
+        throw err;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 250 * attempt));
+    }
+  }
+}
+
 // ============================================================================
 // API FUNCTIONS
 // ============================================================================
@@ -49,16 +487,17 @@ export interface ArtifactVersion {
  */
 export async function createArtifact(
   name: string,
-  artifactType: string = ""
+  artifactType: string = "",
+  idempotencyKey: string = newIdempotencyKey()
 ): Promise<Artifact> {
-  const res = await fetch(`${API_BASE}/api/artifacts/`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({
+  const res = await postIdempotent(
+    `${API_BASE}/api/artifacts/`,
+    {
       name,
       artifact_type: artifactType,
-    }),
-  });
+    },
+    idempotencyKey
+  );
 
   if (!res.ok) {
     const errorData = await res.json();
@@ -80,17 +519,18 @@ export async function createArtifact(
 export async function createArtifactVersion(
   artifactId: number,
   url: string,
-  submittedBy: string
+  submittedBy: string,
+  idempotencyKey: string = newIdempotencyKey()
 ): Promise<ArtifactVersion> {
-  const res = await fetch(`${API_BASE}/api/artifact-versions/`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({
+  const res = await postIdempotent(
+    `${API_BASE}/api/artifact-versions/`,
+    {
       artifact: artifactId,
       url,
       submitted_by: submittedBy,
-    }),
-  });
+    },
+    idempotencyKey
+  );
 
   // If the response it not 201 Created, throw an error
   if (!res.ok) {
@@ -100,6 +540,8 @@ export async function createArtifactVersion(
     throw new Error(errorMessage);
   }
 
+  // New version: lists, histories and counts are out of date in every tab
+  invalidate(["/api/artifact-versions/", `/api/artifacts/${artifactId}/`, "/api/projects/"]);
   return res.json();
 }
 
@@ -108,26 +550,16 @@ export async function createArtifactVersion(
  * 
  * Called when viewing a version before approving/rejecting.
  * Returns the version details + decision (if made).
+ * Pass `include` to embed the artifact/project in the same request.
+ * Served from the cache while fresh (see RESPONSE CACHE).
  */
-export async function getArtifactVersion(versionId: number): Promise<ArtifactVersion> {
-  const url = `${API_BASE}/api/artifact-versions/${versionId}/`
-  console.log('Fetching version from:', url)
-  
-  const res = await fetch(url, {
-    method: 'GET',
-  })
-
-  console.log('Response status:', res.status)
-  
-  if (!res.ok) {
-    const errorText = await res.text()
-    console.log('Error response:', errorText)
-    throw new Error('Version not found')
-  }
-
-  const data = await res.json()
-  console.log('Fetched version:', data)
-  return data
+export async function getArtifactVersion(
+  versionId: number,
+  query: VersionQuery = {},
+  options: CacheOptions = {}
+): Promise<ArtifactVersion> {
+  const url = applyVersionQuery(new URL(`${API_BASE}/api/artifact-versions/${versionId}/`), query).toString()
+  return cachedGet<ArtifactVersion>(url, 'Version not found', options)
 }
 
 /**
@@ -135,22 +567,92 @@ export async function getArtifactVersion(versionId: number): Promise<ArtifactVer
  * 
  * Called to show all versions awaiting approval.
  * Optionally filter by status: 'AWAITING_APPROVAL', 'APPROVED', 'REJECTED'
+ * Pass `fields` to fetch only what the screen renders.
  */
-export async function listArtifactVersions(status?: string): Promise<ArtifactVersion[]> {
-  const url = new URL(`${API_BASE}/api/artifact-versions/`)
+function artifactVersionsUrl(status?: string, query: VersionQuery = {}): string {
+  const url = applyVersionQuery(new URL(`${API_BASE}/api/artifact-versions/`), query)
   if (status) {
     url.searchParams.append('status', status)
   }
-  
-  const res = await fetch(url.toString(), {
-    method: 'GET',
-  })
+  return url.toString()
+}
 
-  if (!res.ok) {
-    throw new Error('Failed to fetch versions')
-  }
+export async function listArtifactVersions(
+  status?: string,
+  query: VersionQuery = {},
+  options: CacheOptions = {}
+): Promise<ArtifactVersion[]> {
+  return cachedGet<ArtifactVersion[]>(artifactVersionsUrl(status, query), 'Failed to fetch versions', options)
+}
+
+/**
+ * Keep a version list up to date
+ *
+ * Calls `listener` with the cached list right away, then with every refresh.
+ * All tabs watching the same list share one poll every `intervalMs`.
+ * Returns a function that stops watching.
+ */
+export function watchArtifactVersions(
+  status: string | undefined,
+  query: VersionQuery,
+  listener: CacheListener<ArtifactVersion[]>,
+  intervalMs: number = 4000
+): () => void {
+  return watch(artifactVersionsUrl(status, query), 'Failed to fetch versions', intervalMs, listener)
+}
 
-  return res.json()
+export interface VersionHistoryPage {
+  artifact: number;
+  next: string | null;
+  results: ArtifactVersion[];
+}
+
+/**
+ * List the version history of one artifact
+ *
+ * Newest version first, one page at a time. Pass the previous page's
+ * `next` URL to fetch the following page.
+ */
+export async function listArtifactVersionHistory(
+  artifactId: number,
+  next?: string | null,
+  query: VersionQuery = {}
+): Promise<VersionHistoryPage> {
+  const url = next
+    ? new URL(next)
+    : applyVersionQuery(new URL(`${API_BASE}/api/artifacts/${artifactId}/versions/`), query)
+
+  return cachedGet<VersionHistoryPage>(url.toString(), 'Failed to fetch version history')
+}
+
+export interface ProjectStatusSummary {
+  project: number;
+  name: string;
+  awaiting_approval: number;
+  approved: number;
+  rejected: number;
+  total: number;
+}
+
+/**
+ * Get the status badge counts for a project
+ *
+ * Reads precomputed counters, so it stays cheap however many versions exist.
+ */
+export async function getProjectSummary(projectId: number): Promise<ProjectStatusSummary> {
+  return cachedGet<ProjectStatusSummary>(
+    `${API_BASE}/api/projects/${projectId}/summary/`,
+    'Failed to fetch project summary'
+  )
+}
+
+/**
+ * Absolute URL of a version's preview thumbnail, or null if it has none yet
+ *
+ * Preview files never change, so the browser can cache them for good.
+ */
+export function previewImageUrl(version: Pick<ArtifactVersion, "preview_url">): string | null {
+  return version.preview_url ? new URL(version.preview_url, API_BASE).toString() : null
 }
 
 /**
@@ -163,27 +665,29 @@ export async function listArtifactVersions(status?: string): Promise<ArtifactVer
 export async function approveVersion(
     versionId: number,
     decidedBy: string,
+    idempotencyKey: string = newIdempotencyKey(),
 ): Promise<ArtifactVersion> {
-    const res = await fetch(
+    const res = await postIdempotent(
         `${API_BASE}/api/artifact-versions/${versionId}/approve/`,
         {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json'},
-            body: JSON.stringify({
-                decided_by: decidedBy,
-            }),
-        }
+            decided_by: decidedBy,
+        },
+        idempotencyKey,
     )
 
     if (!res.ok) {
         const errorData = await res.json()
         // Check for 409 (finality violation)
         if (res.status === 409) {
+            // Our cached copy still says pending; refetch it next time
+            invalidate([`/api/artifact-versions/${versionId}/`])
             throw new Error('This version has already been decided')
         }
         throw new Error(errorData.detail || 'Failed to approve version')
     }
-    return res.json()
+    const updated: ArtifactVersion = await res.json()
+    updateCachedVersion(updated)
+    return updated
 }
 
 /**
@@ -199,27 +703,29 @@ export async function rejectVersion(
     decidedBy: string,
     reason: string,
     note?: string,
+    idempotencyKey: string = newIdempotencyKey(),
 ): Promise<ArtifactVersion> {
-    const res = await fetch(
+    const res = await postIdempotent(
         `${API_BASE}/api/artifact-versions/${versionId}/reject/`,
         {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json'},
-            body: JSON.stringify({
-                decided_by: decidedBy,
-                reason,
-                note,
-            }),
-        }   
+            decided_by: decidedBy,
+            reason,
+            note,
+        },
+        idempotencyKey,
     )
 
     if (!res.ok) {
         const errorData = await res.json()
         // Check for 409 (finality violation)
         if (res.status === 409) {
+            // Our cached copy still says pending; refetch it next time
+            invalidate([`/api/artifact-versions/${versionId}/`])
             throw new Error('This version has already been decided')
         }
         throw new Error(errorData.detail || 'Failed to reject version')
     }
-    return res.json()
+    const updated: ArtifactVersion = await res.json()
+    updateCachedVersion(updated)
+    return updated
 }
\ No newline at end of file
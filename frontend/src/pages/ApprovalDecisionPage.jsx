@@ -1,12 +1,14 @@
 import '../App.css'
 import { NavLink, useParams } from 'react-router-dom'
 import { useState, useEffect } from 'react'
-import { getArtifactVersion, approveVersion, rejectVersion } from '../api/client'
+import { getArtifactVersion, peekArtifactVersion, approveVersion, rejectVersion } from '../api/client'
 
 export function ApprovalDecisionPage() {
   const { versionId } = useParams()
-  const [version, setVersion] = useState(null)
-  const [isLoading, setIsLoading] = useState(true)
+  // Render straight away from the list's cached copy, if there is one,
+  // while the full version (with artifact and project) loads
+  const [version, setVersion] = useState(() => peekArtifactVersion(Number.parseInt(versionId, 10)) ?? null)
+  const [isLoading, setIsLoading] = useState(() => version === null)
   const [error, setError] = useState(null)
   
   // Form states
@@ -25,7 +27,7 @@ export function ApprovalDecisionPage() {
           return
         }
 
-        const data = await getArtifactVersion(id)
+        const data = await getArtifactVersion(id, { include: ['artifact', 'project'] })
         setVersion(data)
       } catch (err) {
         setError(err.message)
@@ -44,8 +46,9 @@ export function ApprovalDecisionPage() {
 
     try {
       const updated = await approveVersion(parseInt(versionId), email)
-      // Update local version state so UI reflects decision immediately
-      setVersion(updated)
+      // Update local version state so UI reflects decision immediately,
+      // keeping the artifact/project details from the initial fetch
+      setVersion((current) => ({ ...updated, artifact: current.artifact, project: current.project }))
       setSuccess(true)
     } catch (err) {
       setSubmitError(err.message)
@@ -61,8 +64,9 @@ export function ApprovalDecisionPage() {
 
     try {
       const updated = await rejectVersion(parseInt(versionId), email, reason)
-      // Update local version state so UI reflects decision immediately
-      setVersion(updated)
+      // Update local version state so UI reflects decision immediately,
+      // keeping the artifact/project details from the initial fetch
+      setVersion((current) => ({ ...updated, artifact: current.artifact, project: current.project }))
       setSuccess(true)
     } catch (err) {
       setSubmitError(err.message)
@@ -115,6 +119,18 @@ export function ApprovalDecisionPage() {
           </div>
 
           <div className="stack">
+            {typeof version.artifact === 'object' && (
+              <div className="row">
+                <span className="subtle">Artifact:</span>
+                <span>{version.artifact.name}</span>
+                {version.project && (
+                  <>
+                    <span className="subtle">·</span>
+                    <span className="subtle">{version.project.name}</span>
+                  </>
+                )}
+              </div>
+            )}
             <div className="row">
               <span className="subtle">URL:</span>
               <a href={version.url} target="_blank" rel="noopener noreferrer">{version.url}</a>
@@ -1,12 +1,14 @@
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { listArtifactVersions } from '../api/client'
+import { previewImageUrl, watchArtifactVersions } from '../api/client'
 import '../App.css'
 
+// Only the fields this page renders
+const LIST_FIELDS = ['id', 'version_number', 'status', 'url', 'preview_url', 'submitted_by', 'created_at', 'decision']
+
 export function ApprovalListPage() {
   const navigate = useNavigate()
   const [allVersions, setAllVersions] = useState([])
-  const [versions, setVersions] = useState([])
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState(null)
   const [filter, setFilter] = useState('AWAITING_APPROVAL')
@@ -17,38 +19,23 @@ export function ApprovalListPage() {
   }
 
   useEffect(() => {
-    let isMounted = true
-    const fetchVersions = async () => {
-      try {
-        const data = await listArtifactVersions()
-        if (isMounted) {
-          setAllVersions(data)
-          setVersions(applyFilter(data, filter))
-          setError(null)
-        }
-      } catch (err) {
-        if (isMounted) {
-          setError(err.message)
-        }
-      } finally {
-        if (isMounted) {
-          setIsLoading(false)
-        }
+    // The list is shared with other open tabs; only one of them polls
+    return watchArtifactVersions(undefined, { fields: LIST_FIELDS }, (data, err) => {
+      if (err) {
+        setError(err.message)
+      } else if (data) {
+        setAllVersions(data)
+        setError(null)
       }
-    }
-
-    fetchVersions()
-    const intervalId = setInterval(fetchVersions, 4000)
-    return () => {
-      isMounted = false
-      clearInterval(intervalId)
-    }
-  }, [filter])
+      setIsLoading(false)
+    })
+  }, [])
 
   const handleViewDecision = (versionId) => {
     navigate(`/approve/${versionId}`)
   }
 
+  const versions = applyFilter(allVersions, filter)
   const pendingCount = allVersions.filter(v => v.status === 'AWAITING_APPROVAL').length
   const approvedCount = allVersions.filter(v => v.status === 'APPROVED').length
   const rejectedCount = allVersions.filter(v => v.status === 'REJECTED').length
@@ -109,6 +96,18 @@ export function ApprovalListPage() {
             <div className="item" key={version.id}>
               <div className="itemHeader">
                 <div className="stack" style={{ gap: 10 }}>
+                  {version.preview_url && (
+                    <a href={version.url} target="_blank" rel="noopener noreferrer">
+                      <img
+                        className="preview"
+                        src={previewImageUrl(version)}
+                        alt={`Preview of version ${version.version_number}`}
+                        loading="lazy"
+                        onError={(e) => { e.currentTarget.style.display = 'none' }}
+                      />
+                    </a>
+                  )}
+
                   <div className="kpi">
                     <span className="pill">Version ID: <span className="mono">{version.id}</span> (v{version.version_number})</span>
                     <span className={`pill ${version.status === 'APPROVED' ? 'pillApproved' : version.status === 'REJECTED' ? 'pillRejected' : 'pillPending'}`}>
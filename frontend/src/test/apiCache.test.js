@@ -0,0 +1,118 @@
+/**
+ * Test file for the API client's response cache
+ *
+ * Checks request deduplication, stale-while-revalidate, that decisions
+ * are written into cached lists and which tab polls with and without web locks
+ */
+
+import { test, expect, beforeEach, afterEach, vi } from 'vitest'
+import {
+  approveVersion,
+  clearApiCache,
+  listArtifactVersions,
+  peekArtifactVersion,
+} from '../api/client'
+
+const pending = { id: 1, version_number: 1, status: 'AWAITING_APPROVAL', url: 'https://example.com/v1', decision: null }
+
+const jsonResponse = (data, status = 200) => ({
+  ok: status < 400,
+  status,
+  json: async () => data,
+  text: async () => JSON.stringify(data),
+})
+
+beforeEach(() => {
+  clearApiCache()
+  globalThis.fetch = vi.fn(async () => jsonResponse([pending]))
+})
+
+afterEach(() => {
+  vi.useRealTimers()
+  vi.unstubAllGlobals()
+})
+
+// Tab coordination starts once per module, so each of these tests loads a
+// fresh copy of the client after stubbing the browser APIs it looks for
+class SilentChannel {
+  postMessage() {}
+  close() {}
+}
+
+async function freshClient(locks) {
+  vi.useFakeTimers()
+  vi.stubGlobal('BroadcastChannel', SilentChannel)
+  vi.stubGlobal('navigator', locks ? { locks } : {})
+  vi.resetModules()
+  return import('../api/client')
+}
+
+// Test 1: Do concurrent calls share one request?
+test('dedupes in-flight requests', async () => {
+  const [first, second] = await Promise.all([listArtifactVersions(), listArtifactVersions()])
+
+  expect(fetch).toHaveBeenCalledTimes(1)
+  expect(first).toEqual(second)
+})
+
+// Test 2: Is stale data served while it is refreshed?
+test('serves cached data and revalidates when stale', async () => {
+  await listArtifactVersions()
+  await listArtifactVersions()
+  expect(fetch).toHaveBeenCalledTimes(1)
+
+  fetch.mockImplementation(async () => jsonResponse([{ ...pending, url: 'https://example.com/v1b' }]))
+  const stale = await listArtifactVersions(undefined, {}, { maxAgeMs: 0 })
+  expect(stale[0].url).toBe('https://example.com/v1')
+  expect(fetch).toHaveBeenCalledTimes(2)
+
+  await vi.waitFor(async () => {
+    expect((await listArtifactVersions())[0].url).toBe('https://example.com/v1b')
+  })
+})
+
+// Test 3: Does an approval update the cached lists?
+test('writes approve responses into cached lists', async () => {
+  await listArtifactVersions()
+  await listArtifactVersions('AWAITING_APPROVAL')
+
+  const decided = { ...pending, status: 'APPROVED', decision: { decision: 'APPROVE', decided_by: 'c@client.com' } }
+  fetch.mockImplementation(async () => jsonResponse(decided))
+  await approveVersion(1, 'c@client.com')
+  fetch.mockClear()
+
+  expect((await listArtifactVersions())[0].status).toBe('APPROVED')
+  expect(await listArtifactVersions('AWAITING_APPROVAL')).toEqual([])
+  expect(peekArtifactVersion(1).decision.decided_by).toBe('c@client.com')
+  expect(fetch).not.toHaveBeenCalled()
+})
+
+// Test 4: Without web locks (Node 18, older browsers) does a tab poll for itself?
+test('polls every interval when web locks are unavailable', async () => {
+  const client = await freshClient(undefined)
+  const seen = []
+  const stop = client.watchArtifactVersions(undefined, {}, (data) => seen.push(data), 1000)
+
+  await vi.advanceTimersByTimeAsync(2000)
+
+  expect(fetch).toHaveBeenCalledTimes(3)
+  expect(seen.at(-1)).toEqual([pending])
+  stop()
+  client.clearApiCache()
+})
+
+// Test 5: Does a tab that another tab leads wait for the leader's updates?
+test('leaves polling to the leader when web locks are available', async () => {
+  // Another tab holds the lock, so this one's request is never granted
+  const locks = { request: vi.fn(() => new Promise(() => {})) }
+  const client = await freshClient(locks)
+  const stop = client.watchArtifactVersions(undefined, {}, () => {}, 1000)
+
+  await vi.advanceTimersByTimeAsync(2000)
+
+  expect(locks.request).toHaveBeenCalledTimes(1)
+  // Only the first load; it would poll itself once the leader went quiet
+  expect(fetch).toHaveBeenCalledTimes(1)
+  stop()
+  client.clearApiCache()
+})